@@ -0,0 +1,143 @@
+import timeit
+
+import numpy as np
+from maya import cmds
+from maya.api import OpenMayaAnim as om2Anim
+
+from tests import mayatestutils
+from zoo.libs.maya.api import anim
+from zoo.libs.maya.api import nodes
+from zoo.libs.maya.api import plugs
+from zoo.libs.maya.cameras import utils as camerautils
+
+
+class TestFrameSampler(mayatestutils.BaseMayaTest):
+    application = "maya"
+
+    def setUp(self):
+        self.node = cmds.createNode("transform", n="sampled")
+        cmds.setKeyframe(self.node, attribute="translateX", time=1, value=0.0)
+        cmds.setKeyframe(self.node, attribute="translateX", time=11, value=10.0)
+        cmds.keyTangent(self.node, attribute="translateX", inTangentType="linear", outTangentType="linear")
+        cmds.currentTime(1)
+
+    def test_iterFrameRangeDGContext(self):
+        frames = [context.getTime().value for context in anim.iterFrameRangeDGContext(1, 4)]
+        self.assertEquals(frames, [1.0, 2.0, 3.0, 4.0])
+
+    def test_frameRange(self):
+        self.assertEquals(anim.frameRange(1, 3), [1.0, 2.0, 3.0])
+        self.assertEquals(anim.frameRange(1, 2, subframes=1), [1.0, 1.5, 2.0])
+        self.assertEquals(anim.frameRange(0, 5, step=2), [0.0, 2.0, 4.0])
+
+    def test_samplePlugs(self):
+        plugList = [plugs.asMPlug(self.node + ".translate"), plugs.asMPlug(self.node + ".worldMatrix[0]")]
+        samples = anim.samplePlugs(plugList, anim.frameRange(1, 11, subframes=1))
+        self.assertEquals(samples.shape, (21, 19))
+        self.assertTrue(np.allclose(samples[:, 0], np.linspace(0.0, 10.0, 21)))
+        # worldMatrix translation x
+        self.assertTrue(np.allclose(samples[:, 3 + 12], samples[:, 0]))
+        self.assertEquals(len(anim.channelNames(plugList)), 19)
+        self.assertEquals(om2Anim.MAnimControl.currentTime().value, 1.0)
+        attrSamples = anim.sampleAttributes([(nodes.asMObject(self.node), "translateX")], [6])
+        self.assertTrue(np.allclose(attrSamples, [[5.0]]))
+
+    @mayatestutils.benchmark
+    def test_benchmarkSamplePlugs(self):
+        names = []
+        for i in range(50):
+            node = cmds.createNode("transform")
+            for attr in ("translateX", "rotateY", "scaleZ"):
+                cmds.setKeyframe(node, attribute=attr, time=1, value=0.0)
+                cmds.setKeyframe(node, attribute=attr, time=200, value=float(i))
+            names.extend(".".join((node, attr)) for attr in ("translateX", "rotateY", "scaleZ"))
+        plugList = [plugs.asMPlug(name) for name in names]
+        frames = anim.frameRange(1, 200)
+        getAttrTime = timeit.timeit(lambda: [[cmds.getAttr(name, time=frame) for name in names]
+                                             for frame in frames], number=1)
+        sampleTime = timeit.timeit(lambda: anim.samplePlugs(plugList, frames), number=1)
+        mayatestutils.reportBenchmark("150 channels x 200 frames, getAttr(time=): {}s, samplePlugs: {}s", getAttrTime,
+                                      sampleTime)
+
+
+class TestBake(mayatestutils.BaseMayaTest):
+    application = "maya"
+
+    def _animatedNode(self, name, end=11):
+        node = cmds.createNode("transform", n=name)
+        cmds.setKeyframe(node, attribute="translateX", time=1, value=0.0)
+        cmds.setKeyframe(node, attribute="translateX", time=end, value=10.0)
+        cmds.keyTangent(node, attribute="translateX", inTangentType="linear", outTangentType="linear")
+        cmds.setKeyframe(node, attribute="rotateY", time=1, value=0.0)
+        cmds.setKeyframe(node, attribute="rotateY", time=end, value=90.0)
+        return node
+
+    def test_reduceKeys(self):
+        frames = np.arange(100.0)
+        self.assertEquals(list(anim.reduceKeys(frames, frames * 2.0, 1e-6)), [0, 99])
+        values = np.sin(frames / 10.0)
+        kept = anim.reduceKeys(frames, values, 0.01)
+        self.assertTrue(len(kept) < len(frames))
+        self.assertTrue(np.abs(np.interp(frames, frames[kept], values[kept]) - values).max() <= 0.01)
+
+    def test_bakePlugs(self):
+        source = self._animatedNode("bakeSource")
+        target = cmds.createNode("transform", n="bakeTarget")
+        cmds.parentConstraint(source, target)
+        baked = cmds.createNode("transform", n="bakeResult")
+        pairs = [(plugs.asMPlug(".".join((target, attr))), plugs.asMPlug(".".join((baked, attr))))
+                 for attr in ("translateX", "translateY", "rotateY")]
+        curves = anim.bakePlugs(pairs, anim.frameRange(1, 11), tolerance=1e-4)
+        # translateY never changes so it's set instead of keyed
+        self.assertIsNone(curves[1])
+        self.assertEquals(cmds.keyframe(baked + ".translateX", query=True, keyframeCount=True), 2)
+        self.assertTrue(cmds.keyframe(baked + ".rotateY", query=True, keyframeCount=True) > 2)
+        self.assertAlmostEquals(cmds.getAttr(baked + ".translateX", time=6), 5.0, places=4)
+        self.assertAlmostEquals(cmds.getAttr(baked + ".rotateY", time=6), cmds.getAttr(source + ".rotateY", time=6),
+                                places=3)
+
+    def test_bakeMetaCameras(self):
+        cameras = [camerautils.createCamera("shot{}".format(i), 1, 20) for i in range(2)]
+        for cam in cameras:
+            cam.framePadding = 0
+        cmds.setKeyframe(cmds.listRelatives(cameras[0].fullPathName(), parent=True, fullPath=True)[0],
+                         attribute="translateZ", time=1, value=0.0)
+        cmds.setKeyframe(cmds.listRelatives(cameras[0].fullPathName(), parent=True, fullPath=True)[0],
+                         attribute="translateZ", time=20, value=19.0)
+        baked = camerautils.bakeMetaCameras(cameras)
+        self.assertIsNone(baked[1])
+        bakedTransform = cmds.listRelatives(baked[0].fullPathName(), parent=True, fullPath=True)[0]
+        self.assertEquals(cmds.keyframe(bakedTransform + ".translateZ", query=True, keyframeCount=True), 20)
+        self.assertAlmostEquals(cmds.getAttr(bakedTransform + ".translateZ", time=10),
+                                cmds.getAttr(cameras[0].fullPathName().rsplit("|", 1)[0] + ".translateZ", time=10))
+
+    @mayatestutils.benchmark
+    def test_benchmarkBakeMetaCameras(self):
+        def buildCameras():
+            cameras = []
+            for i in range(30):
+                cam = camerautils.createCamera("benchShot{}".format(i), 1, 200)
+                transform = cmds.listRelatives(cam.fullPathName(), parent=True, fullPath=True)[0]
+                for attr in ("translateX", "translateY", "translateZ", "rotateX", "rotateY", "rotateZ"):
+                    cmds.setKeyframe(transform, attribute=attr, time=1, value=0.0)
+                    cmds.setKeyframe(transform, attribute=attr, time=200, value=float(i))
+                cameras.append(cam)
+            return cameras
+
+        def bakeResults(cam):
+            # the copyKey, pasteKey and bakeResults path which bakeCameraMeatAnimToClone used before
+            transform = cmds.listRelatives(cam.fullPathName(), parent=True, fullPath=True)[0]
+            bakedCam = camerautils.createCamera(cam.shotName.asString() + "_baked", 1, 200)
+            bakedCam.copyFrom(cam)
+            target = cmds.listRelatives(bakedCam.fullPathName(), parent=True, fullPath=True)[0]
+            cmds.copyKey(transform)
+            cmds.pasteKey(target, option="replace")
+            cmds.bakeResults(target, t=(-9, 210), sb=1)
+
+        cameras = buildCameras()
+        legacyTime = timeit.timeit(lambda: [bakeResults(cam) for cam in cameras], number=1)
+        cmds.file(force=True, new=True)
+        cameras = buildCameras()
+        batchTime = timeit.timeit(lambda: camerautils.bakeMetaCameras(cameras), number=1)
+        mayatestutils.reportBenchmark("30 cameras x 220 frames, bakeResults per camera: {}s, bakeMetaCameras: {}s",
+                                      legacyTime, batchTime)
@@ -0,0 +1,111 @@
+import timeit
+
+import numpy as np
+from maya import cmds
+
+from tests import mayatestutils
+from zoo.libs.maya.api import deformers
+from zoo.libs.maya.api import nodes
+
+
+class TestSkinClusterWeights(mayatestutils.BaseMayaTest):
+    application = "maya"
+
+    def _buildSkin(self, subdivisions, jointCount):
+        mesh = cmds.polyPlane(sx=subdivisions, sy=subdivisions, ch=False)[0]
+        cmds.select(clear=True)
+        joints = [cmds.joint(p=(i, 0, 0)) for i in range(jointCount)]
+        cluster = cmds.skinCluster(joints, mesh, toSelectedBones=True, maximumInfluences=4)[0]
+        return mesh, joints, deformers.SkinCluster(nodes.asMObject(cluster))
+
+    def test_weightsArray(self):
+        mesh, joints, skin = self._buildSkin(4, 3)
+        weights = skin.weightsArray()
+        self.assertEquals(weights.shape, (25, 3))
+        self.assertTrue(np.allclose(weights.sum(axis=1), 1.0))
+        names = skin.influenceNames()
+        self.assertEquals(names, cmds.ls(joints, long=True))
+        influenceData = skin.influenceWeights()
+        self.assertTrue(np.allclose(influenceData[names[1]], weights[:, 1]))
+
+    def test_sparseWeights(self):
+        mesh, joints, skin = self._buildSkin(4, 3)
+        weights = skin.weightsArray()
+        sparse = skin.sparseWeights()
+        self.assertEquals(len(sparse.indptr), 26)
+        self.assertEquals(len(sparse.values), np.count_nonzero(weights))
+        self.assertTrue(np.allclose(deformers.sparseToDense(sparse), weights))
+
+    def test_setWeightsArray(self):
+        mesh, joints, skin = self._buildSkin(4, 3)
+        original = skin.weightsArray()
+        newWeights = np.zeros_like(original)
+        newWeights[:, 2] = 1.0
+        oldWeights = skin.setWeightsArray(newWeights, returnOldWeights=True)
+        self.assertTrue(np.allclose(oldWeights, original))
+        self.assertTrue(np.allclose(skin.weightsArray(), newWeights))
+        skin.setWeightsArray(deformers.denseToSparse(original))
+        self.assertTrue(np.allclose(skin.weightsArray(), original))
+        self.assertRaises(ValueError, skin.setWeightsArray, np.zeros((25, 2)))
+
+    def test_applyWeightsFromData(self):
+        mesh, joints, skin = self._buildSkin(4, 3)
+        original = skin.weightsArray()
+        names = skin.influenceNames()
+        shape = nodes.asMObject(cmds.listRelatives(mesh, shapes=True, fullPath=True)[0])
+        data = list(deformers.serializeSkinWeightsFromShapes([shape]).values())[0]
+        # same topology, applied by index onto a new skinCluster
+        cmds.delete(nodes.nameFromMObject(skin.cluster))
+        newSkin = deformers.applyWeightsFromData(data, shape)
+        self.assertTrue(np.allclose(newSkin.weightsArray(), original))
+        # different topology, matched by position onto the existing skinCluster
+        denseMesh = cmds.polyPlane(sx=8, sy=8, ch=False)[0]
+        cmds.skinCluster(joints[0], denseMesh, toSelectedBones=True)
+        denseShape = nodes.asMObject(cmds.listRelatives(denseMesh, shapes=True, fullPath=True)[0])
+        denseSkin = deformers.applyWeightsFromData(data, denseShape)
+        weights = denseSkin.weightsArray()
+        self.assertEquals(weights.shape, (81, 3))
+        self.assertTrue(np.allclose(weights.sum(axis=1), 1.0))
+        # the corner vertices sit on a source vertex
+        denseNames = denseSkin.influenceNames()
+        self.assertTrue(np.allclose(weights[0][[denseNames.index(name) for name in names]], original[0]))
+
+    def test_processWeightArrays(self):
+        weights = np.array([[0.5, 0.3, 0.15, 0.05],
+                            [0.1, 0.2, 0.3, 0.4]])
+        result = deformers.processWeights(weights, pruneThreshold=0.1, maxInfluences=2)
+        self.assertTrue(np.allclose(result, [[0.625, 0.375, 0.0, 0.0], [0.0, 0.0, 3.0 / 7.0, 4.0 / 7.0]]))
+        # the locked column is always kept and the others fill the remaining weight
+        result = deformers.processWeights(weights, maxInfluences=2, locked=[3])
+        self.assertTrue(np.allclose(result, [[0.95, 0.0, 0.0, 0.05], [0.0, 0.0, 0.6, 0.4]]))
+        self.assertTrue(np.allclose(weights[0], [0.5, 0.3, 0.15, 0.05]))
+        # locked weights that fill the limit still leave an unlocked influence to take the remainder
+        result = deformers.processWeights([[0.3, 0.7], [0.3, 0.0]], maxInfluences=1, locked=[0])
+        self.assertTrue(np.allclose(result, [[0.3, 0.7], [0.3, 0.0]]))
+        result = deformers.processWeights([[0.7, 0.15, 0.15]], pruneThreshold=0.2, locked=[0])
+        self.assertTrue(np.allclose(result.sum(axis=1), 1.0))
+
+    def test_skinProcessWeights(self):
+        mesh, joints, skin = self._buildSkin(4, 3)
+        cmds.setAttr(joints[0] + ".lockInfluenceWeights", True)
+        original = skin.weightsArray()
+        oldWeights = skin.processWeights(pruneThreshold=0.2, maxInfluences=1)
+        self.assertTrue(np.allclose(oldWeights, original))
+        weights = skin.weightsArray()
+        self.assertTrue(np.allclose(weights[:, 0], original[:, 0]))
+        self.assertTrue(np.all(np.count_nonzero(weights[:, 1:], axis=1) <= 1))
+        self.assertTrue(np.allclose(weights.sum(axis=1), 1.0))
+
+    @mayatestutils.benchmark
+    def test_benchmarkWeights(self):
+        # ~200k vertices and 150 joints
+        mesh, joints, skin = self._buildSkin(446, 150)
+        legacyTime = timeit.timeit(skin.serialize, number=1)
+        readTime = timeit.timeit(skin.weightsArray, number=1)
+        weights = skin.weightsArray()
+        sparseTime = timeit.timeit(lambda: deformers.denseToSparse(weights), number=1)
+        writeTime = timeit.timeit(lambda: skin.setWeightsArray(weights), number=1)
+        processTime = timeit.timeit(lambda: skin.processWeights(pruneThreshold=0.01, maxInfluences=4), number=1)
+        mayatestutils.reportBenchmark("{} vertices x {} joints, serialize: {}s, weightsArray: {}s, sparse: {}s, "
+                                      "setWeightsArray: {}s, processWeights: {}s", weights.shape[0], weights.shape[1],
+                                      legacyTime, readTime, sparseTime, writeTime, processTime)
@@ -0,0 +1,60 @@
+from maya import cmds
+
+from tests import mayatestutils
+from zoo.libs.maya.api import namecache
+from zoo.libs.maya.api import nodes
+from zoo.libs.maya.api import plugs
+
+
+class TestNameCache(mayatestutils.BaseMayaTest):
+    application = "maya"
+
+    def setUp(self):
+        self.parent = cmds.createNode("transform", n="cacheParent")
+        self.child = cmds.createNode("transform", n="cacheChild", parent=self.parent)
+        self.cache = namecache.NameCache()
+        self.cache.setEnabled(True)
+
+    def tearDown(self):
+        self.cache.setEnabled(False)
+
+    def test_resolve(self):
+        obj = nodes.asMObject("|cacheParent|cacheChild")
+        self.assertEquals(len(self.cache), 1)
+        self.assertEquals(nodes.asMObject("|cacheParent|cacheChild"), obj)
+        self.assertEquals(nodes.nameFromMObject(obj), "|cacheParent|cacheChild")
+        self.assertEquals(plugs.asMPlug("|cacheParent|cacheChild.translateX").node(), obj)
+        results = nodes.asMObjects(["cacheParent", "missingNode", "|cacheParent|cacheChild", "cacheParent"])
+        self.assertIsNone(results[1])
+        self.assertEquals(results[0], results[3])
+        self.assertEquals(results[2], obj)
+
+    def test_invalidation(self):
+        child = nodes.asMObject("|cacheParent|cacheChild")
+        self.assertEquals(nodes.nameFromMObject(child), "|cacheParent|cacheChild")
+        # renaming the parent changes the child's path
+        cmds.rename(self.parent, "renamedParent")
+        self.assertEquals(nodes.nameFromMObject(child), "|renamedParent|cacheChild")
+        self.assertRaises(RuntimeError, nodes.asMObject, "|cacheParent|cacheChild")
+        cmds.parent("|renamedParent|cacheChild", world=True)
+        self.assertEquals(nodes.nameFromMObject(child), "|cacheChild")
+        cmds.delete("cacheChild")
+        self.assertIsNone(nodes.asMObjects(["cacheChild"])[0])
+
+    def test_ambiguousShortName(self):
+        self.assertEquals(nodes.asMObject("cacheChild"), nodes.asMObject("|cacheParent|cacheChild"))
+        other = cmds.createNode("transform", n="otherParent")
+        cmds.createNode("transform", n="cacheChild", parent=other)
+        # the cached short name is no longer unique so it has to fail the same way MSelectionList does
+        self.assertRaises(RuntimeError, nodes.asMObject, "cacheChild")
+        self.assertRaises(RuntimeError, plugs.asMPlug, "cacheChild.translateX")
+        self.assertIsNotNone(nodes.asMObject("|otherParent|cacheChild"))
+
+    def test_lruEviction(self):
+        self.cache.maxSize = 2
+        try:
+            for name in ("cacheParent", "|cacheParent|cacheChild", "persp"):
+                nodes.asMObject(name)
+            self.assertEquals(len(self.cache), 2)
+        finally:
+            self.cache.maxSize = namecache.DEFAULT_MAX_SIZE
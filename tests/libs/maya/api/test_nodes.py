@@ -1,7 +1,10 @@
+import timeit
+
 from maya import cmds
 from maya.api import OpenMaya as om
 
 from tests import mayatestutils
+from zoo.libs.maya.api import generic
 from zoo.libs.maya.api import nodes
 from maya.api import OpenMaya as om2
 
@@ -201,3 +204,129 @@ class TestNodes(mayatestutils.BaseMayaTest):
     def test_createDGNode(self):
         node = nodes.createDGNode("new", "network")
         self.assertIsInstance(node, om2.MObject)
+
+    def _buildChain(self, count):
+        parent = None
+        chain = []
+        for i in range(count):
+            joint = cmds.createNode("joint", parent=parent) if parent else cmds.createNode("joint")
+            cmds.setAttr(joint + ".translate", 1.0, 0.5, 0.0)
+            cmds.setAttr(joint + ".rotate", 0.0, 10.0, 5.0)
+            chain.append(nodes.asMObject(joint))
+            parent = joint
+        return chain
+
+    def test_batchMatrices(self):
+        chain = self._buildChain(5)
+        world = nodes.getWorldMatrices(chain)
+        self.assertEquals(world.shape, (5, 4, 4))
+        parents = nodes.getParentMatrices(chain)
+        parentInverse = nodes.getParentInverseMatrices(chain)
+        local = nodes.getLocalMatrices(chain)
+        for index, joint in enumerate(chain):
+            for batch, single in ((world, nodes.getWorldMatrix(joint)),
+                                  (parents, nodes.getParentMatrix(joint)),
+                                  (parentInverse, nodes.getParentInverseMatrix(joint)),
+                                  (local, nodes.getMatrix(joint))):
+                for i, value in enumerate(single):
+                    self.assertAlmostEquals(batch[index].flat[i], value, places=5)
+
+    @mayatestutils.benchmark
+    def test_benchmarkWorldMatrices(self):
+        chain = self._buildChain(500)
+        singleTime = timeit.timeit(lambda: [nodes.getWorldMatrix(i) for i in chain], number=10)
+        batchTime = timeit.timeit(lambda: nodes.getWorldMatrices(chain), number=10)
+        mayatestutils.reportBenchmark("500 joints x10, getWorldMatrix: {}s, getWorldMatrices: {}s", singleTime,
+                                      batchTime)
+
+    def test_matchTransforms(self):
+        sources = self._buildChain(4)
+        targets = self._buildChain(4)
+        for index, joint in enumerate(targets):
+            name = nodes.nameFromMObject(joint)
+            cmds.setAttr(name + ".jointOrient", 10.0 * index, 5.0, 0.0)
+            cmds.setAttr(name + ".rotateOrder", index % 6)
+        cmds.setAttr(nodes.nameFromMObject(targets[0]) + ".translate", 5.0, 0.0, 0.0)
+        before = nodes.getWorldMatrices(targets)
+        writer = nodes.matchTransforms(targets[:1], sources[0])
+        self.assertTrue(len(writer) > 0)
+        # children follow their parents so match the chain one level at a time
+        for source, target in zip(sources[1:], targets[1:]):
+            nodes.matchTransforms([target], [source])
+        expected = nodes.getWorldMatrices(sources)
+        result = nodes.getWorldMatrices(targets)
+        for a, b in zip(expected.flat, result.flat):
+            self.assertAlmostEquals(a, b, places=4)
+        writer.undoIt()
+        self.assertAlmostEquals(nodes.getWorldMatrices(targets[:1])[0, 3, 0], before[0, 3, 0], places=4)
+
+    def test_matchTransformsPivotsAndInverseScale(self):
+        source = cmds.createNode("transform")
+        cmds.setAttr(source + ".translate", 1.0, 2.0, 3.0)
+        cmds.setAttr(source + ".rotate", 30.0, 45.0, 10.0)
+        cmds.setAttr(source + ".scale", 1.5, 1.5, 1.5)
+        target = cmds.createNode("transform")
+        cmds.setAttr(target + ".rotatePivot", 1.0, 2.0, 3.0)
+        cmds.setAttr(target + ".rotatePivotTranslate", 0.5, 0.0, 0.0)
+        cmds.setAttr(target + ".scalePivot", 0.0, 1.0, 0.0)
+        cmds.setAttr(target + ".scalePivotTranslate", 0.0, 0.0, 0.25)
+        parent = cmds.createNode("transform")
+        cmds.setAttr(parent + ".scale", 2.0, 3.0, 1.0)
+        cmds.setAttr(parent + ".rotate", 0.0, 20.0, 0.0)
+        joint = cmds.createNode("joint", parent=parent)
+        cmds.setAttr(joint + ".jointOrient", 0.0, 0.0, 15.0)
+        sourceObj = nodes.asMObject(source)
+        targets = [nodes.asMObject(target), nodes.asMObject(joint)]
+        nodes.matchTransforms(targets, sourceObj)
+        expected = nodes.getWorldMatrices([sourceObj])[0]
+        for result in nodes.getWorldMatrices(targets):
+            for a, b in zip(expected.flat, result.flat):
+                self.assertAlmostEquals(a, b, places=4)
+
+    def test_matchTransformMulti(self):
+        source = nodes.asMObject(cmds.createNode("transform"))
+        cmds.setAttr(nodes.nameFromMObject(source) + ".translate", 1.0, 2.0, 3.0)
+        cmds.setAttr(nodes.nameFromMObject(source) + ".rotate", 45.0, 0.0, 0.0)
+        targets = [om2.MFnDagNode(nodes.asMObject(cmds.createNode("transform"))).getPath() for _ in range(3)]
+        for space in (om2.MSpace.kWorld, om2.MSpace.kObject):
+            self.assertTrue(nodes.matchTransformMulti(targets, source, space=space))
+            for target in targets:
+                for a, b in zip(nodes.getWorldMatrix(target.node()), nodes.getWorldMatrix(source)):
+                    self.assertAlmostEquals(a, b, places=4)
+
+    def test_iterHierarchy(self):
+        root = cmds.createNode("transform", n="hierarchyRoot")
+        a = cmds.createNode("transform", n="hierarchyA", parent=root)
+        b = cmds.createNode("joint", n="hierarchyB", parent=root)
+        cmds.createNode("transform", n="hierarchyC", parent=a)
+        cmds.createNode("joint", n="hierarchyD", parent=b)
+        rootObj = nodes.asMObject(root)
+        depthFirst = [nodes.nameFromMObject(i, partialName=True)
+                      for i in nodes.iterHierarchy(rootObj, includeRoot=True)]
+        self.assertEquals(depthFirst, ["hierarchyRoot", "hierarchyA", "hierarchyC", "hierarchyB", "hierarchyD"])
+        breadthFirst = [nodes.nameFromMObject(i, partialName=True)
+                        for i in nodes.iterHierarchy(rootObj, order=generic.BREADTH_FIRST)]
+        self.assertEquals(breadthFirst, ["hierarchyA", "hierarchyB", "hierarchyC", "hierarchyD"])
+        joints = [(path.partialPathName(), depth) for path, depth in
+                  nodes.iterHierarchy(rootObj, filterTypes=(om2.MFn.kJoint,), asPath=True, includeDepth=True)]
+        self.assertEquals(joints, [("hierarchyB", 1), ("hierarchyD", 2)])
+        self.assertEquals(len(list(nodes.iterHierarchy(rootObj, depthLimit=1))), 2)
+        # iterChildren prunes the children which don't match the filter
+        self.assertEquals(len(list(nodes.iterChildren(rootObj, True, (om2.MFn.kTransform,)))), 2)
+        self.assertEquals(len(list(nodes.iterChildren(rootObj, False))), 2)
+
+    @mayatestutils.benchmark
+    def test_benchmarkIterHierarchy(self):
+        from zoo.libs.maya.api import scene
+        root = nodes.createDagNode("benchmarkRoot", "transform")
+        mod = om2.MDagModifier()
+        parents = [root]
+        # 100k nodes, 10 children per node
+        for i in range(100000):
+            parents.append(mod.createNode("transform", parents[i // 10]))
+        mod.doIt()
+        recursiveTime = timeit.timeit(lambda: list(nodes.iterChildren(root, True)), number=1)
+        hierarchyTime = timeit.timeit(lambda: list(nodes.iterHierarchy(root)), number=1)
+        iterDagTime = timeit.timeit(lambda: list(scene.iterDag(root)), number=1)
+        mayatestutils.reportBenchmark("100k nodes, iterChildren: {}s, iterHierarchy: {}s, iterDag: {}s", recursiveTime,
+                                      hierarchyTime, iterDagTime)
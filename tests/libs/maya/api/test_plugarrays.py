@@ -0,0 +1,65 @@
+import numpy as np
+from maya import cmds
+
+from tests import mayatestutils
+from zoo.libs.maya.api import attrtypes
+from zoo.libs.maya.api import plugarrays
+from zoo.libs.maya.api import plugs
+
+
+class TestPlugArrays(mayatestutils.BaseMayaTest):
+    application = "maya"
+
+    def setUp(self):
+        self.node = cmds.createNode("transform")
+        cmds.addAttr(self.node, ln="weightMap", dt="doubleArray")
+        cmds.addAttr(self.node, ln="ids", dt="Int32Array")
+        cmds.addAttr(self.node, ln="pointCache", dt="pointArray")
+        cmds.addAttr(self.node, ln="directions", dt="vectorArray")
+        cmds.addAttr(self.node, ln="matrices", dt="matrixArray")
+
+    def _plug(self, name):
+        return plugs.asMPlug(".".join((self.node, name)))
+
+    def test_arrayType(self):
+        self.assertEquals(plugarrays.arrayType(self._plug("weightMap")), attrtypes.kMFnDataDoubleArray)
+        self.assertEquals(plugarrays.arrayType(self._plug("pointCache")), attrtypes.kMFnDataPointArray)
+        self.assertIsNone(plugarrays.arrayType(self._plug("translateX")))
+        self.assertRaises(ValueError, plugarrays.getArray, self._plug("translateX"))
+
+    def test_roundTrip(self):
+        weights = np.linspace(0.0, 1.0, 100)
+        plugarrays.setArray(self._plug("weightMap"), weights)
+        result = plugarrays.getArray(self._plug("weightMap"))
+        self.assertEquals(result.dtype, np.float64)
+        self.assertTrue(np.allclose(result, weights))
+        self.assertEquals(cmds.getAttr(self.node + ".weightMap")[50], weights[50])
+
+        ids = np.arange(10, dtype=np.int32)
+        plugarrays.setArray(self._plug("ids"), ids)
+        self.assertTrue(np.array_equal(plugarrays.getArray(self._plug("ids")), ids))
+
+        points = np.random.rand(20, 3)
+        plugarrays.setArray(self._plug("pointCache"), points)
+        result = plugarrays.getArray(self._plug("pointCache"))
+        self.assertEquals(result.shape, (20, 4))
+        self.assertTrue(np.allclose(result[:, :3], points))
+
+        vectors = np.random.rand(5, 3)
+        plugarrays.setArray(self._plug("directions"), vectors)
+        self.assertTrue(np.allclose(plugarrays.getArray(self._plug("directions")), vectors))
+
+        matrices = np.tile(np.identity(4), (3, 1, 1))
+        matrices[:, 3, :3] = [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0], [7.0, 8.0, 9.0]]
+        plugarrays.setArray(self._plug("matrices"), matrices)
+        result = plugarrays.getArray(self._plug("matrices"))
+        self.assertEquals(result.shape, (3, 4, 4))
+        self.assertTrue(np.allclose(result, matrices))
+
+    def test_setArraysUndo(self):
+        plugarrays.setArray(self._plug("weightMap"), [1.0, 2.0])
+        modifier = plugarrays.setArrays([(self._plug("weightMap"), np.zeros(4)),
+                                         (self._plug("ids"), np.ones(4, dtype=np.int32))])
+        self.assertEquals(len(plugarrays.getArray(self._plug("weightMap"))), 4)
+        modifier.undoIt()
+        self.assertTrue(np.allclose(plugarrays.getArray(self._plug("weightMap")), [1.0, 2.0]))
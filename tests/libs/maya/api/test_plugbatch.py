@@ -0,0 +1,125 @@
+import timeit
+
+from maya import cmds
+from maya.api import OpenMaya as om2
+
+from tests import mayatestutils
+from zoo.libs.maya.api import attrtypes
+from zoo.libs.maya.api import nodes
+from zoo.libs.maya.api import plugbatch
+from zoo.libs.maya.api import plugs
+
+
+class TestPlugBatchRead(mayatestutils.BaseMayaTest):
+    application = "maya"
+
+    def setUp(self):
+        self.nodes = [cmds.createNode("transform") for _ in range(3)]
+        for index, node in enumerate(self.nodes):
+            cmds.setAttr(node + ".translate", index, index * 2, index * 3)
+            cmds.setAttr(node + ".visibility", index % 2 == 0)
+
+    def test_readPlugs(self):
+        plugList = []
+        for node in self.nodes:
+            plugList.append(plugs.asMPlug(node + ".translate"))
+            plugList.append(plugs.asMPlug(node + ".visibility"))
+            plugList.append(plugs.asMPlug(node + ".worldMatrix[0]"))
+        columns = plugbatch.readPlugs(plugList)
+        indices, values = columns[attrtypes.kMFnNumeric3Double]
+        self.assertEquals(list(indices), [0, 3, 6])
+        self.assertEquals([tuple(i) for i in values], [(0.0, 0.0, 0.0), (1.0, 2.0, 3.0), (2.0, 4.0, 6.0)])
+        indices, values = columns[attrtypes.kMFnNumericBoolean]
+        self.assertEquals(list(indices), [1, 4, 7])
+        self.assertEquals([bool(i) for i in values], [True, False, True])
+        indices, values = columns[attrtypes.kMFnDataMatrix]
+        self.assertEquals(len(values), 3)
+        self.assertAlmostEquals(values[1][3][1], 2.0)
+        # one entry per attribute not per plug
+        self.assertTrue(len(plugbatch.readerCache()) >= 3)
+
+    def test_readArrayAndElementPlugs(self):
+        cache = plugbatch.PlugReaderCache()
+        element = plugs.asMPlug(self.nodes[1] + ".worldMatrix[0]")
+        array = plugs.asMPlug(self.nodes[1] + ".worldMatrix")
+        # reading the element first mustn't leave the matrix reader cached for the array plug
+        columns = plugbatch.readPlugs([element, array], cache)
+        self.assertEquals(len(cache), 2)
+        indices, values = columns[attrtypes.kMFnDataMatrix]
+        self.assertEquals(list(indices), [0])
+        self.assertAlmostEquals(values[0][3][1], 2.0)
+        arrayType = plugs.plugType(array)
+        self.assertEquals(list(columns[(arrayType, True)][0]), [1])
+        columns = plugbatch.readPlugs([array, element], plugbatch.PlugReaderCache())
+        self.assertEquals(list(columns[attrtypes.kMFnDataMatrix][0]), [1])
+
+    def test_readAttributes(self):
+        nodeAttributes = [(nodes.asMObject(node), "translateX") for node in self.nodes]
+        nodeAttributes.append((nodes.asMObject(self.nodes[0]), "missingAttribute"))
+        indices, values = plugbatch.readAttributes(nodeAttributes)[attrtypes.kMFnUnitAttributeDistance]
+        self.assertEquals(list(indices), [0, 1, 2])
+        self.assertEquals([float(i) for i in values], [0.0, 1.0, 2.0])
+
+
+class TestPlugBatchWrite(mayatestutils.BaseMayaTest):
+    application = "maya"
+
+    def setUp(self):
+        self.node = cmds.createNode("transform")
+        cmds.addAttr(self.node, ln="label", dt="string")
+        cmds.addAttr(self.node, ln="offset", at="matrix")
+
+    def test_doItUndoIt(self):
+        node = nodes.asMObject(self.node)
+        writer = plugbatch.PlugBatchWriter()
+        writer.addAttribute(node, "translate", (1.0, 2.0, 3.0))
+        writer.addAttribute(node, "visibility", False)
+        writer.addAttribute(node, "rotateOrder", 2)
+        writer.addAttribute(node, "label", "hello")
+        offset = [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 5.0, 6.0, 7.0, 1.0]
+        writer.addAttribute(node, "offset", offset)
+        self.assertEquals(len(writer), 7)
+        # nothing is applied until doIt
+        self.assertEquals(cmds.getAttr(self.node + ".translate")[0], (0.0, 0.0, 0.0))
+        writer.doIt()
+        self.assertEquals(cmds.getAttr(self.node + ".translate")[0], (1.0, 2.0, 3.0))
+        self.assertFalse(cmds.getAttr(self.node + ".visibility"))
+        self.assertEquals(cmds.getAttr(self.node + ".rotateOrder"), 2)
+        self.assertEquals(cmds.getAttr(self.node + ".label"), "hello")
+        self.assertEquals(cmds.getAttr(self.node + ".offset"), offset)
+        writer.undoIt()
+        self.assertEquals(cmds.getAttr(self.node + ".translate")[0], (0.0, 0.0, 0.0))
+        self.assertTrue(cmds.getAttr(self.node + ".visibility"))
+        self.assertEquals(cmds.getAttr(self.node + ".rotateOrder"), 0)
+        writer.redoIt()
+        self.assertEquals(cmds.getAttr(self.node + ".translate")[0], (1.0, 2.0, 3.0))
+
+    def test_lockedPlugs(self):
+        cmds.setAttr(self.node + ".label", "locked", type="string")
+        cmds.setAttr(self.node + ".label", lock=True)
+        writer = plugbatch.PlugBatchWriter()
+        writer.add(plugs.asMPlug(self.node + ".label"), "hello", unlock=True)
+        writer.doIt()
+        self.assertEquals(cmds.getAttr(self.node + ".label"), "hello")
+        self.assertTrue(cmds.getAttr(self.node + ".label", lock=True))
+        writer.undoIt()
+        self.assertEquals(cmds.getAttr(self.node + ".label"), "locked")
+        self.assertTrue(cmds.getAttr(self.node + ".label", lock=True))
+
+    @mayatestutils.benchmark
+    def test_benchmarkPose(self):
+        controls = [nodes.asMObject(cmds.createNode("transform")) for _ in range(2000)]
+        attributes = ("translate", "rotate", "scale")
+        pose = [(om2.MFnDependencyNode(control).findPlug(name, False), (1.0, 2.0, 3.0))
+                for control in controls for name in attributes]
+
+        def batched():
+            writer = plugbatch.PlugBatchWriter()
+            for plug, value in pose:
+                writer.add(plug, value)
+            writer.doIt()
+
+        directTime = timeit.timeit(lambda: [plugs.setPlugValue(plug, value) for plug, value in pose], number=1)
+        batchTime = timeit.timeit(batched, number=1)
+        mayatestutils.reportBenchmark("2000 control pose, setPlugValue: {}s, PlugBatchWriter: {}s", directTime,
+                                      batchTime)
@@ -80,3 +80,21 @@ class TestPlugs(mayatestutils.BaseMayaTest):
             self.assertIsInstance(i, om2.MPlug)
         for i in plugs.iterChildren(worldMatrix):
             self.assertIsInstance(i, om2.MPlug)
+
+    def test_typeCache(self):
+        cache = plugs.typeCache()
+        cache.invalidate()
+        otherNode = cmds.createNode("transform")
+        plugs.getPlugValue(plugs.asMPlug(self.node + ".translateX"))
+        plugs.getPlugValue(plugs.asMPlug(otherNode + ".translateX"))
+        stats = cache.stats()
+        # static attributes are shared between nodes of the same type
+        self.assertEquals(stats["misses"], 1)
+        self.assertEquals(stats["hits"], 1)
+        self.assertEquals(stats["size"], 1)
+        self.assertAlmostEquals(stats["hitRate"], 0.5)
+        plug = plugs.asMPlug(self.node + ".translateX")
+        plugs.setPlugValue(plug, 5.0)
+        self.assertEquals(plugs.getPlugAndType(plug)[1].value, 5.0)
+        cache.invalidate(plug)
+        self.assertEquals(len(cache), 0)
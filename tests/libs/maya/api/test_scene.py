@@ -1,3 +1,6 @@
+import os
+import tempfile
+
 from maya import cmds
 from maya.api import OpenMaya as om2
 
@@ -36,3 +39,52 @@ class TestScene(mayatestutils.BaseMayaTest):
             for n in i:
                 self.assertIsInstance(n, om2.MObject)
 
+    def test_writeSerializedNodes(self):
+        graphNodes = [nodes.asMObject(cmds.createNode("transform", n="streamNode{}".format(i))) for i in range(5)]
+        filePath = os.path.join(tempfile.mkdtemp(), "nodes.jsonl")
+        self.assertEquals(scene.writeSerializedNodes(graphNodes[:3], filePath), 3)
+        # simulate an interrupted write
+        with open(filePath, "a") as f:
+            f.write('{"name": "partial')
+        offset = scene.resumeOffset(filePath)
+        self.assertEquals(offset, 3)
+        self.assertEquals(scene.writeSerializedNodes(graphNodes, filePath, offset=offset), 5)
+        records = list(scene.iterSerializedNodesFromFile(filePath))
+        self.assertEquals([i["name"] for i in records], ["|streamNode{}".format(i) for i in range(5)])
+        self.assertEquals(records[0]["type"], "transform")
+        self.assertEquals(len(list(scene.iterSerializedNodesFromFile(filePath, offset=4))), 1)
+        self.assertIn("|streamNode0", scene.serializeNodes(graphNodes))
+
+    def test_graphDeserializer(self):
+        root = cmds.createNode("transform", n="graphRoot")
+        middle = cmds.createNode("transform", n="graphMiddle", parent=root)
+        leaf = cmds.createNode("transform", n="graphLeaf", parent=middle)
+        cmds.setAttr(leaf + ".translate", 1.0, 2.0, 3.0)
+        cmds.connectAttr(root + ".translateX", leaf + ".rotateX")
+        data = scene.serializeNodes([nodes.asMObject(i) for i in (leaf, middle, root)])
+        cmds.delete(root)
+        deserializer = scene.GraphDeserializer(data)
+        # children come first in the data so the sort has to move the parents up
+        order = deserializer.sortedNames()
+        self.assertTrue(order.index("|graphRoot") < order.index("|graphRoot|graphMiddle") <
+                        order.index("|graphRoot|graphMiddle|graphLeaf"))
+        createdNodes = deserializer.process({})
+        self.assertEquals(len(createdNodes), 3)
+        self.assertTrue(cmds.objExists("|graphRoot|graphMiddle|graphLeaf"))
+        self.assertEquals(cmds.getAttr("|graphRoot|graphMiddle|graphLeaf.translate")[0], (1.0, 2.0, 3.0))
+        self.assertEquals(cmds.listConnections("|graphRoot|graphMiddle|graphLeaf.rotateX", plugs=True),
+                          ["graphRoot.translateX"])
+        self.assertEquals(set(deserializer.timings), {"sort", "create", "attributes", "connections"})
+
+    def test_graphDeserializerInvalidValue(self):
+        node = cmds.createNode("transform", n="invalidValueNode")
+        cmds.setAttr(node + ".translate", 1.0, 2.0, 3.0)
+        cmds.setAttr(node + ".visibility", False)
+        data = scene.serializeNodes([nodes.asMObject(node)])
+        cmds.delete(node)
+        visibility = [i for i in data["|invalidValueNode"]["attributes"] if i["name"] == "visibility"]
+        self.assertEquals(len(visibility), 1)
+        visibility[0]["value"] = "notABool"
+        # one bad value mustn't stop the rest of the values from being set
+        scene.GraphDeserializer(data).process({})
+        self.assertEquals(cmds.getAttr("|invalidValueNode.translate")[0], (1.0, 2.0, 3.0))
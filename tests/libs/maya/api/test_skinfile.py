@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+import timeit
+
+import numpy as np
+from maya import cmds
+from maya.api import OpenMaya as om2
+
+from tests import mayatestutils
+from zoo.libs.maya.api import deformers
+from zoo.libs.maya.api import nodes
+from zoo.libs.maya.api import skinfile
+from zoo.libs.utils import filesystem
+
+
+class TestSkinFile(mayatestutils.BaseMayaTest):
+    application = "maya"
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.filePath = os.path.join(self.tempDir, "weights.zskin")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def _buildSkins(self, count, subdivisions=4, jointCount=3):
+        cmds.select(clear=True)
+        joints = [cmds.joint(p=(i, 0, 0)) for i in range(jointCount)]
+        shapes = []
+        for i in range(count):
+            mesh = cmds.polyPlane(sx=subdivisions, sy=subdivisions, ch=False, n="skinMesh{}".format(i))[0]
+            cmds.skinCluster(joints, mesh, toSelectedBones=True, maximumInfluences=4)
+            shapes.append(nodes.asMObject(cmds.listRelatives(mesh, shapes=True, fullPath=True)[0]))
+        return shapes
+
+    def test_encodeRoundTrip(self):
+        weights = np.random.rand(50, 6)
+        weights[weights < 0.5] = 0.0
+        points = np.random.rand(50, 3)
+        for dtype, compression, tolerance in (("float32", None, 1e-6), ("float16", "zlib", 1e-3)):
+            with skinfile.SkinWeightWriter(self.filePath, dtype=dtype, compression=compression) as writer:
+                writer.addShape("|shapeA", points, weights, ["a", "b", "c", "d", "e", "f"], {"name": "skinA"})
+                writer.addShape("|shapeB", points * 2.0, weights * 0.5, ["a", "b", "c", "d", "e", "f"],
+                                {"name": "skinB"}, blendWeights=np.ones(50))
+            self.assertTrue(skinfile.isSkinFile(self.filePath))
+            with skinfile.SkinWeightReader(self.filePath) as reader:
+                self.assertEquals(reader.shapeNames(), ["|shapeA", "|shapeB"])
+                readPoints = reader.points("|shapeB")
+                self.assertTrue(np.allclose(readPoints, points * 2.0))
+                self.assertTrue(np.allclose(reader.weights("|shapeA"), weights, atol=tolerance))
+                data = reader.shapeData("|shapeB")
+                self.assertEquals(data["skinData"][0]["name"], "skinB")
+                self.assertTrue(np.allclose(data["skinData"][0]["weights"]["c"], weights[:, 2] * 0.5,
+                                            atol=tolerance))
+                self.assertTrue(np.allclose(data["skinData"][0]["blendWeights"], 1.0))
+            # the arrays have to stay valid once the reader is closed
+            self.assertTrue(np.allclose(readPoints, points * 2.0))
+
+    def test_exportImport(self):
+        shapes = self._buildSkins(2)
+        skins = [deformers.SkinCluster(deformers.clusterUpstreamFromNode(shape)[0]) for shape in shapes]
+        original = [skin.weightsArray() for skin in skins]
+        blendWeights = np.linspace(0.0, 1.0, len(original[1]))
+        skins[1].mfn.setBlendWeights(skins[1].shapeNode, skins[1].component, om2.MDoubleArray(blendWeights.tolist()))
+        written = skinfile.exportSkinWeights(shapes, self.filePath)
+        self.assertEquals(len(written), 2)
+        cmds.delete(cmds.ls(type="skinCluster"))
+        deformers.createAndImportWeightsFromShapes(self.filePath, shapes[1:])
+        self.assertFalse(deformers.clusterUpstreamFromNode(shapes[0]))
+        skin = deformers.SkinCluster(deformers.clusterUpstreamFromNode(shapes[1])[0])
+        self.assertTrue(np.allclose(skin.weightsArray(), original[1], atol=1e-6))
+        self.assertTrue(np.allclose(skin.blendWeights(), blendWeights, atol=1e-6))
+
+    def test_pipelinedExport(self):
+        shapes = self._buildSkins(3)
+        serialPath = os.path.join(self.tempDir, "serial.zskin")
+        progress = []
+        written = skinfile.exportSkinWeightsPipelined(shapes, self.filePath, compression="zlib", workers=2,
+                                                      progressCallback=lambda *args: progress.append(args))
+        self.assertEquals(written, skinfile.exportSkinWeights(shapes, serialPath, compression="zlib"))
+        self.assertEquals([p[0] for p in progress], [1, 2, 3])
+        with open(self.filePath, "rb") as pipelined, open(serialPath, "rb") as serial:
+            self.assertEquals(pipelined.read(), serial.read())
+
+    @mayatestutils.benchmark
+    def test_benchmarkPipelinedExport(self):
+        # a 40 mesh character
+        shapes = self._buildSkins(40, subdivisions=70, jointCount=80)
+        for compression in (None, "zlib"):
+            serial = timeit.timeit(lambda: skinfile.exportSkinWeights(shapes, self.filePath,
+                                                                      compression=compression), number=1)
+            pipelined = timeit.timeit(lambda: skinfile.exportSkinWeightsPipelined(shapes, self.filePath,
+                                                                                  compression=compression),
+                                      number=1)
+            mayatestutils.reportBenchmark("40 meshes, compression: {}, exportSkinWeights: {}s, "
+                                          "exportSkinWeightsPipelined: {}s", compression, serial, pipelined)
+
+    @mayatestutils.benchmark
+    def test_benchmarkFormats(self):
+        shapes = self._buildSkins(10, subdivisions=100, jointCount=50)
+        jsonPath = os.path.join(self.tempDir, "weights.json")
+        jsonWrite = timeit.timeit(lambda: filesystem.saveJson(deformers.serializeSkinWeightsFromShapes(shapes),
+                                                              jsonPath), number=1)
+        jsonRead = timeit.timeit(lambda: filesystem.loadJson(jsonPath), number=1)
+        results = ["json write: {}s, read: {}s, {}MB".format(jsonWrite, jsonRead,
+                                                             os.path.getsize(jsonPath) / 1024.0 / 1024.0)]
+        for dtype, compression in (("float32", None), ("float16", None), ("float16", "zlib")):
+            write = timeit.timeit(lambda: skinfile.exportSkinWeights(shapes, self.filePath, dtype=dtype,
+                                                                     compression=compression), number=1)
+
+            def readOne():
+                with skinfile.SkinWeightReader(self.filePath) as reader:
+                    reader.shapeData(reader.shapeNames()[-1])
+
+            read = timeit.timeit(readOne, number=1)
+            results.append("{} {} write: {}s, read one shape: {}s, {}MB".format(
+                dtype, compression, write, read, os.path.getsize(self.filePath) / 1024.0 / 1024.0))
+        mayatestutils.reportBenchmark("{}", "\n".join(results))
@@ -0,0 +1,56 @@
+from maya import cmds
+
+from tests import mayatestutils
+from zoo.libs.maya.api import nodes
+from zoo.libs.maya.api import snapshot
+
+
+class TestSnapshot(mayatestutils.BaseMayaTest):
+    application = "maya"
+
+    def setUp(self):
+        self.root = cmds.createNode("transform", n="snapshotRoot")
+        self.a = cmds.createNode("transform", n="snapshotA", parent=self.root)
+        self.b = cmds.createNode("transform", n="snapshotB", parent=self.root)
+        self.rootObj = nodes.asMObject(self.root)
+
+    def test_unchanged(self):
+        before = snapshot.snapshotHierarchy([self.rootObj])
+        self.assertEquals(len(before), 3)
+        after = snapshot.snapshotHierarchy([self.rootObj])
+        self.assertTrue(snapshot.diffSnapshots(before, after).isEmpty())
+
+    def test_diff(self):
+        before = snapshot.snapshotHierarchy([self.rootObj])
+        uuidA = snapshot.nodeUuid(nodes.asMObject(self.a))
+        uuidB = snapshot.nodeUuid(nodes.asMObject(self.b))
+        uuidRoot = snapshot.nodeUuid(self.rootObj)
+        cmds.setAttr(self.a + ".translateX", 5.0)
+        cmds.connectAttr(self.root + ".translateY", self.a + ".translateY")
+        cmds.parent(self.b, self.a)
+        cmds.rename(self.root, "snapshotRenamed")
+        added = cmds.createNode("transform", n="snapshotC", parent="snapshotRenamed")
+        uuidC = snapshot.nodeUuid(nodes.asMObject(added))
+        diff = snapshot.diffSnapshots(before, snapshot.snapshotHierarchy([self.rootObj]))
+        self.assertEquals(diff.added, {uuidC})
+        self.assertEquals(diff.reparented, {uuidB: (uuidRoot, uuidA)})
+        self.assertEquals(list(diff.renamed), [uuidRoot])
+        self.assertIn("translate", diff.changed[uuidA])
+        self.assertEquals(diff.connectionsChanged, {uuidA})
+        self.assertEquals(diff.touched(), {uuidA, uuidB, uuidC, uuidRoot})
+
+        before = snapshot.snapshotHierarchy([self.rootObj])
+        cmds.delete(added)
+        diff = snapshot.diffSnapshots(before, snapshot.snapshotHierarchy([self.rootObj]))
+        self.assertEquals(diff.removed, {uuidC})
+
+    def test_renamedSource(self):
+        cmds.connectAttr(self.b + ".translateX", self.a + ".translateX")
+        before = snapshot.snapshotHierarchy([self.rootObj])
+        uuidB = snapshot.nodeUuid(nodes.asMObject(self.b))
+        # renaming or reparenting the source isn't a change to the downstream node's connections
+        cmds.rename(self.b, "snapshotSource")
+        cmds.parent("|snapshotRoot|snapshotSource", "|snapshotRoot|snapshotA")
+        diff = snapshot.diffSnapshots(before, snapshot.snapshotHierarchy([self.rootObj]))
+        self.assertFalse(diff.connectionsChanged)
+        self.assertEquals(set(diff.reparented), {uuidB})
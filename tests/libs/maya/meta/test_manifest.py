@@ -0,0 +1,123 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from tests import mayatestutils
+from zoo.libs.maya.meta import base
+from zoo.libs.maya.meta import manifest
+
+_MODULE = """
+from zoo.libs.maya.meta import base
+
+
+class MetaTestRig(base.MetaBase):
+    pass
+
+
+class MetaTestSubRig(MetaTestRig):
+    pass
+"""
+
+# an unrelated class with the same name as one in _MODULE
+_OTHER_MODULE = """
+class MetaTestRig(object):
+    pass
+
+
+class MetaTestOtherRig(MetaTestRig):
+    pass
+"""
+
+
+class TestMetaManifest(mayatestutils.BaseMayaTest):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.modulePath = os.path.join(self.directory, "testmetarig.py")
+        with open(self.modulePath, "w") as f:
+            f.write(_MODULE)
+        self.cachePath = os.path.join(self.directory, "cache", "manifest.json")
+
+    def tearDown(self):
+        super(TestMetaManifest, self).tearDown()
+        shutil.rmtree(self.directory)
+
+    def test_update(self):
+        metaManifest = manifest.MetaManifest(self.cachePath)
+        self.assertTrue(metaManifest.update([self.directory]))
+        self.assertEquals(metaManifest.filePath("MetaTestRig"), self.modulePath)
+        self.assertEquals(metaManifest.subclassNames(["MetaBase"]), {"MetaTestRig", "MetaTestSubRig"})
+        self.assertEquals(metaManifest.subclassNames(["MetaTestRig"]), {"MetaTestSubRig"})
+        self.assertTrue(os.path.exists(self.cachePath))
+        # a fresh manifest should load from the cache without changes
+        cached = manifest.MetaManifest(self.cachePath)
+        self.assertFalse(cached.update([self.directory]))
+        self.assertEquals(cached.filePath("MetaTestSubRig"), self.modulePath)
+
+    def test_invalidatedByMTime(self):
+        metaManifest = manifest.MetaManifest(self.cachePath)
+        metaManifest.update([self.directory])
+        with open(self.modulePath, "a") as f:
+            f.write("\n\nclass MetaTestNewRig(MetaTestRig):\n    pass\n")
+        mtime = time.time() + 10
+        os.utime(self.modulePath, (mtime, mtime))
+        self.assertTrue(metaManifest.update([self.directory]))
+        self.assertEquals(metaManifest.filePath("MetaTestNewRig"), self.modulePath)
+        os.remove(self.modulePath)
+        self.assertTrue(metaManifest.update([self.directory]))
+        self.assertIsNone(metaManifest.filePath("MetaTestRig"))
+
+    def test_sameNamedBases(self):
+        with open(os.path.join(self.directory, "testotherrig.py"), "w") as f:
+            f.write(_OTHER_MODULE)
+        metaManifest = manifest.MetaManifest(self.cachePath)
+        metaManifest.update([self.directory])
+        self.assertEquals(metaManifest.subclassNames(["testmetarig.MetaTestRig"]), {"MetaTestSubRig"})
+        self.assertEquals(metaManifest.subclassNames(["testotherrig.MetaTestRig"]), {"MetaTestOtherRig"})
+        self.assertEquals(metaManifest.subclassNames(["zoo.libs.maya.meta.base.MetaBase"]),
+                          {"MetaTestRig", "MetaTestSubRig"})
+
+
+class TestMetaRegistryManifest(mayatestutils.BaseMayaTest):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        with open(os.path.join(self.directory, "testlazymetarig.py"), "w") as f:
+            f.write(_MODULE.replace("MetaTest", "MetaTestLazy"))
+            f.write("\n\nclass MetaTestLazyHelper(object):\n    pass\n")
+        self._environ = dict((name, os.environ.get(name)) for name in (base.MetaRegistry.metaEnv,
+                                                                       manifest.MANIFEST_ENV))
+        os.environ[base.MetaRegistry.metaEnv] = self.directory
+        os.environ[manifest.MANIFEST_ENV] = os.path.join(self.directory, "manifest.json")
+        sys.path.append(self.directory)
+        base.MetaRegistry().reload()
+
+    def tearDown(self):
+        super(TestMetaRegistryManifest, self).tearDown()
+        for name, value in self._environ.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        sys.path.remove(self.directory)
+        sys.modules.pop("testlazymetarig", None)
+        for name in ("MetaTestLazyRig", "MetaTestLazySubRig"):
+            base.MetaRegistry.types.pop(name, None)
+        base.MetaRegistry().reload()
+        shutil.rmtree(self.directory)
+
+    def test_getType(self):
+        self.assertNotIn("testlazymetarig", sys.modules)
+        self.assertTrue(base.MetaRegistry.isInRegistry("MetaTestLazySubRig"))
+        self.assertEquals(base.MetaRegistry.subclassNames(["MetaTestLazyRig"]), {"MetaTestLazySubRig"})
+        # classes which don't inherit from MetaBase aren't meta types
+        self.assertFalse(base.MetaRegistry.isInRegistry("MetaTestLazyHelper"))
+        self.assertIsNone(base.MetaRegistry.getType("MetaTestLazyHelper"))
+        # nothing is imported until the class is requested
+        self.assertNotIn("testlazymetarig", sys.modules)
+        classObj = base.MetaRegistry.getType("MetaTestLazySubRig")
+        self.assertIsNotNone(classObj)
+        self.assertEquals(classObj.__name__, "MetaTestLazySubRig")
+        self.assertTrue(issubclass(classObj, base.MetaBase))
+        self.assertIn("MetaTestLazyRig", base.MetaRegistry.types)
+        self.assertIsNone(base.MetaRegistry.getType("MetaTestLazyMissing"))
@@ -3,9 +3,14 @@ from tests import mayatestutils
 from zoo.libs.maya.meta import base
 from zoo.libs.maya.api import nodes
 from zoo.libs.maya.api import attrtypes
+from zoo.libs.maya.api import generic
 from maya.api import OpenMaya as om2
 
 
+class MetaSubClassTest(base.MetaBase):
+    pass
+
+
 class TestMetaData(mayatestutils.BaseMayaTest):
     def setUp(self):
         self.meta = base.MetaBase(name="testNode", lock=True)
@@ -133,6 +138,103 @@ class TestMetaData(mayatestutils.BaseMayaTest):
         self.assertEquals(len(list(parentMeta.iterMetaChildren(depthLimit=len(children) + 1))),
                           len(children))
 
+    def test_sceneIndex(self):
+        index = base.MetaSceneIndex()
+        self.assertTrue(self.meta.mobject() in index)
+        self.assertEquals([i.object() for i in index.iterHandles(("MetaBase",))], [self.meta.mobject()])
+        newMeta = base.MetaBase(nodes.createDGNode("indexMeta", "network"))
+        self.assertTrue(newMeta.mobject() in index)
+        self.assertEquals(len(base.findMetaNodesByClassType("MetaBase")), 2)
+        newMeta.delete()
+        self.assertEquals(len(base.findMetaNodesByClassType("MetaBase")), 1)
+        self.assertEquals(len(list(index.iterHandles(("missingClass",)))), 0)
+
+    def test_iterMetaNodesByClassType(self):
+        subMeta = MetaSubClassTest()
+        dagMeta = base.MetaBase(nodes.createDagNode("dagMeta", "transform"))
+        self.assertEquals(len(list(base.iterMetaNodesByClassType("MetaBase"))), 2)
+        self.assertEquals(len(list(base.iterMetaNodesByClassType("MetaBase", includeSubclasses=True))), 3)
+        self.assertEquals(len(list(base.iterMetaNodesByClassType(("MetaBase", "MetaSubClassTest")))), 3)
+        subclassOnly = list(base.iterMetaNodesByClassType("MetaSubClassTest"))
+        self.assertEquals(len(subclassOnly), 1)
+        self.assertIsInstance(subclassOnly[0], MetaSubClassTest)
+        dagNodes = list(base.iterMetaNodesByClassType("MetaBase", nodeTypes=(om2.MFn.kDagNode,), asMeta=False))
+        self.assertEquals(dagNodes, [dagMeta.mobject()])
+        self.assertEquals(subMeta.mClassType(), "MetaSubClassTest")
+
+    def test_metaCacheScope(self):
+        node = self.meta.mobject()
+        self.assertIsNot(base.MetaBase(node), base.MetaBase(node))
+        with base.metaCacheScope() as cache:
+            first = base.MetaBase(node)
+            self.assertIs(base.MetaBase(node), first)
+            child = base.MetaBase()
+            child.addParent(first)
+            self.assertIs(list(first.iterMetaChildren())[0], list(first.iterMetaChildren())[0])
+            childObj = child.mobject()
+            child.delete()
+            self.assertIsNone(cache.get(childObj))
+        self.assertFalse(cache.isEnabled())
+        self.assertEquals(len(cache), 0)
+
+    def test_iterMetaChildrenDiamond(self):
+        # two parents sharing the same child shouldn't return the child twice
+        left = base.MetaBase()
+        right = base.MetaBase()
+        shared = base.MetaBase()
+        self.meta.addChild(left)
+        self.meta.addChild(right)
+        shared.addParent(left)
+        shared.addParent(right)
+        children = list(self.meta.iterMetaChildren())
+        self.assertEquals(len(children), 3)
+        breadthFirst = list(self.meta.iterMetaChildren(order=generic.BREADTH_FIRST, includeDepth=True))
+        self.assertEquals([i[1] for i in breadthFirst], [1, 1, 2])
+        self.assertEquals(breadthFirst[-1][0], shared)
+        pruned = list(self.meta.iterMetaChildren(prune=lambda meta, depth: depth == 1))
+        self.assertEquals(len(pruned), 2)
+
+    def test_batch(self):
+        controls = [nodes.createDagNode("ctrl{}".format(i), "transform") for i in range(10)]
+        with base.MetaBase.batch() as batch:
+            child = base.MetaBase(lock=True)
+            child.addParent(self.meta)
+            for i, ctrl in enumerate(controls):
+                self.meta.connectTo("control_{}".format(i), ctrl)
+            # nothing should be applied until the batch exits
+            self.assertFalse(self.meta.hasAttribute("control_0"))
+            self.assertFalse(self.meta.mfn().isLocked)
+        self.assertTrue(self.meta.mfn().isLocked)
+        self.assertTrue(child.mfn().isLocked)
+        self.assertEquals(len(list(self.meta.iterMetaChildren())), 1)
+        for i, ctrl in enumerate(controls):
+            plug = self.meta.attribute("control_{}".format(i))
+            self.assertIsNotNone(plug)
+            self.assertEquals(plug.destinations()[0].node(), ctrl)
+        batch.undoIt()
+        self.assertFalse(self.meta.hasAttribute("control_0"))
+        self.assertEquals(len(list(self.meta.iterMetaChildren())), 0)
+        batch.redoIt()
+        self.assertTrue(self.meta.hasAttribute("control_0"))
+        self.assertEquals(self.meta.attribute("control_0").destinations()[0].node(), controls[0])
+        # the attributes recreated by the redo need their values and locks back
+        childNode = child.mobject()
+        self.assertTrue(base.isMetaNode(childNode))
+        self.assertEquals(om2.MFnDependencyNode(childNode).findPlug(base.MCLASS_ATTR_NAME, False).asString(),
+                          "MetaBase")
+        self.assertTrue(om2.MFnDependencyNode(childNode).findPlug(base.MCLASS_ATTR_NAME, False).isLocked)
+        self.assertEquals(len(list(self.meta.iterMetaChildren())), 1)
+        self.assertTrue(child.mfn().isLocked)
+
+    def test_batchCancel(self):
+        metaCount = len(list(base.iterSceneMetaNodes()))
+        with self.assertRaises(ValueError):
+            with base.MetaBase.batch():
+                base.MetaBase(name="cancelled").addParent(self.meta)
+                raise ValueError("cancel")
+        self.assertEquals(len(list(base.iterSceneMetaNodes())), metaCount)
+        self.assertTrue(self.meta.mfn().isLocked)
+
     # def test_findPlugsByFilteredName(self):
     #     pass
     #
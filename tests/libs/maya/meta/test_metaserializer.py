@@ -0,0 +1,97 @@
+import os
+import tempfile
+import timeit
+
+from maya import cmds
+from maya.api import OpenMaya as om2
+from tests import mayatestutils
+from zoo.libs.maya.meta import base
+from zoo.libs.maya.meta import metaserializer
+from zoo.libs.maya.api import attrtypes
+from zoo.libs.maya.api import nodes
+
+
+class TestMetaSerializer(mayatestutils.BaseMayaTest):
+    def setUp(self):
+        self.filePath = os.path.join(tempfile.gettempdir(), "testMetaNetwork.zmeta")
+
+    def tearDown(self):
+        super(TestMetaSerializer, self).tearDown()
+        if os.path.exists(self.filePath):
+            os.remove(self.filePath)
+
+    def _buildNetwork(self, count):
+        root = base.MetaBase(name="root")
+        root.addAttribute("rigName", "testRig", attrtypes.kMFnDataString)
+        root.addAttribute("scale", 2.5, attrtypes.kMFnNumericDouble)
+        children = []
+        for i in range(count):
+            child = base.MetaBase(name="child{}".format(i))
+            child.addAttribute("index", i, attrtypes.kMFnNumericInt)
+            child.addParent(root)
+            children.append(child)
+        return root, children
+
+    def test_roundTrip(self):
+        root, children = self._buildNetwork(10)
+        ctrl = nodes.createDagNode("ctrl", "transform")
+        root.connectTo("control_main", ctrl)
+        metaserializer.saveNetwork(self.filePath)
+        cmds.file(f=True, new=True)
+        # the control isn't part of the network so it needs to exist before loading
+        ctrl = nodes.createDagNode("ctrl", "transform")
+        created = metaserializer.loadNetwork(self.filePath)
+        self.assertEquals(len(created), 11)
+        roots = [i for i in map(base.MetaBase, created) if i.hasAttribute("rigName")]
+        self.assertEquals(len(roots), 1)
+        newRoot = roots[0]
+        self.assertEquals(newRoot.rigName.asString(), "testRig")
+        self.assertAlmostEquals(newRoot.scale.asDouble(), 2.5)
+        children = list(newRoot.iterMetaChildren(depthLimit=1))
+        self.assertEquals(len(children), 10)
+        self.assertEquals(sorted(i.index.asInt() for i in children), list(range(10)))
+        self.assertEquals(newRoot.attribute("control_main").destinations()[0].node(), ctrl)
+
+    def test_largeIntValues(self):
+        data = metaserializer.MetaNetworkData()
+        nodeId = data.addNode("|node", "MetaBase", "network")
+        for value in (2 ** 31, -2 ** 31 - 1, 2 ** 40):
+            data.addAttribute(nodeId, "value", attrtypes.kMFnNumericInt, value=value)
+        with open(self.filePath, "wb") as f:
+            data.write(f)
+        with open(self.filePath, "rb") as f:
+            data = metaserializer.MetaNetworkData.read(f)
+        self.assertEquals([data.attribute(i)[3] for i in range(3)], [2 ** 31, -2 ** 31 - 1, 2 ** 40])
+
+    def test_deserializeShapesAndConnected(self):
+        source = cmds.createNode("transform", n="networkSource")
+        target = cmds.createNode("transform", n="networkTarget")
+        cmds.connectAttr(source + ".translateX", target + ".translateY")
+        data = metaserializer.MetaNetworkData()
+        shapeId = data.addNode("|shapeParent|metaShape", "MetaBase", "locator", isDag=True)
+        data.addAttribute(shapeId, "label", attrtypes.kMFnDataString, value="shape")
+        sourceId = data.addNode("|networkSource", None, "transform", isDag=True)
+        targetId = data.addNode("|networkTarget", None, "transform", isDag=True)
+        # translateY is already connected which mustn't stop the translateZ connection
+        data.addEdge(sourceId, "translateX", targetId, "translateY")
+        data.addEdge(sourceId, "translateX", targetId, "translateZ")
+        created = metaserializer.deserializeNetwork(data)
+        self.assertEquals(len(created), 1)
+        self.assertTrue(created[0].hasFn(om2.MFn.kLocator))
+        self.assertEquals(nodes.nameFromMObject(created[0]), "|shapeParent|metaShape")
+        self.assertEquals(cmds.getAttr("|shapeParent|metaShape.label"), "shape")
+        self.assertEquals(cmds.listConnections(target + ".translateZ", plugs=True), ["networkSource.translateX"])
+
+    def test_serializeDict(self):
+        root, _ = self._buildNetwork(1)
+        data = root.serialize()
+        self.assertIn("rigName", data)
+        self.assertIn(base.MCLASS_ATTR_NAME, data)
+
+    @mayatestutils.benchmark
+    def test_benchmarkLargeNetwork(self):
+        self._buildNetwork(10000)
+        metaNodes = list(base.iterSceneMetaNodes())
+        dictTime = timeit.timeit(lambda: [i.serialize() for i in metaNodes], number=1)
+        binaryTime = timeit.timeit(lambda: metaserializer.saveNetwork(self.filePath), number=1)
+        mayatestutils.reportBenchmark("per node dict: {}s, binary network: {}s", dictTime, binaryTime)
@@ -1,9 +1,28 @@
 import logging
+import os
+import unittest
 
 from zoo.libs.utils import unittestBase
 from maya import cmds
 logger = logging.getLogger(__name__)
 
+BENCHMARK_ENV = "ZOO_RUN_BENCHMARKS"
+
+
+def benchmark(func):
+    """Decorator which skips the test unless the ZOO_RUN_BENCHMARKS environment variable is set.
+    """
+    return unittest.skipUnless(os.environ.get(BENCHMARK_ENV), "Set {} to run benchmarks".format(BENCHMARK_ENV))(func)
+
+
+def reportBenchmark(message, *args):
+    """Logs the timings of a benchmark.
+
+    :param message: The timings to report, formatted with args
+    :type message: str
+    """
+    logger.info(message.format(*args))
+
 
 class BaseMayaTest(unittestBase.BaseUnitest):
     """Base class for all maya based unitests, provides helper methods for loading and loading plugins
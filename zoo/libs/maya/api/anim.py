@@ -4,6 +4,11 @@ from maya.api import OpenMayaAnim as om2Anim
 from maya.api import OpenMaya as om2
 from zoo.libs.utils import general
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 FRAME_TO_UNIT = {25: om2.MTime.k25FPS,
                  30: om2.MTime.k30FPS,
                  48: om2.MTime.k48FPS,
@@ -187,9 +192,262 @@ def iterFrameRangeDGContext(start, end):
     :return: Returns a generator function with each element being a MDGContext with the current frame applied
     :rtype: Generator(om2.MDGContext)
     """
-    currentTime = om2Anim.MAnimControl.currentTime()
-    perFrame = om2.MTime(start, currentTime.unit)
-    for frame in range(start, end + 1):
-        context = om2.MDGContext(perFrame)
+    for _, context in iterFrameContexts(range(start, end + 1)):
         yield context
-        perFrame += 1
+
+
+def frameRange(start, end, step=1.0, subframes=0):
+    """Returns the frames between start and end inclusive.
+
+    :param start: The start frame
+    :type start: float
+    :param end: The end frame
+    :type end: float
+    :param step: The distance between whole samples
+    :type step: float
+    :param subframes: The number of extra evenly spaced samples between each step
+    :type subframes: int
+    :rtype: list(float)
+    """
+    increment = float(step) / (subframes + 1)
+    count = int(round((end - start) / increment, 6)) + 1
+    return [start + i * increment for i in xrange(count)]
+
+
+def iterFrameContexts(frames, unit=None):
+    """Generator which yields a MDGContext for each frame without changing the current time.
+
+    :param frames: The frames to yield a context for
+    :type frames: iterable(float)
+    :param unit: The time unit of the frames, defaults to the current ui unit
+    :type unit: int or None
+    :rtype: Generator(tuple(float, om2.MDGContext))
+    """
+    unit = unit if unit is not None else om2.MTime.uiUnit()
+    for frame in frames:
+        yield frame, om2.MDGContext(om2.MTime(frame, unit))
+
+
+def _readMatrix(plug, *context):
+    return om2.MFnMatrixData(plug.asMObject(*context)).matrix()
+
+
+def _readTime(plug, *context):
+    return plug.asMTime(*context).value
+
+
+def _sampleChannels(plug):
+    """Returns (plug, reader, width) for each channel of the plug, compounds are expanded to their children.
+    """
+    obj = plug.attribute()
+    if obj.hasFn(om2.MFn.kMatrixAttribute) or (obj.hasFn(om2.MFn.kTypedAttribute) and
+                                               om2.MFnTypedAttribute(obj).attrType() == om2.MFnData.kMatrix):
+        return [(plug, _readMatrix, 16)]
+    elif plug.isCompound:
+        channels = []
+        for i in xrange(plug.numChildren()):
+            channels.extend(_sampleChannels(plug.child(i)))
+        return channels
+    elif obj.hasFn(om2.MFn.kUnitAttribute) and om2.MFnUnitAttribute(obj).unitType() == om2.MFnUnitAttribute.kTime:
+        return [(plug, _readTime, 1)]
+    elif obj.hasFn(om2.MFn.kNumericAttribute) or obj.hasFn(om2.MFn.kUnitAttribute) or \
+            obj.hasFn(om2.MFn.kEnumAttribute):
+        # asDouble returns internal units, cm and radians
+        return [(plug, om2.MPlug.asDouble, 1)]
+    raise ValueError("Plug can't be sampled: {}".format(plug.name()))
+
+
+def channelNames(plugList):
+    """Returns the name of each column returned by :func:`samplePlugs`, matrix plugs get 16 columns named
+    plug[0] to plug[15].
+
+    :type plugList: seq(om2.MPlug)
+    :rtype: list(str)
+    """
+    names = []
+    for plug in plugList:
+        for channel, _, width in _sampleChannels(plug):
+            if width == 1:
+                names.append(channel.name())
+            else:
+                names.extend("{}[{}]".format(channel.name(), i) for i in xrange(width))
+    return names
+
+
+def samplePlugs(plugList, frames, unit=None):
+    """Evaluates the plugs at each frame through a MDGContext, the current time isn't changed.
+
+    Compound plugs eg. translate are expanded to their children and matrix plugs to 16 values, see
+    :func:`channelNames` for the column names. Distances and angles are returned in internal units, cm and
+    radians. On maya versions which support MDGContext.makeCurrent the context is made current for each frame
+    instead of being passed to every read.
+
+    :param plugList: The plugs to sample
+    :type plugList: seq(om2.MPlug)
+    :param frames: The frames to sample, see :func:`frameRange`
+    :type frames: seq(float)
+    :param unit: The time unit of the frames, defaults to the current ui unit
+    :type unit: int or None
+    :return: A (frames, channels) float64 array or a list of rows if numpy isn't available
+    :rtype: np.ndarray or list(list(float))
+    :raises: ValueError if a plug isn't a numeric, unit, enum or matrix plug
+    """
+    channels = []
+    for plug in plugList:
+        channels.extend(_sampleChannels(plug))
+    makeCurrent = hasattr(om2.MDGContext, "makeCurrent")
+    rows = []
+    for _, context in iterFrameContexts(frames, unit):
+        row = []
+        if makeCurrent:
+            previous = context.makeCurrent()
+            args = ()
+        else:
+            args = (context,)
+        try:
+            for plug, reader, width in channels:
+                if width == 1:
+                    row.append(reader(plug, *args))
+                else:
+                    row.extend(reader(plug, *args))
+        finally:
+            if makeCurrent:
+                previous.makeCurrent()
+        rows.append(row)
+    if np is None:
+        return rows
+    return np.array(rows, dtype=np.float64).reshape(len(rows), -1)
+
+
+def sampleAttributes(nodeAttributes, frames, unit=None):
+    """Same as :func:`samplePlugs` but takes node and attribute name pairs.
+
+    :param nodeAttributes: A sequence of (node, attributeName) pairs
+    :type nodeAttributes: seq(tuple(om2.MObject, str))
+    :param frames: The frames to sample
+    :type frames: seq(float)
+    :param unit: The time unit of the frames, defaults to the current ui unit
+    :type unit: int or None
+    :rtype: np.ndarray or list(list(float))
+    """
+    dep = om2.MFnDependencyNode()
+    plugList = []
+    for node, attributeName in nodeAttributes:
+        dep.setObject(node)
+        plugList.append(dep.findPlug(attributeName, False))
+    return samplePlugs(plugList, frames, unit)
+
+
+def reduceKeys(frames, values, tolerance):
+    """Returns the indices of the samples to key so that linear interpolation between the kept keys stays within the
+    tolerance of every sample, the first and last samples are always kept. Requires numpy.
+
+    :param frames: The sample frames
+    :type frames: seq(float)
+    :param values: The sample values
+    :type values: seq(float)
+    :param tolerance: The max difference between a dropped sample and the interpolated curve
+    :type tolerance: float
+    :rtype: np.ndarray
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    count = len(values)
+    if count <= 2:
+        return np.arange(count)
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    segments = [(0, count - 1)]
+    while segments:
+        first, last = segments.pop()
+        if last - first < 2:
+            continue
+        weights = (frames[first + 1:last] - frames[first]) / (frames[last] - frames[first])
+        errors = np.abs(values[first + 1:last] - (values[first] + weights * (values[last] - values[first])))
+        index = int(np.argmax(errors))
+        if errors[index] > tolerance:
+            split = first + 1 + index
+            keep[split] = True
+            segments.append((first, split))
+            segments.append((split, last))
+    return np.flatnonzero(keep)
+
+
+def bakeSamples(plugList, frames, samples, unit=None, skipStatic=True, staticTolerance=1e-6, tolerance=0.0,
+                tangentType=om2Anim.MFnAnimCurve.kTangentLinear, modifier=None, change=None):
+    """Keys already sampled values onto the plugs, each plug gets all its keys in a single MFnAnimCurve.addKeys
+    call. Plugs which already have an anim curve input have their keys replaced. Requires numpy.
+
+    :param plugList: The scalar plugs to key, one per sample column
+    :type plugList: seq(om2.MPlug)
+    :param frames: The sample frames
+    :type frames: seq(float)
+    :param samples: (frames, plugs) values in internal units, see :func:`samplePlugs`
+    :type samples: np.ndarray
+    :param unit: The time unit of the frames, defaults to the current ui unit
+    :type unit: int or None
+    :param skipStatic: If True channels which don't change are set instead of keyed
+    :type skipStatic: bool
+    :param staticTolerance: The max range of values for a channel to be considered static
+    :type staticTolerance: float
+    :param tolerance: If above zero the keys are reduced with :func:`reduceKeys`
+    :type tolerance: float
+    :param tangentType: The in and out tangent type of the keys, linear keeps reduced keys within the tolerance
+    :type tangentType: int
+    :param modifier: Records the created anim curves and static values so they can be undone
+    :type modifier: om2.MDGModifier or None
+    :param change: Records the key changes on existing anim curves so they can be undone
+    :type change: om2Anim.MAnimCurveChange or None
+    :return: The anim curve of each plug or None for the static plugs which were set
+    :rtype: list(om2.MObject or None)
+    """
+    unit = unit if unit is not None else om2.MTime.uiUnit()
+    frames = np.asarray(frames, dtype=np.float64)
+    samples = np.asarray(samples, dtype=np.float64).reshape(len(frames), -1)
+    if samples.shape[1] != len(plugList):
+        raise ValueError("Expected {} sample columns, got {}".format(len(plugList), samples.shape[1]))
+    mod = modifier or om2.MDGModifier()
+    curves = []
+    for plug, values in zip(plugList, samples.T):
+        source = plug.source() if plug.isDestination else None
+        hasCurve = source is not None and source.node().hasFn(om2.MFn.kAnimCurve)
+        static = skipStatic and values.max() - values.min() <= staticTolerance
+        if static and not hasCurve:
+            mod.newPlugValueDouble(plug, float(values[0]))
+            curves.append(None)
+            continue
+        if static:
+            indices = np.array([0])
+        elif tolerance > 0.0:
+            indices = reduceKeys(frames, values, tolerance)
+        else:
+            indices = np.arange(len(frames))
+        curveFn = om2Anim.MFnAnimCurve()
+        if hasCurve:
+            curveFn.setObject(source.node())
+        else:
+            curveFn.create(plug, om2Anim.MFnAnimCurve.kAnimCurveUnknown, mod)
+        times = om2.MTimeArray([om2.MTime(frame, unit) for frame in frames[indices].tolist()])
+        curveFn.addKeys(times, values[indices].tolist(), tangentType, tangentType, False, change)
+        curves.append(curveFn.object())
+    mod.doIt()
+    return curves
+
+
+def bakePlugs(plugPairs, frames, unit=None, skipStatic=True, staticTolerance=1e-6, tolerance=0.0,
+              tangentType=om2Anim.MFnAnimCurve.kTangentLinear, modifier=None, change=None):
+    """Samples every source plug in a single context evaluated pass with :func:`samplePlugs` then keys the values
+    onto the destination plugs with :func:`bakeSamples`, the current time isn't changed.
+
+    :param plugPairs: (sourcePlug, destinationPlug) pairs, both must be scalar plugs. The source and destination
+    can be the same plug to bake a plug in place
+    :type plugPairs: seq(tuple(om2.MPlug, om2.MPlug))
+    :param frames: The frames to bake, see :func:`frameRange`
+    :type frames: seq(float)
+    :return: The anim curve of each destination or None for the static plugs which were set
+    :rtype: list(om2.MObject or None)
+    """
+    sources = [source for source, _ in plugPairs]
+    samples = samplePlugs(sources, frames, unit)
+    return bakeSamples([destination for _, destination in plugPairs], frames, samples, unit, skipStatic,
+                       staticTolerance, tolerance, tangentType, modifier, change)
@@ -1,16 +1,41 @@
 """deformers.py
 This modules handles maya native deformer queries including serializing weights etc.
 """
+import collections
+
+from maya import cmds
 from maya.api import OpenMaya as om2
 from maya.api import OpenMayaAnim as om2Anim
 
 from zoo.libs.maya.api import scene
 from zoo.libs.maya.api import generic
 from zoo.libs.maya.api import nodes
+from zoo.libs.maya.utils import mayamath
 from zoo.libs.utils import filesystem, zlogging
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 logger = zlogging.getLogger(__name__)
 
+# compressed sparse row view of a (vertexCount, influenceCount) weight matrix, the influences for vertex i are
+# indices[indptr[i]:indptr[i + 1]] with their weights in values[indptr[i]:indptr[i + 1]]
+SparseWeights = collections.namedtuple("SparseWeights", ["indptr", "indices", "values", "shape"])
+
+
+def sparseToDense(sparse):
+    """Converts a :class:`SparseWeights` back to a dense (vertexCount, influenceCount) array.
+
+    :type sparse: :class:`SparseWeights`
+    :rtype: np.ndarray
+    """
+    dense = np.zeros(sparse.shape, dtype=sparse.values.dtype)
+    rows = np.repeat(np.arange(sparse.shape[0]), np.diff(sparse.indptr))
+    dense[rows, sparse.indices] = sparse.values
+    return dense
+
 
 class SkinCluster(object):
     """Thin wrapper class around getting and setting skin weights
@@ -37,12 +62,22 @@ class SkinCluster(object):
             return fn.findPlug(item, False)
         return super(SkinCluster, self).__getattribute__(item)
 
+    def influenceNames(self):
+        """Returns the influence names without namespaces in the same order as the weight array columns.
+
+        :rtype: list(str)
+        """
+        return [generic.stripNamespaceFromName(i.fullPathName()) for i in self.mfn.influenceObjects()]
+
     def influenceWeights(self):
         """Returns the influence objects data as a dict
 
         :return:
         :rtype: dict
         """
+        if np is not None:
+            weights = self.weightsArray()
+            return dict((name, weights[:, i].tolist()) for i, name in enumerate(self.influenceNames()))
         influences = self.mfn.influenceObjects()
         influenceCount = len(influences)
         weights = self.mfn.getWeights(self.shapeNode, self.component, om2.MIntArray(xrange(influenceCount)))
@@ -53,6 +88,81 @@ class SkinCluster(object):
             influenceData[partialName] = [weights[g * influenceCount + i] for g in xrange(componentsPerInfluence)]
         return influenceData
 
+    def weightsArray(self):
+        """Returns all the weights as a (vertexCount, influenceCount) float64 array, the columns are in the
+        same order as :meth:`influenceNames`. Requires numpy.
+
+        :rtype: np.ndarray
+        """
+        influenceCount = len(self.mfn.influenceObjects())
+        weights = self.mfn.getWeights(self.shapeNode, self.component, om2.MIntArray(xrange(influenceCount)))
+        return np.fromiter(weights, dtype=np.float64, count=len(weights)).reshape(-1, influenceCount)
+
+    def sparseWeights(self, threshold=0.0):
+        """Returns the weights as a compressed sparse row view which only keeps the weights above the threshold.
+        Requires numpy.
+
+        :param threshold: Weights less than or equal to this value are dropped
+        :type threshold: float
+        :rtype: :class:`SparseWeights`
+        """
+        return denseToSparse(self.weightsArray(), threshold)
+
+    def setWeightsArray(self, weights, normalize=False, returnOldWeights=False):
+        """Writes the weights for every vertex and influence in one MFnSkinCluster.setWeights call. Requires numpy.
+
+        :param weights: A (vertexCount, influenceCount) array or a :class:`SparseWeights`, the columns must be in \
+        the same order as :meth:`influenceNames`
+        :type weights: np.ndarray or :class:`SparseWeights`
+        :param normalize: If True maya normalizes the weights
+        :type normalize: bool
+        :param returnOldWeights: If True the previous weights are returned as a (vertexCount, influenceCount) array
+        :type returnOldWeights: bool
+        :rtype: np.ndarray or None
+        """
+        if isinstance(weights, SparseWeights):
+            weights = sparseToDense(weights)
+        weights = np.ascontiguousarray(weights, dtype=np.float64)
+        influenceCount = len(self.mfn.influenceObjects())
+        if weights.ndim != 2 or weights.shape[1] != influenceCount:
+            raise ValueError("Expected weights with {} influence columns, got shape {}".format(influenceCount,
+                                                                                               weights.shape))
+        result = self.mfn.setWeights(self.shapeNode, self.component, om2.MIntArray(xrange(influenceCount)),
+                                     om2.MDoubleArray(weights.ravel().tolist()), normalize, returnOldWeights)
+        if returnOldWeights and result is not None:
+            return np.fromiter(result, dtype=np.float64, count=len(result)).reshape(-1, influenceCount)
+
+    def lockedInfluences(self):
+        """Returns a bool per influence, True when the influence has lockInfluenceWeights enabled.
+
+        :rtype: np.ndarray
+        """
+        locked = []
+        for path in self.mfn.influenceObjects():
+            fn = om2.MFnDependencyNode(path.node())
+            locked.append(fn.hasAttribute("lockInfluenceWeights") and
+                          fn.findPlug("lockInfluenceWeights", False).asBool())
+        return np.array(locked, dtype=bool)
+
+    def processWeights(self, pruneThreshold=None, maxInfluences=None, normalize=True, respectLocked=True):
+        """Prunes, limits and normalizes the weights, see :func:`processWeights`, then writes the result back with
+        a single setWeights call. Requires numpy.
+
+        :param pruneThreshold: Weights below this value are set to zero, None skips pruning
+        :type pruneThreshold: float or None
+        :param maxInfluences: The max non zero influences per vertex, None skips the limit
+        :type maxInfluences: int or None
+        :param normalize: If True the weights of each vertex are normalized
+        :type normalize: bool
+        :param respectLocked: If True influences with lockInfluenceWeights enabled keep their weights
+        :type respectLocked: bool
+        :return: The previous weights so the change can be reverted with :meth:`setWeightsArray`
+        :rtype: np.ndarray
+        """
+        locked = self.lockedInfluences() if respectLocked else None
+        weights = processWeights(self.weightsArray(), pruneThreshold, maxInfluences, normalize, locked)
+        return self.setWeightsArray(weights, returnOldWeights=True)
+
     def blendWeights(self):
         """Returns the blend weights of the cluster as a tuple
         :return:
@@ -60,19 +170,156 @@ class SkinCluster(object):
         """
         return tuple(self.mfn.getBlendWeights(self.shapeNode, self.component))
 
-    def serialize(self):
+    def serialize(self, includeWeights=True):
         """ Serializes the skin cluster a dict
 
+        :param includeWeights: If False the per vertex weights and blendWeights are left out
+        :type includeWeights: bool
         :return:
         :rtype: dict
         """
-        return {"name": self.mfn.name(),
-                "weights": self.influenceWeights(),
-                "blendWeights": self.blendWeights(),
+        data = {"name": self.mfn.name(),
                 "normalized": self.normalizeWeights.asBool(),
                 "skinningMethod": self.skinningMethod.asInt(),
                 "maxInfluence": self.maxInfluences.asInt(),
                 "maintainMaxInfluences": self.maintainMaxInfluences.asBool()}
+        if includeWeights:
+            data["weights"] = self.influenceWeights()
+            data["blendWeights"] = self.blendWeights()
+        return data
+
+
+def denseToSparse(weights, threshold=0.0):
+    """Converts a dense (vertexCount, influenceCount) weight array to a :class:`SparseWeights`.
+
+    :type weights: np.ndarray
+    :param threshold: Weights less than or equal to this value are dropped
+    :type threshold: float
+    :rtype: :class:`SparseWeights`
+    """
+    weights = np.asarray(weights)
+    mask = weights > threshold
+    rows, columns = np.nonzero(mask)
+    indptr = np.zeros(weights.shape[0] + 1, dtype=np.int64)
+    np.cumsum(np.count_nonzero(mask, axis=1), out=indptr[1:])
+    return SparseWeights(indptr, columns.astype(np.int32), weights[rows, columns], weights.shape)
+
+
+def _lockedColumns(locked, influenceCount):
+    mask = np.zeros(influenceCount, dtype=bool)
+    if locked is not None:
+        mask[np.asarray(locked)] = True
+    return mask
+
+
+def _keepRemainder(weights, keep, lockedColumns):
+    """Marks the largest unlocked weight of each vertex in keep when none of its unlocked weights are kept while
+    the locked weights sum to less than one, otherwise the vertex could never be normalized.
+
+    :rtype: np.ndarray
+    """
+    unlocked = np.where(lockedColumns, 0.0, weights)
+    starved = ((unlocked > 0.0).any(axis=1) & ~(keep & (unlocked > 0.0)).any(axis=1) &
+               (np.where(lockedColumns, weights, 0.0).sum(axis=1) < 1.0))
+    if starved.any():
+        keep[np.flatnonzero(starved), np.argmax(unlocked[starved], axis=1)] = True
+    return keep
+
+
+def pruneWeights(weights, threshold, locked=None):
+    """Returns a copy of the weights with every unlocked weight below the threshold set to zero. The largest
+    unlocked weight of a vertex is kept when every other one is pruned and the locked weights sum to less than one.
+
+    :param weights: (vertexCount, influenceCount) weights
+    :type weights: np.ndarray
+    :type threshold: float
+    :param locked: The locked influence columns as indices or a bool mask
+    :type locked: np.ndarray or seq(int) or None
+    :rtype: np.ndarray
+    """
+    weights = np.array(weights, dtype=np.float64)
+    lockedColumns = _lockedColumns(locked, weights.shape[1])
+    prune = weights < threshold
+    prune[:, lockedColumns] = False
+    weights[~_keepRemainder(weights, ~prune, lockedColumns)] = 0.0
+    return weights
+
+
+def limitInfluences(weights, maxInfluences, locked=None):
+    """Returns a copy of the weights which keeps the largest maxInfluences weights of each vertex and sets the rest
+    to zero. Non zero locked weights are always kept and count towards the limit, if they fill it while summing to
+    less than one the largest unlocked weight is kept too so the vertex can still be normalized.
+
+    :param weights: (vertexCount, influenceCount) weights
+    :type weights: np.ndarray
+    :type maxInfluences: int
+    :param locked: The locked influence columns as indices or a bool mask
+    :type locked: np.ndarray or seq(int) or None
+    :rtype: np.ndarray
+    """
+    weights = np.array(weights, dtype=np.float64)
+    # only the vertices over the limit need sorting
+    rows = np.flatnonzero(np.count_nonzero(weights, axis=1) > maxInfluences)
+    if not len(rows):
+        return weights
+    subset = weights[rows]
+    lockedColumns = _lockedColumns(locked, weights.shape[1])
+    lockedWeights = (subset > 0.0) & lockedColumns
+    keep = lockedWeights.copy()
+    if maxInfluences > 0:
+        priority = np.where(lockedWeights, np.inf, subset)
+        largest = np.argpartition(-priority, maxInfluences - 1, axis=1)[:, :maxInfluences]
+        keep[np.arange(len(rows))[:, np.newaxis], largest] = True
+    subset[~_keepRemainder(subset, keep, lockedColumns)] = 0.0
+    weights[rows] = subset
+    return weights
+
+
+def normalizeWeights(weights, locked=None):
+    """Returns a copy of the weights where the unlocked weights of each vertex are scaled so the vertex sums to one.
+    Vertices without unlocked weights are left as they are.
+
+    :param weights: (vertexCount, influenceCount) weights
+    :type weights: np.ndarray
+    :param locked: The locked influence columns as indices or a bool mask
+    :type locked: np.ndarray or seq(int) or None
+    :rtype: np.ndarray
+    """
+    weights = np.array(weights, dtype=np.float64)
+    lockedColumns = np.flatnonzero(_lockedColumns(locked, weights.shape[1]))
+    lockedWeights = weights[:, lockedColumns]
+    lockedTotals = lockedWeights.sum(axis=1)
+    unlockedTotals = weights.sum(axis=1) - lockedTotals
+    scale = np.ones(len(weights))
+    np.divide(np.clip(1.0 - lockedTotals, 0.0, None), unlockedTotals, out=scale, where=unlockedTotals > 0.0)
+    weights *= scale[:, np.newaxis]
+    weights[:, lockedColumns] = lockedWeights
+    return weights
+
+
+def processWeights(weights, pruneThreshold=None, maxInfluences=None, normalize=True, locked=None):
+    """Runs the weight cleanup on the whole weight matrix, pruning first then the influence limit and finally the
+    normalization. Locked influences keep their weights throughout.
+
+    :param weights: (vertexCount, influenceCount) weights
+    :type weights: np.ndarray
+    :param pruneThreshold: Weights below this value are set to zero, None skips pruning
+    :type pruneThreshold: float or None
+    :param maxInfluences: The max non zero influences per vertex, None skips the limit
+    :type maxInfluences: int or None
+    :param normalize: If True the weights of each vertex are normalized
+    :type normalize: bool
+    :param locked: The locked influence columns as indices or a bool mask
+    :type locked: np.ndarray or seq(int) or None
+    :rtype: np.ndarray
+    """
+    if pruneThreshold is not None:
+        weights = pruneWeights(weights, pruneThreshold, locked)
+    if maxInfluences is not None:
+        weights = limitInfluences(weights, maxInfluences, locked)
+    if normalize:
+        weights = normalizeWeights(weights, locked)
+    return weights
 
 
 def geometryComponentsFromSet(mobjectSet):
@@ -158,8 +405,91 @@ def serializeSkinWeightsFromShapes(shapes):
     return data
 
 
-def applyWeightsFromData(data, shape):
-    pass
+def _resolveInfluence(name):
+    """Finds the scene node for a serialized influence name, first by full path then by short name in any
+    namespace.
+
+    :rtype: str or None
+    """
+    if cmds.objExists(name):
+        return cmds.ls(name, long=True)[0]
+    shortName = name.split("|")[-1]
+    matches = cmds.ls(shortName, "*:" + shortName, long=True) or []
+    if len(matches) > 1:
+        logger.warning("Multiple nodes match influence: {}, using: {}".format(name, matches[0]))
+    return matches[0] if matches else None
+
+
+def applyWeightsFromData(data, shape, tolerance=1e-4):
+    """Applies serialized skin weights onto the shape, matching vertices by position so the shape doesn't need the
+    same topology as the serialized one.
+
+    If the vertex count matches and every point is within the tolerance the weights are applied by index, otherwise
+    each vertex takes the weights of the closest serialized point, see :func:`mayamath.closestPointIndices`.
+    Influences are remapped by name, missing influences are skipped and the remaining weights renormalized. If the
+    shape doesn't have a skinCluster one is created. All weights are written with a single setWeights call and the
+    dual quaternion blend weights, when serialized, with a single setBlendWeights call. Requires numpy.
+
+    :param data: The shape data in the format of :func:`serializeSkinWeightsFromShapes`
+    :type data: dict
+    :param shape: The mesh shape to apply the weights to
+    :type shape: om2.MDagPath or om2.MObject
+    :param tolerance: The max distance between points for the weights to be applied by vertex index
+    :type tolerance: float
+    :return: The skinCluster wrapper or None if none of the influences exist
+    :rtype: :class:`SkinCluster` or None
+    """
+    path = shape if isinstance(shape, om2.MDagPath) else om2.MDagPath.getAPathTo(shape)
+    skinData = data["skinData"][0]
+    if len(data["skinData"]) > 1:
+        logger.warning("Only the first skinCluster is applied to: {}".format(path.fullPathName()))
+
+    influenceNames = sorted(skinData["weights"])
+    resolved = [_resolveInfluence(name) for name in influenceNames]
+    for name, sceneName in zip(influenceNames, resolved):
+        if sceneName is None:
+            logger.warning("Skipping influence: {} since it doesn't exist".format(name))
+    validColumns = [i for i, sceneName in enumerate(resolved) if sceneName is not None]
+    if not validColumns:
+        logger.error("None of the influences exist for: {}".format(path.fullPathName()))
+        return None
+    resolved = [resolved[i] for i in validColumns]
+    sourceWeights = np.array([skinData["weights"][influenceNames[i]] for i in validColumns], dtype=np.float64).T
+
+    sourcePoints = np.asarray(data["points"], dtype=np.float64)[:, :3]
+    targetPoints = np.array(om2.MFnMesh(path).getPoints(om2.MSpace.kWorld), dtype=np.float64)[:, :3]
+    if len(sourcePoints) == len(targetPoints) and np.allclose(sourcePoints, targetPoints, rtol=0.0, atol=tolerance):
+        vertexMapping = np.arange(len(targetPoints))
+    else:
+        vertexMapping = mayamath.closestPointIndices(sourcePoints, targetPoints)[0]
+
+    clusters = clusterUpstreamFromNode(path.node())
+    if clusters:
+        skin = SkinCluster(clusters[0])
+        existing = set(i.fullPathName() for i in skin.mfn.influenceObjects())
+        missing = [name for name in resolved if name not in existing]
+        if missing:
+            cmds.skinCluster(nodes.nameFromMObject(skin.cluster), edit=True, addInfluence=missing, weight=0.0)
+    else:
+        clusterName = cmds.skinCluster(resolved, path.fullPathName(), toSelectedBones=True,
+                                       maximumInfluences=skinData.get("maxInfluence", 5),
+                                       obeyMaxInfluences=skinData.get("maintainMaxInfluences", False),
+                                       skinMethod=skinData.get("skinningMethod", 0),
+                                       name=generic.stripNamespaceFromName(skinData["name"]).split("|")[-1])[0]
+        skin = SkinCluster(nodes.asMObject(clusterName))
+
+    columns = dict((i.fullPathName(), index) for index, i in enumerate(skin.mfn.influenceObjects()))
+    weights = np.zeros((len(targetPoints), len(columns)), dtype=np.float64)
+    weights[:, [columns[name] for name in resolved]] = sourceWeights[vertexMapping]
+    if len(validColumns) != len(influenceNames):
+        totals = weights.sum(axis=1, keepdims=True)
+        np.divide(weights, totals, out=weights, where=totals > 0.0)
+    skin.setWeightsArray(weights)
+    blendWeights = skinData.get("blendWeights")
+    if blendWeights is not None and len(blendWeights) == len(sourcePoints):
+        blendWeights = np.asarray(blendWeights, dtype=np.float64)[vertexMapping]
+        skin.mfn.setBlendWeights(skin.shapeNode, skin.component, om2.MDoubleArray(blendWeights.tolist()))
+    return skin
 
 
 def createAndImportWeightsFromShapes(filePath, shapes):
@@ -169,11 +499,16 @@ def createAndImportWeightsFromShapes(filePath, shapes):
     Otherwise a skin cluster will be created.
 
     :param filePath: The json file to load, must be in the same format as the return data of :func:`serialzieSkinWeightsFromShapes`
+    or a binary file written by :func:`skinfile.exportSkinWeights`
     :type filePath: str
     :param shapes: list of om2.MObjects representing the geometry shape nodes to load the data onto
     :type shapes: [type]
     """
 
+    from zoo.libs.maya.api import skinfile
+    if skinfile.isSkinFile(filePath):
+        skinfile.importSkinWeights(filePath, shapes)
+        return
     # read in the json
     skinInfo = filesystem.loadJson(filePath)
     if not skinInfo:
@@ -187,6 +522,6 @@ def createAndImportWeightsFromShapes(filePath, shapes):
         name = generic.stripNamespaceFromName(path.fullPathName())
         mappedInfo = skinInfo.get(name)
         if mappedInfo is None:
-            print "Skipping: {} since it doesn't exist"
+            logger.warning("Skipping: {} since it doesn't exist in the skin file".format(name))
             continue
         applyWeightsFromData(mappedInfo, path)
@@ -1,4 +1,10 @@
+from collections import deque
+
 from maya.api import OpenMaya as om2
+from zoo.libs.maya.api import namecache
+
+DEPTH_FIRST = 0
+BREADTH_FIRST = 1
 
 
 class MObjectHandleWrap(om2.MObjectHandle):
@@ -57,8 +63,83 @@ def compareMObjects(a, b):
     return a == b
 
 
+def mObjectHashKey(mObj):
+    """Returns the hashCode of the MObject, used as the visited key in :func:`iterGraph`
+
+    :type mObj: om2.MObject
+    :rtype: int
+    """
+    return om2.MObjectHandle(mObj).hashCode()
+
+
+def iterGraph(roots, childrenFunc, keyFunc=mObjectHashKey, depthLimit=256, order=DEPTH_FIRST, prune=None,
+              includeDepth=False):
+    """Generic iterative graph traversal which uses an explicit stack/queue instead of recursion so large graphs
+    don't hit python's recursion limit. Each item is visited once based on keyFunc so diamond shaped or cyclic
+    graphs won't return the same item twice. The roots themselves are not yielded.
+
+    .. code-block:: python
+
+        def children(node):
+            return [dest.node() for source, dest in nodes.iterConnections(node, True, False)]
+
+        for node, depth in iterGraph([root], children, order=BREADTH_FIRST, includeDepth=True):
+            print(node, depth)
+
+    :param roots: The items to start the traversal from
+    :type roots: seq
+    :param childrenFunc: function which takes an item and returns an iterable of its children.
+    :type childrenFunc: callable
+    :param keyFunc: function which returns a hashable key for the item, defaults to the MObjectHandle hashCode.
+    :type keyFunc: callable
+    :param depthLimit: The max depth to traverse, the direct children of the roots are depth 1.
+    :type depthLimit: int
+    :param order: Either DEPTH_FIRST or BREADTH_FIRST
+    :type order: int
+    :param prune: function which takes the item and depth, if it returns True the item is still yielded but its \
+    children won't be visited.
+    :type prune: callable or None
+    :param includeDepth: If True a tuple of (item, depth) is yielded instead of the item.
+    :type includeDepth: bool
+    :rtype: Generator
+    """
+    roots = list(roots)
+    depthFirst = order == DEPTH_FIRST
+    visited = set()
+    pending = deque()
+
+    def expand(item, depth):
+        if depth >= depthLimit:
+            return
+        children = [(child, depth + 1) for child in childrenFunc(item)]
+        if depthFirst:
+            # reversed so the first child is popped first
+            children.reverse()
+        pending.extend(children)
+
+    for root in roots:
+        visited.add(keyFunc(root))
+    for root in (reversed(roots) if depthFirst else roots):
+        expand(root, 0)
+
+    pop = pending.pop if depthFirst else pending.popleft
+    while pending:
+        item, depth = pop()
+        key = keyFunc(item)
+        if key in visited:
+            continue
+        visited.add(key)
+        yield (item, depth) if includeDepth else item
+        if prune is not None and prune(item, depth):
+            continue
+        expand(item, depth)
+
+
 def asMObject(name):
     if isinstance(name, basestring):
+        cache = namecache.NameCache()
+        if cache.isEnabled() and "." not in name:
+            return cache.asMObject(name)
         sel = om2.MSelectionList()
         sel.add(name)
         if "." in name:
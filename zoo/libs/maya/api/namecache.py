@@ -0,0 +1,253 @@
+"""Optional cache for resolving node names to MObjects and MObjects back to names.
+
+While enabled, :func:`nodes.asMObject`, :func:`generic.asMObject`, :func:`plugs.asMPlug` and
+:func:`nodes.nameFromMObject` resolve through the cache instead of creating a new MSelectionList for every call.
+Entries are dropped by name changed, parent changed and node removed messages. Both maps are bounded and evict the
+least recently used entry first.
+
+.. code-block:: python
+
+    with namecache.nameCacheScope():
+        for name in controlNames:
+            nodes.asMObject(name)
+        objects = namecache.NameCache().resolveNames(controlNames)
+
+"""
+import contextlib
+from collections import OrderedDict
+
+from maya.api import OpenMaya as om2
+from zoo.libs.utils import classtypes
+
+DEFAULT_MAX_SIZE = 10000
+
+
+def _selectionObject(sel, index):
+    try:
+        return sel.getDagPath(index).node()
+    except TypeError:
+        return sel.getDependNode(index)
+
+
+def _fullName(mobject):
+    if mobject.hasFn(om2.MFn.kDagNode):
+        return om2.MFnDagNode(mobject).fullPathName()
+    return om2.MFnDependencyNode(mobject).name()
+
+
+def _isUniqueName(name, mobject):
+    """Full dag paths and dg names always identify a single node, any other dag name only does while it's the
+    node's shortest unique path. A second node with the same short name makes it ambiguous.
+    """
+    if name.startswith("|") or not mobject.hasFn(om2.MFn.kDagNode):
+        return True
+    return om2.MFnDagNode(mobject).partialPathName() == name
+
+
+def resolveNames(names):
+    """Resolves a list of node names with a single MSelectionList, names which don't exist resolve to None.
+
+    :param names: The node names to resolve
+    :type names: seq(str)
+    :rtype: list(om2.MObject or None)
+    """
+    sel = om2.MSelectionList()
+    indices = []
+    for name in names:
+        count = sel.length()
+        try:
+            sel.add(name)
+        except RuntimeError:
+            indices.append(None)
+            continue
+        if sel.length() == count + 1:
+            indices.append(count)
+            continue
+        # the selection list merges duplicates so find the existing entry instead
+        single = om2.MSelectionList()
+        single.add(name)
+        indices.append(_selectionObject(single, 0))
+    return [_selectionObject(sel, i) if isinstance(i, int) else i for i in indices]
+
+
+class NameCache(object):
+    """Singleton which caches name -> om2.MObjectHandle and om2.MObjectHandle hashCode -> full name.
+
+    Renaming, reparenting or deleting a node drops its entries. Cached full paths of its descendants become stale
+    when a dag node that has children is renamed or reparented, so every dag path entry is dropped in that case.
+    A dag name which isn't a full path is checked on every hit against the node's shortest unique path, so it stops
+    resolving once another node with the same short name exists, same as MSelectionList.
+    The cache is disabled by default, enable it with :meth:`setEnabled` or :func:`nameCacheScope`.
+    """
+    __metaclass__ = classtypes.Singleton
+
+    def __init__(self):
+        self.maxSize = DEFAULT_MAX_SIZE
+        # {name: om2.MObjectHandle}
+        self._objects = OrderedDict()
+        # {hashCode: set(name)} reverse lookup of _objects used for invalidation
+        self._objectNames = {}
+        # {hashCode: (om2.MObjectHandle, fullName)}
+        self._names = OrderedDict()
+        self._enabled = False
+        self._scopeDepth = 0
+        self._callbackIds = []
+
+    def isEnabled(self):
+        return self._enabled or self._scopeDepth > 0
+
+    def setEnabled(self, state):
+        """Globally enables or disables the cache, disabling clears it unless a scope is active.
+
+        :type state: bool
+        """
+        self._enabled = state
+        self._refreshState()
+
+    def pushScope(self):
+        self._scopeDepth += 1
+        self._refreshState()
+
+    def popScope(self):
+        self._scopeDepth = max(self._scopeDepth - 1, 0)
+        self._refreshState()
+
+    def clear(self):
+        self._objects.clear()
+        self._objectNames = {}
+        self._names.clear()
+
+    def __len__(self):
+        return len(self._objects)
+
+    def _store(self, name, mobject):
+        if not _isUniqueName(name, mobject):
+            return None
+        handle = om2.MObjectHandle(mobject)
+        self._objects[name] = handle
+        self._objectNames.setdefault(handle.hashCode(), set()).add(name)
+        if len(self._objects) > self.maxSize:
+            oldName, oldHandle = self._objects.popitem(last=False)
+            self._objectNames.get(oldHandle.hashCode(), set()).discard(oldName)
+        return handle
+
+    def _lookup(self, name):
+        handle = self._objects.pop(name, None)
+        if handle is None:
+            return None
+        elif not handle.isValid() or not _isUniqueName(name, handle.object()):
+            self._objectNames.get(handle.hashCode(), set()).discard(name)
+            return None
+        # reinsert to mark as most recently used
+        self._objects[name] = handle
+        return handle.object()
+
+    def asMObject(self, name):
+        """Returns the MObject for the node name.
+
+        :type name: str
+        :rtype: om2.MObject
+        :raises: RuntimeError if the node doesn't exist, same as MSelectionList.add
+        """
+        mobject = self._lookup(name)
+        if mobject is not None:
+            return mobject
+        sel = om2.MSelectionList()
+        sel.add(name)
+        mobject = _selectionObject(sel, 0)
+        self._store(name, mobject)
+        return mobject
+
+    def resolveNames(self, names):
+        """Bulk version of :meth:`asMObject`, cache misses are resolved with a single MSelectionList and names
+        which don't exist resolve to None.
+
+        :type names: seq(str)
+        :rtype: list(om2.MObject or None)
+        """
+        results = [self._lookup(name) for name in names]
+        missing = [i for i, mobject in enumerate(results) if mobject is None]
+        if not missing:
+            return results
+        for i, mobject in zip(missing, resolveNames([names[i] for i in missing])):
+            if mobject is not None:
+                self._store(names[i], mobject)
+            results[i] = mobject
+        return results
+
+    def fullName(self, mobject):
+        """Returns the full path name for dag nodes or the name for dg nodes.
+
+        :type mobject: om2.MObject
+        :rtype: str
+        """
+        handle = om2.MObjectHandle(mobject)
+        key = handle.hashCode()
+        entry = self._names.pop(key, None)
+        if entry is not None and entry[0].isValid() and entry[0].object() == mobject:
+            self._names[key] = entry
+            return entry[1]
+        name = _fullName(mobject)
+        self._names[key] = (handle, name)
+        if len(self._names) > self.maxSize:
+            self._names.popitem(last=False)
+        return name
+
+    def invalidate(self, mobject):
+        """Removes the node from the cache.
+
+        :type mobject: om2.MObject
+        """
+        key = om2.MObjectHandle(mobject).hashCode()
+        self._names.pop(key, None)
+        for name in self._objectNames.pop(key, ()):
+            self._objects.pop(name, None)
+        if mobject.hasFn(om2.MFn.kDagNode) and om2.MFnDagNode(mobject).childCount():
+            self._clearDagPaths()
+
+    def _clearDagPaths(self):
+        for name in [name for name in self._objects if "|" in name]:
+            handle = self._objects.pop(name)
+            self._objectNames.get(handle.hashCode(), set()).discard(name)
+        for key in [key for key, (_, name) in self._names.items() if "|" in name]:
+            del self._names[key]
+
+    def _refreshState(self):
+        if self.isEnabled():
+            if not self._callbackIds:
+                self._callbackIds = [
+                    om2.MNodeMessage.addNameChangedCallback(om2.MObject.kNullObj, self._onNameChanged),
+                    om2.MDagMessage.addParentRemovedCallback(self._onParentChanged),
+                    om2.MDGMessage.addNodeRemovedCallback(self._onNodeRemoved, "dependNode"),
+                    om2.MSceneMessage.addCallback(om2.MSceneMessage.kBeforeNew, self._onSceneCleared),
+                    om2.MSceneMessage.addCallback(om2.MSceneMessage.kBeforeOpen, self._onSceneCleared)
+                ]
+            return
+        if self._callbackIds:
+            om2.MMessage.removeCallbacks(self._callbackIds)
+        self._callbackIds = []
+        self.clear()
+
+    def _onNameChanged(self, node, previousName, clientData):
+        self.invalidate(node)
+
+    def _onParentChanged(self, child, parent, clientData):
+        self.invalidate(child.node())
+
+    def _onNodeRemoved(self, node, clientData):
+        self.invalidate(node)
+
+    def _onSceneCleared(self, clientData):
+        self.clear()
+
+
+@contextlib.contextmanager
+def nameCacheScope():
+    """Context manager which enables the :class:`NameCache` for the duration of the scope.
+    """
+    cache = NameCache()
+    cache.pushScope()
+    try:
+        yield cache
+    finally:
+        cache.popScope()
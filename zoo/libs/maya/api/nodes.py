@@ -1,12 +1,18 @@
 import contextlib
+import itertools
 import logging
 from maya.api import OpenMaya as om2
 from maya import cmds
-from zoo.libs.maya.api import plugs, generic
+from zoo.libs.maya.api import plugs, generic, namecache, plugbatch
 from zoo.libs.maya.api import attrtypes
 from zoo.libs.maya.utils import mayamath
 from zoo.libs.utils import zoomath
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 logger = logging.getLogger(__name__)
 
 MIRROR_BEHAVIOUR = 0
@@ -22,6 +28,10 @@ def asMObject(name):
     :rtype: MObject
 
     """
+    if isinstance(name, basestring):
+        cache = namecache.NameCache()
+        if cache.isEnabled():
+            return cache.asMObject(name)
     sel = om2.MSelectionList()
     sel.add(name)
     try:
@@ -30,6 +40,20 @@ def asMObject(name):
         return sel.getDependNode(0)
 
 
+def asMObjects(names):
+    """Returns the MObjects for all the names using a single MSelectionList, or the :class:`namecache.NameCache`
+    if it's enabled. Names which don't exist resolve to None.
+
+    :param names: The node names to resolve
+    :type names: seq(str)
+    :rtype: list(om2.MObject or None)
+    """
+    cache = namecache.NameCache()
+    if cache.isEnabled():
+        return cache.resolveNames(names)
+    return namecache.resolveNames(names)
+
+
 def nameFromMObject(mobject, partialName=False, includeNamespace=True):
     """This returns the full name or partial name for a given mobject, the mobject must be valid.
 
@@ -50,6 +74,11 @@ def nameFromMObject(mobject, partialName=False, includeNamespace=True):
         print nodes.nameFromMObject(node, partial=True) # returns the partial name eg. polyCube1
 
     """
+    if not partialName:
+        cache = namecache.NameCache()
+        if cache.isEnabled():
+            name = cache.fullName(mobject)
+            return name if includeNamespace else om2.MNamespace.stripNamespaceFromName(name)
     if mobject.hasFn(om2.MFn.kDagNode):
         if partialName:
             name = om2.MFnDagNode(mobject).partialPathName()
@@ -450,6 +479,68 @@ def isUnderSceneRoot(node):
     return isSceneRoot(par)
 
 
+def iterHierarchy(root, order=generic.DEPTH_FIRST, filterTypes=(), includeRoot=False, depthLimit=0, prune=None,
+                  asPath=False, includeDepth=False):
+    """Generator function which walks the dag hierarchy under root with MItDag.
+
+    .. code-block:: python
+
+        # every joint under the root, breadth first, with its depth relative to the root
+        for path, depth in iterHierarchy(root, generic.BREADTH_FIRST, (om2.MFn.kJoint,),
+                                         asPath=True, includeDepth=True):
+            print(path.fullPathName(), depth)
+
+    :param root: The root dag node
+    :type root: om2.MObject or om2.MDagPath
+    :param order: generic.DEPTH_FIRST or generic.BREADTH_FIRST
+    :type order: int
+    :param filterTypes: The MFn types to yield, this is done by MItDag so it matches like MObject.hasFn ie. \
+    kTransform includes joints. Nodes which don't match are still traversed.
+    :type filterTypes: seq(int)
+    :param includeRoot: If True and the root passes the filter, the root is yielded first
+    :type includeRoot: bool
+    :param depthLimit: The maximum depth below the root to visit, 0 means no limit
+    :type depthLimit: int
+    :param prune: A function which takes the MObject and returns True to skip the node and all of its descendants
+    :type prune: callable or None
+    :param asPath: If True yield MDagPaths instead of MObjects
+    :type asPath: bool
+    :param includeDepth: If True yield (node, depth) tuples where the root's children are at depth 1
+    :type includeDepth: bool
+    :rtype: Generator(om2.MObject or om2.MDagPath or tuple)
+    """
+    traversal = om2.MItDag.kBreadthFirst if order == generic.BREADTH_FIRST else om2.MItDag.kDepthFirst
+    rootPath = root if isinstance(root, om2.MDagPath) else om2.MDagPath.getAPathTo(root)
+    if filterTypes:
+        iteratorType = om2.MIteratorType()
+        iteratorType.filterList = list(filterTypes)
+        iterator = om2.MItDag(iteratorType, traversal)
+        iterator.reset(iteratorType, rootPath.node(), rootPath, traversal)
+    else:
+        iterator = om2.MItDag(traversal)
+        iterator.reset(rootPath, traversal)
+    rootNode = rootPath.node()
+    rootLength = rootPath.length()
+    needsDepth = includeDepth or depthLimit
+    while not iterator.isDone():
+        node = iterator.currentItem()
+        path = iterator.getPath() if asPath or needsDepth else None
+        depth = path.length() - rootLength if needsDepth else 0
+        if node == rootNode:
+            if not includeRoot:
+                iterator.next()
+                continue
+        elif (depthLimit and depth > depthLimit) or (prune is not None and prune(node)):
+            iterator.prune()
+            iterator.next()
+            continue
+        elif depthLimit and depth == depthLimit:
+            iterator.prune()
+        result = path if asPath else node
+        yield (result, depth) if includeDepth else result
+        iterator.next()
+
+
 def iterChildren(mObject, recursive=False, filter=None):
     """Generator function that can recursive iterate over the children of the given mobject.
 
@@ -462,19 +553,9 @@ def iterChildren(mObject, recursive=False, filter=None):
     :type filter: tuple or None
     :return: om.MObject
     """
-    dagNode = om2.MDagPath.getAPathTo(mObject)
-    childCount = dagNode.childCount()
-    if not childCount:
-        return
     filter = filter or ()
-
-    for index in xrange(childCount):
-        childObj = dagNode.child(index)
-        if not filter or childObj.apiType() in filter:
-            yield childObj
-            if recursive:
-                for x in iterChildren(childObj, recursive, filter):
-                    yield x
+    prune = (lambda node: node.apiType() not in filter) if filter else None
+    return iterHierarchy(mObject, depthLimit=0 if recursive else 1, prune=prune)
 
 
 def breadthFirstSearchDag(node, filter=None):
@@ -482,9 +563,16 @@ def breadthFirstSearchDag(node, filter=None):
     if not ns:
         return
     yield ns
-    for i in ns:
-        for t in breadthFirstSearchDag(i):
-            yield t
+    stack = [iter(ns)]
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+            continue
+        children = tuple(iterChildren(child, False))
+        if children:
+            yield children
+            stack.append(iter(children))
 
 
 def getChildren(mObject, recursive=False, filter=(om2.MFn.kTransform,)):
@@ -712,6 +800,74 @@ def getParentInverseMatrix(mobject):
     return plugs.getPlugValue(parentInverseMatrixPlug(mobject))
 
 
+def _iterDagPaths(dagNodes):
+    fn = om2.MFnDagNode()
+    for node in dagNodes:
+        if isinstance(node, om2.MDagPath):
+            yield node
+            continue
+        fn.setObject(node)
+        yield fn.getPath()
+
+
+def _packMatrices(matrices):
+    if np is None:
+        return [tuple(m) for m in matrices]
+    return np.fromiter(itertools.chain.from_iterable(matrices), dtype=np.float64,
+                       count=len(matrices) * 16).reshape(-1, 4, 4)
+
+
+def getWorldMatrices(dagNodes):
+    """Returns the world matrices of all the dag nodes as one contiguous (n, 4, 4) float64 array.
+
+    The matrices come from MDagPath.inclusiveMatrix which avoids the findPlug and MFnMatrixData per node of
+    :func:`getWorldMatrix`. Without numpy a list of flat 16 value tuples is returned.
+
+    :param dagNodes: The dag nodes, MDagPaths are used as is otherwise the first path of the MObject is used
+    :type dagNodes: seq(om2.MObject or om2.MDagPath)
+    :rtype: np.ndarray or list(tuple)
+    """
+    return _packMatrices([path.inclusiveMatrix() for path in _iterDagPaths(dagNodes)])
+
+
+def getWorldInverseMatrices(dagNodes):
+    """Batch version of :func:`getWorldInverseMatrix`, see :func:`getWorldMatrices`.
+
+    :type dagNodes: seq(om2.MObject or om2.MDagPath)
+    :rtype: np.ndarray or list(tuple)
+    """
+    return _packMatrices([path.inclusiveMatrixInverse() for path in _iterDagPaths(dagNodes)])
+
+
+def getParentMatrices(dagNodes):
+    """Batch version of :func:`getParentMatrix`, see :func:`getWorldMatrices`.
+
+    :type dagNodes: seq(om2.MObject or om2.MDagPath)
+    :rtype: np.ndarray or list(tuple)
+    """
+    return _packMatrices([path.exclusiveMatrix() for path in _iterDagPaths(dagNodes)])
+
+
+def getParentInverseMatrices(dagNodes):
+    """Batch version of :func:`getParentInverseMatrix`, see :func:`getWorldMatrices`.
+
+    :type dagNodes: seq(om2.MObject or om2.MDagPath)
+    :rtype: np.ndarray or list(tuple)
+    """
+    return _packMatrices([path.exclusiveMatrixInverse() for path in _iterDagPaths(dagNodes)])
+
+
+def getLocalMatrices(dagNodes):
+    """Batch version of :func:`getMatrix`, the local matrix is computed as the world matrix multiplied by the parent
+    inverse matrix, see :func:`getWorldMatrices`.
+
+    :type dagNodes: seq(om2.MObject or om2.MDagPath)
+    :rtype: np.ndarray or list(tuple)
+    """
+    return _packMatrices([path.inclusiveMatrix() * path.exclusiveMatrixInverse()
+                          for path in _iterDagPaths(dagNodes)])
+
+
 def hasAttribute(node, name):
     """Searches the node for a give a attribute name and returns True or False
 
@@ -1132,15 +1288,16 @@ def serializeNode(node, skipAttributes=None, includeConnections=True, includeAtt
     if node.hasFn(om2.MFn.kDagNode):
         data["parent"] = om2.MFnDagNode(dep.parent(0)).fullPathName()
     attributes = []
-    visited = []
+    visited = set()
     for pl in iterAttributes(node, skip=skipAttributes, includeAttributes=includeAttributes):
-        if (pl in visited or ((pl.isDefaultValue() and not pl.isConnected) or pl.isChild)) and not any(
-                i in pl.name() for i in includeAttributes):
+        plugName = pl.name()
+        if (plugName in visited or ((pl.isDefaultValue() and not pl.isConnected) or pl.isChild)) and not any(
+                i in plugName for i in includeAttributes):
             continue
         attrData = plugs.serializePlug(pl)
         if attrData:
             attributes.append(attrData)
-        visited.append(pl)
+        visited.add(plugName)
 
     if includeConnections:
         connections = []
@@ -1371,44 +1528,149 @@ def matchTransformMulti(targetPaths, source, translation=True, rotation=True, sc
     :return: True if passed
     :rtype: bool
     """
-    # get the proper matrix of source
+    if np is not None:
+        matchTransforms(targetPaths, source, translation, rotation, scale, space, pivot)
+        return True
+    for targetPath in targetPaths:
+        matchTransformSingle(targetPath, source, translation, rotation, scale, space, pivot)
+    return True
+
+
+def _compoundValues(plug):
+    return tuple(plug.child(i).asDouble() for i in xrange(plug.numChildren()))
+
+
+def matchTransforms(targets, sources, translation=True, rotation=True, scale=True, space=om2.MSpace.kWorld,
+                    pivot=False, writer=None):
+    """Vectorized version of :func:`matchTransformMulti` which matches each target to its own source or every
+    target to a single source. Requires numpy.
+
+    The matrices are gathered in bulk with :func:`getWorldMatrices` and :func:`getParentInverseMatrices`, the
+    multiply and SRT decomposition happen in one numpy pass and the rotation takes the target's rotateOrder,
+    rotateAxis and jointOrient into account. Like MFnTransform.setTranslation the target's pivots are taken out of
+    the translation and joints have the inverseScale of segment scale compensation removed. The translate, rotate
+    and scale values are applied with a single :class:`plugbatch.PlugBatchWriter`, so the whole match undoes in one
+    step.
+
+    :param targets: The transforms to match
+    :type targets: seq(om2.MDagPath or om2.MObject)
+    :param sources: One source for all the targets or one source per target
+    :type sources: om2.MDagPath or om2.MObject or seq(om2.MDagPath or om2.MObject)
+    :param translation: True to match translation
+    :type translation: bool
+    :param rotation: True to match rotation
+    :type rotation: bool
+    :param scale: True to match scale
+    :type scale: bool
+    :param space: om2.MSpace.kWorld matches the world transforms, any other space copies the local transforms
+    :type space: int
+    :param pivot: True to offset the translation by the difference between the source and target scale pivots
+    :type pivot: bool
+    :param writer: If provided the values are added to this writer and the caller is responsible for doIt
+    :type writer: :class:`plugbatch.PlugBatchWriter` or None
+    :return: The writer used to apply the values, call undoIt to revert the match
+    :rtype: :class:`plugbatch.PlugBatchWriter`
+    """
+    targetPaths = list(_iterDagPaths(targets))
+    if isinstance(sources, (om2.MObject, om2.MDagPath)):
+        sources = [sources]
+    sourcePaths = list(_iterDagPaths(sources))
+    count = len(targetPaths)
+    if len(sourcePaths) not in (1, count):
+        raise ValueError("Expected 1 or {} sources, got {}".format(count, len(sourcePaths)))
+    apply = writer is None
+    if writer is None:
+        writer = plugbatch.PlugBatchWriter()
+    if not count:
+        return writer
+
+    fn = om2.MFnTransform()
+    targetPlugs = []
+    rotateOrders = np.zeros(count, dtype=np.int64)
+    rotateAxes = np.zeros((count, 3), dtype=np.float64)
+    jointOrients = np.zeros((count, 3), dtype=np.float64)
+    inverseScales = np.ones((count, 3), dtype=np.float64)
+    # scalePivot, scalePivotTranslate, rotatePivot and rotatePivotTranslate per target
+    pivots = np.zeros((4, count, 3), dtype=np.float64)
+    currentRotations = np.zeros((count, 3), dtype=np.float64)
+    currentScales = np.ones((count, 3), dtype=np.float64)
+    for index, path in enumerate(targetPaths):
+        fn.setObject(path)
+        translatePlug, rotatePlug, scalePlug = (fn.findPlug("translate", False), fn.findPlug("rotate", False),
+                                                fn.findPlug("scale", False))
+        targetPlugs.append((translatePlug, rotatePlug, scalePlug))
+        rotateOrders[index] = fn.findPlug("rotateOrder", False).asInt()
+        rotateAxes[index] = _compoundValues(fn.findPlug("rotateAxis", False))
+        if path.hasFn(om2.MFn.kJoint):
+            # joints don't use the pivots, their matrix is scale * rotateAxis * rotate * jointOrient *
+            # inverseScale * translate
+            jointOrients[index] = _compoundValues(fn.findPlug("jointOrient", False))
+            if fn.findPlug("segmentScaleCompensate", False).asBool():
+                inverseScales[index] = _compoundValues(fn.findPlug("inverseScale", False))
+        elif translation:
+            for pivotIndex, name in enumerate(("scalePivot", "scalePivotTranslate", "rotatePivot",
+                                               "rotatePivotTranslate")):
+                pivots[pivotIndex, index] = _compoundValues(fn.findPlug(name, False))
+        if translation and not rotation:
+            currentRotations[index] = _compoundValues(rotatePlug)
+        if translation and not scale:
+            currentScales[index] = _compoundValues(scalePlug)
+
+    parentInverse = getParentInverseMatrices(targetPaths)
     if space == om2.MSpace.kWorld:
-        sourceMatrix = getWorldMatrix(source)
-        srcTfm = om2.MTransformationMatrix(sourceMatrix)
+        localMatrices = np.matmul(getWorldMatrices(sourcePaths), parentInverse)
     else:
-        sourceMatrix = getMatrix(source)
-        srcTfm = om2.MTransformtionMatrix(sourceMatrix)
-        tfm = srcTfm
-    # source pos
-    pos = srcTfm.translation(space)
+        localMatrices = np.array(np.broadcast_to(getLocalMatrices(sourcePaths), (count, 4, 4)))
+    # remove the parent's inverse scale which segment scale compensated joints apply after their rotation
+    localMatrices[:, :3, :3] *= inverseScales[:, np.newaxis, :]
+    translations, rotations, scales = mayamath.decomposeMatrices(localMatrices)
 
-    # source pivot
-    srcPivot = srcTfm.scalePivot(space)
+    if translation:
+        # the local translation is made up of translate plus the pivot terms
+        # (sp - sp * S + spt - rp) * rotateAxis * rotate + rp + rpt, remove those the same way
+        # MTransformationMatrix does using the scale and rotation the target will end up with
+        scalePivot, scalePivotTranslate, rotatePivot, rotatePivotTranslate = pivots
+        if rotation:
+            finalRotations = rotations
+        else:
+            finalRotations = np.matmul(mayamath.eulerToMatrices(rotateAxes),
+                                       mayamath.eulerToMatrices(currentRotations, rotateOrders))
+        finalScales = scales if scale else currentScales
+        offsets = scalePivot - scalePivot * finalScales + scalePivotTranslate - rotatePivot
+        translations -= (np.matmul(offsets[:, np.newaxis, :], finalRotations)[:, 0] + rotatePivot +
+                         rotatePivotTranslate)
+
+    if translation and pivot:
+        sourcePivots = []
+        for path in sourcePaths:
+            fn.setObject(path)
+            sourcePivots.append(tuple(fn.scalePivot(space))[:3])
+        targetPivots = []
+        for path in targetPaths:
+            fn.setObject(path)
+            targetPivots.append(tuple(fn.scalePivot(space))[:3])
+        delta = np.array(sourcePivots) - np.array(targetPivots)
+        if space == om2.MSpace.kWorld:
+            delta = np.matmul(delta[:, np.newaxis, :], parentInverse[:, :3, :3])[:, 0]
+        translations += delta
 
-    fn = om2.MFnTransform()
-    for targetPath in targetPaths:
-        targetNode = targetPath.node()
-        fn.setObject(targetNode)
-        if space != om2.MSpace.kWorld:
-            invParent = getParentInverseMatrix(targetNode)
-            tfm = om2.MTransformationMatrix(sourceMatrix * invParent)
-        # rotation
-        rot = tfm.rotation()
-        # scale
-        scl = tfm.scale(space)
-        # set Scaling
+    if rotation:
+        # the local rotation is rotateAxis * rotate * jointOrient so remove the axis and orient rotations
+        axisInverse = np.swapaxes(mayamath.eulerToMatrices(rotateAxes), 1, 2)
+        orientInverse = np.swapaxes(mayamath.eulerToMatrices(jointOrients), 1, 2)
+        rotations = np.matmul(np.matmul(axisInverse, rotations), orientInverse)
+        eulers = mayamath.matricesToEuler(rotations, rotateOrders)
+
+    for index, (translatePlug, rotatePlug, scalePlug) in enumerate(targetPlugs):
         if scale:
-            fn.setScale(scl)
-        # set Rotation
+            writer.add(scalePlug, scales[index].tolist())
         if rotation:
-            fn.setRotation(rot, om2.MSpace.kTransform)
-        # set Translation
+            writer.add(rotatePlug, eulers[index].tolist())
         if translation:
-            if pivot:
-                nodePivot = fn.scalePivot(space)
-                pos += srcPivot - nodePivot
-            fn.setTranslation(pos, space)
-    return True
+            writer.add(translatePlug, translations[index].tolist())
+    if apply:
+        writer.doIt()
+    return writer
 
 
 def matchTransformSingle(targetPath, source, translation=True, rotation=True, scale=True, space=om2.MSpace.kWorld,
@@ -1441,7 +1703,7 @@ def matchTransformSingle(targetPath, source, translation=True, rotation=True, sc
         invParent = getParentInverseMatrix(targetNode)
         tfm = om2.MTransformationMatrix(sourceMatrix * invParent)
     else:
-        srcTfm = om2.MTransformtionMatrix(getMatrix(source))
+        srcTfm = om2.MTransformationMatrix(getMatrix(source))
         tfm = srcTfm
     # source pos
     pos = srcTfm.translation(space)
@@ -0,0 +1,216 @@
+"""NumPy bridge for array typed plugs, kDoubleArray, kFloatArray, kIntArray, kPointArray, kVectorArray and
+kMatrixArray plugs are read and written as contiguous ndarrays.
+
+The om2 array types don't expose the buffer protocol, so a zero copy view isn't possible. Reading iterates the om2
+array once with np.fromiter. Writing goes through ndarray.tolist() and, for point, vector and matrix arrays, one om2
+object per element, since that's what the om2 array constructors accept. What's avoided is the per element plug
+access and type dispatch of :func:`plugs.getPlugValue` and :func:`plugs.setPlugValue`, the data still passes
+through python objects on the way in.
+
+numpy is optional for the rest of the package, every function in this module requires it.
+
+.. code-block:: python
+
+    weights = plugarrays.getArray(node.findPlug("weightMap", False))
+    # float64 array of shape (n,)
+    plugarrays.setArray(node.findPlug("weightMap", False), weights * 0.5)
+
+    points = plugarrays.getArray(node.findPlug("pointCache", False))
+    # float64 array of shape (n, 4)
+
+"""
+import itertools
+
+from maya.api import OpenMaya as om2
+
+from zoo.libs.maya.api import attrtypes
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# attrType -> (dtype, element shape)
+ARRAY_LAYOUTS = {
+    attrtypes.kMFnDataDoubleArray: ("float64", ()),
+    attrtypes.kMFnDataFloatArray: ("float32", ()),
+    attrtypes.kMFnDataIntArray: ("int32", ()),
+    attrtypes.kMFnDataPointArray: ("float64", (4,)),
+    attrtypes.kMFnDataVectorArray: ("float64", (3,)),
+    attrtypes.kMFnDataMatrixArray: ("float64", (4, 4)),
+}
+_DATA_TYPES = {
+    om2.MFnData.kDoubleArray: attrtypes.kMFnDataDoubleArray,
+    om2.MFnData.kFloatArray: attrtypes.kMFnDataFloatArray,
+    om2.MFnData.kIntArray: attrtypes.kMFnDataIntArray,
+    om2.MFnData.kPointArray: attrtypes.kMFnDataPointArray,
+    om2.MFnData.kVectorArray: attrtypes.kMFnDataVectorArray,
+    om2.MFnData.kMatrixArray: attrtypes.kMFnDataMatrixArray,
+}
+
+
+def arrayType(plug):
+    """Returns the attrtypes constant for the plug if it's one of the supported array data types.
+
+    :type plug: om2.MPlug
+    :rtype: int or None
+    """
+    obj = plug.attribute()
+    if not obj.hasFn(om2.MFn.kTypedAttribute):
+        return None
+    return _DATA_TYPES.get(om2.MFnTypedAttribute(obj).attrType())
+
+
+def _requireNumpy():
+    if np is None:
+        raise ImportError("numpy is required to convert array plugs")
+
+
+def toNumpy(mArray, attrType):
+    """Converts an om2 array to an ndarray.
+
+    :param mArray: The om2 array ie. MDoubleArray or MPointArray
+    :type mArray: om2.MDoubleArray or om2.MFloatArray or om2.MIntArray or om2.MPointArray or om2.MVectorArray \
+    or om2.MMatrixArray
+    :param attrType: The attrtypes constant of the array
+    :type attrType: int
+    :rtype: np.ndarray
+    :raises: ImportError if numpy isn't available
+    """
+    _requireNumpy()
+    dtype, shape = ARRAY_LAYOUTS[attrType]
+    count = len(mArray)
+    if not shape:
+        return np.fromiter(mArray, dtype=dtype, count=count)
+    # MPoint, MVector and MMatrix are flat sequences so the elements are chained into one pass
+    size = int(np.prod(shape))
+    return np.fromiter(itertools.chain.from_iterable(mArray), dtype=dtype,
+                       count=count * size).reshape((count,) + shape)
+
+
+def fromNumpy(array, attrType):
+    """Converts an ndarray to the om2 array type for the attrType.
+
+    :param array: The array, points can be (n, 3) or (n, 4), matrices can be (n, 4, 4) or (n, 16)
+    :type array: np.ndarray or sequence
+    :param attrType: The attrtypes constant of the array
+    :type attrType: int
+    :rtype: om2.MDoubleArray or om2.MFloatArray or om2.MIntArray or om2.MPointArray or om2.MVectorArray \
+    or om2.MMatrixArray
+    :raises: ImportError if numpy isn't available
+    """
+    _requireNumpy()
+    dtype, shape = ARRAY_LAYOUTS[attrType]
+    array = np.ascontiguousarray(array, dtype=dtype)
+    if attrType == attrtypes.kMFnDataDoubleArray:
+        return om2.MDoubleArray(array.tolist())
+    elif attrType == attrtypes.kMFnDataFloatArray:
+        return om2.MFloatArray(array.tolist())
+    elif attrType == attrtypes.kMFnDataIntArray:
+        return om2.MIntArray(array.tolist())
+    elif attrType == attrtypes.kMFnDataPointArray:
+        return om2.MPointArray([om2.MPoint(p) for p in array.tolist()])
+    elif attrType == attrtypes.kMFnDataVectorArray:
+        return om2.MVectorArray([om2.MVector(v) for v in array.tolist()])
+    return om2.MMatrixArray([om2.MMatrix(m) for m in array.reshape(-1, 16).tolist()])
+
+
+def _createData(mArray, attrType):
+    if attrType == attrtypes.kMFnDataDoubleArray:
+        return om2.MFnDoubleArrayData().create(mArray)
+    elif attrType == attrtypes.kMFnDataFloatArray:
+        return om2.MFnFloatArrayData().create(mArray)
+    elif attrType == attrtypes.kMFnDataIntArray:
+        return om2.MFnIntArrayData().create(mArray)
+    elif attrType == attrtypes.kMFnDataPointArray:
+        return om2.MFnPointArrayData().create(mArray)
+    elif attrType == attrtypes.kMFnDataVectorArray:
+        return om2.MFnVectorArrayData().create(mArray)
+    return om2.MFnMatrixArrayData().create(mArray)
+
+
+def _dataArray(dataObj, attrType):
+    if attrType == attrtypes.kMFnDataDoubleArray:
+        return om2.MFnDoubleArrayData(dataObj).array()
+    elif attrType == attrtypes.kMFnDataFloatArray:
+        return om2.MFnFloatArrayData(dataObj).array()
+    elif attrType == attrtypes.kMFnDataIntArray:
+        return om2.MFnIntArrayData(dataObj).array()
+    elif attrType == attrtypes.kMFnDataPointArray:
+        return om2.MFnPointArrayData(dataObj).array()
+    elif attrType == attrtypes.kMFnDataVectorArray:
+        return om2.MFnVectorArrayData(dataObj).array()
+    return om2.MFnMatrixArrayData(dataObj).array()
+
+
+def getArray(plug):
+    """Returns the plug value as an ndarray, see :data:`ARRAY_LAYOUTS` for the dtype and shape of each type.
+    A plug without data, ie. an attribute which has never been set, returns an empty array.
+
+    :param plug: The array data plug
+    :type plug: om2.MPlug
+    :rtype: np.ndarray
+    :raises: ValueError if the plug isn't one of the supported array data types
+    """
+    _requireNumpy()
+    attrType = arrayType(plug)
+    if attrType is None:
+        raise ValueError("Plug isn't a supported array data type: {}".format(plug.name()))
+    dataObj = plug.asMObject()
+    if dataObj.isNull():
+        dtype, shape = ARRAY_LAYOUTS[attrType]
+        return np.zeros((0,) + shape, dtype=dtype)
+    return toNumpy(_dataArray(dataObj, attrType), attrType)
+
+
+def setArray(plug, array, modifier=None):
+    """Sets the plug value from an ndarray.
+
+    :param plug: The array data plug
+    :type plug: om2.MPlug
+    :param array: The values, see :func:`fromNumpy` for the accepted shapes
+    :type array: np.ndarray or sequence
+    :param modifier: If provided the value is added to the modifier instead of being set directly, the caller is
+    responsible for calling doIt
+    :type modifier: om2.MDGModifier or None
+    :return: The created data object
+    :rtype: om2.MObject
+    :raises: ValueError if the plug isn't one of the supported array data types
+    """
+    attrType = arrayType(plug)
+    if attrType is None:
+        raise ValueError("Plug isn't a supported array data type: {}".format(plug.name()))
+    data = _createData(fromNumpy(array, attrType), attrType)
+    if modifier is not None:
+        modifier.newPlugValue(plug, data)
+    else:
+        plug.setMObject(data)
+    return data
+
+
+def getArrays(plugList):
+    """Reads many array plugs at once.
+
+    :type plugList: seq(om2.MPlug)
+    :rtype: list(np.ndarray)
+    """
+    return [getArray(plug) for plug in plugList]
+
+
+def setArrays(plugValues, modifier=None):
+    """Sets many array plugs with a single modifier, so the whole set can be undone in one step.
+
+    :param plugValues: A sequence of (plug, array) pairs
+    :type plugValues: seq(tuple(om2.MPlug, np.ndarray))
+    :param modifier: The modifier to use, if None a new one is created and doIt is called
+    :type modifier: om2.MDGModifier or None
+    :return: The modifier
+    :rtype: om2.MDGModifier
+    """
+    apply = modifier is None
+    modifier = modifier or om2.MDGModifier()
+    for plug, array in plugValues:
+        setArray(plug, array, modifier)
+    if apply:
+        modifier.doIt()
+    return modifier
@@ -0,0 +1,396 @@
+"""Bulk plug reading and writing.
+
+When reading, plugs are grouped by their attribute type. The type dispatch then happens once per attribute instead
+of once per plug, and the values come back as typed columns. Writes are collected into a single MDGModifier so they
+apply in one doIt and undo in one step.
+
+.. code-block:: python
+
+    columns = plugbatch.readAttributes([(node, "translate"), (node, "visibility"), (otherNode, "translate")])
+    indices, values = columns[attrtypes.kMFnNumeric3Double]
+    # values is a (2, 3) numpy array if numpy is available
+
+    writer = plugbatch.PlugBatchWriter()
+    writer.add(translatePlug, (0.0, 1.0, 0.0))
+    writer.add(visibilityPlug, False)
+    writer.doIt()
+    writer.undoIt()
+
+"""
+from maya.api import OpenMaya as om2
+from zoo.libs.maya.api import attrtypes
+from zoo.libs.maya.api import plugs
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# column kinds which decide how the values are packed
+COLUMN_FLOAT = "float"
+COLUMN_INT = "int"
+COLUMN_BOOL = "bool"
+COLUMN_MATRIX = "matrix"
+COLUMN_OBJECT = "object"
+
+_NUMERIC_READERS = {
+    om2.MFnNumericData.kBoolean: (attrtypes.kMFnNumericBoolean, om2.MPlug.asBool, COLUMN_BOOL),
+    om2.MFnNumericData.kByte: (attrtypes.kMFnNumericByte, om2.MPlug.asBool, COLUMN_BOOL),
+    om2.MFnNumericData.kShort: (attrtypes.kMFnNumericShort, om2.MPlug.asShort, COLUMN_INT),
+    om2.MFnNumericData.kInt: (attrtypes.kMFnNumericInt, om2.MPlug.asInt, COLUMN_INT),
+    om2.MFnNumericData.kLong: (attrtypes.kMFnNumericLong, om2.MPlug.asInt, COLUMN_INT),
+    om2.MFnNumericData.kDouble: (attrtypes.kMFnNumericDouble, om2.MPlug.asDouble, COLUMN_FLOAT),
+    om2.MFnNumericData.kFloat: (attrtypes.kMFnNumericFloat, om2.MPlug.asFloat, COLUMN_FLOAT),
+    om2.MFnNumericData.kChar: (attrtypes.kMFnNumericChar, om2.MPlug.asChar, COLUMN_INT),
+}
+_NUMERIC_COMPOUND_TYPES = {
+    om2.MFnNumericData.k2Double: attrtypes.kMFnNumeric2Double,
+    om2.MFnNumericData.k2Float: attrtypes.kMFnNumeric2Float,
+    om2.MFnNumericData.k2Int: attrtypes.kMFnNumeric2Int,
+    om2.MFnNumericData.k2Long: attrtypes.kMFnNumeric2Long,
+    om2.MFnNumericData.k2Short: attrtypes.kMFnNumeric2Short,
+    om2.MFnNumericData.k3Double: attrtypes.kMFnNumeric3Double,
+    om2.MFnNumericData.k3Float: attrtypes.kMFnNumeric3Float,
+    om2.MFnNumericData.k3Int: attrtypes.kMFnNumeric3Int,
+    om2.MFnNumericData.k3Long: attrtypes.kMFnNumeric3Long,
+    om2.MFnNumericData.k3Short: attrtypes.kMFnNumeric3Short,
+    om2.MFnNumericData.k4Double: attrtypes.kMFnNumeric4Double,
+}
+_UNIT_TYPES = {
+    om2.MFnUnitAttribute.kDistance: attrtypes.kMFnUnitAttributeDistance,
+    om2.MFnUnitAttribute.kAngle: attrtypes.kMFnUnitAttributeAngle,
+}
+
+
+def _readNumericCompound(plug):
+    return tuple(plug.child(i).asDouble() for i in xrange(plug.numChildren()))
+
+
+def _readMatrix(plug):
+    return tuple(om2.MFnMatrixData(plug.asMObject()).matrix())
+
+
+def _readTime(plug):
+    return plug.asMTime().value
+
+
+def _readString(plug):
+    return plug.asString()
+
+
+def _readMessage(plug):
+    return None
+
+
+class PlugReaderCache(object):
+    """Caches the resolved reader for each attribute.
+
+    The cache is keyed by the attribute MObjectHandle hashCode and whether the plug is an array, static attributes
+    share the same attribute MObject for every node of the same type so this acts as a (nodeType, attribute) key
+    while dynamic attributes get their own entry. An array plug and its element plugs share the attribute so the
+    array flag keeps their readers apart. Each entry keeps the handle so stale entries from deleted dynamic
+    attributes are resolved again.
+    """
+
+    def __init__(self):
+        # {(hashCode, isArray): (om2.MObjectHandle, attrType, reader, columnKind)}
+        self._readers = {}
+
+    def clear(self):
+        self._readers = {}
+
+    def __len__(self):
+        return len(self._readers)
+
+    def reader(self, plug):
+        """Returns the attrType, reader function and column kind for the plug.
+
+        :type plug: om2.MPlug
+        :rtype: tuple(int, callable, str)
+        """
+        attr = plug.attribute()
+        handle = om2.MObjectHandle(attr)
+        key = (handle.hashCode(), plug.isArray)
+        entry = self._readers.get(key)
+        if entry is not None and entry[0].isValid() and entry[0].isAlive() and entry[0].object() == attr:
+            return entry[1:]
+        entry = (handle,) + resolveReader(plug)
+        self._readers[key] = entry
+        return entry[1:]
+
+
+def resolveReader(plug):
+    """Resolves the reader for the plug's attribute, array plugs and any attribute type without a fast reader
+    fall back to :func:`plugs.getPythonTypeFromPlugValue`.
+
+    :type plug: om2.MPlug
+    :return: attrType, reader function, column kind
+    :rtype: tuple(int, callable, str)
+    """
+    if plug.isArray:
+        return plugs.plugType(plug), plugs.getPythonTypeFromPlugValue, COLUMN_OBJECT
+    obj = plug.attribute()
+    if obj.hasFn(om2.MFn.kNumericAttribute):
+        numericType = om2.MFnNumericAttribute(obj).numericType()
+        reader = _NUMERIC_READERS.get(numericType)
+        if reader is not None:
+            return reader
+        attrType = _NUMERIC_COMPOUND_TYPES.get(numericType)
+        if attrType is not None:
+            return attrType, _readNumericCompound, COLUMN_FLOAT
+    elif obj.hasFn(om2.MFn.kUnitAttribute):
+        unitType = om2.MFnUnitAttribute(obj).unitType()
+        if unitType == om2.MFnUnitAttribute.kTime:
+            return attrtypes.kMFnUnitAttributeTime, _readTime, COLUMN_FLOAT
+        # asDouble returns internal units, cm and radians
+        return _UNIT_TYPES.get(unitType), om2.MPlug.asDouble, COLUMN_FLOAT
+    elif obj.hasFn(om2.MFn.kEnumAttribute):
+        return attrtypes.kMFnkEnumAttribute, om2.MPlug.asInt, COLUMN_INT
+    elif obj.hasFn(om2.MFn.kTypedAttribute):
+        dataType = om2.MFnTypedAttribute(obj).attrType()
+        if dataType == om2.MFnData.kString:
+            return attrtypes.kMFnDataString, _readString, COLUMN_OBJECT
+        elif dataType == om2.MFnData.kMatrix:
+            return attrtypes.kMFnDataMatrix, _readMatrix, COLUMN_MATRIX
+    elif obj.hasFn(om2.MFn.kMatrixAttribute):
+        return attrtypes.kMFnDataMatrix, _readMatrix, COLUMN_MATRIX
+    elif obj.hasFn(om2.MFn.kMessageAttribute):
+        return attrtypes.kMFnMessageAttribute, _readMessage, COLUMN_OBJECT
+    elif plug.isCompound:
+        return attrtypes.kMFnCompoundAttribute, plugs.getPythonTypeFromPlugValue, COLUMN_OBJECT
+    return plugs.plugType(plug), plugs.getPythonTypeFromPlugValue, COLUMN_OBJECT
+
+
+_READER_CACHE = PlugReaderCache()
+
+
+def readerCache():
+    """Returns the global reader cache used by :func:`readPlugs`
+
+    :rtype: :class:`PlugReaderCache`
+    """
+    return _READER_CACHE
+
+
+def _packColumn(kind, values):
+    if np is None:
+        return values
+    if kind == COLUMN_FLOAT:
+        return np.array(values, dtype=np.float64)
+    elif kind == COLUMN_INT:
+        return np.array(values, dtype=np.int32)
+    elif kind == COLUMN_BOOL:
+        return np.array(values, dtype=np.bool_)
+    elif kind == COLUMN_MATRIX:
+        return np.array(values, dtype=np.float64).reshape(-1, 4, 4)
+    return values
+
+
+def readPlugs(plugList, cache=None):
+    """Reads the values of all the plugs, plugs are grouped by their attribute type and each group is returned as a
+    column along with the indices of the plugs within plugList.
+
+    Numeric columns are numpy arrays when numpy is available, compound numeric attributes eg. translate are
+    (n, childCount) arrays and matrices are (n, 4, 4) arrays. Strings, arrays and any other types are returned as
+    lists. Without numpy every column is a list. Array plugs are returned in their own column keyed by
+    (attrType, True) so they never share a column with element plugs of the same attribute type.
+
+    :param plugList: The plugs to read
+    :type plugList: seq(om2.MPlug)
+    :param cache: The reader cache to use, defaults to the global cache.
+    :type cache: :class:`PlugReaderCache` or None
+    :return: {attrType: (indices, values)}, array plugs are keyed by (attrType, True)
+    :rtype: dict
+    """
+    cache = cache if cache is not None else _READER_CACHE
+    groups = {}
+    for index, plug in enumerate(plugList):
+        attrType, reader, kind = cache.reader(plug)
+        key = (attrType, True) if plug.isArray else attrType
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = (kind, [], [])
+        group[1].append(index)
+        group[2].append(reader(plug))
+    return dict((key, (indices, _packColumn(kind, values)))
+                for key, (kind, indices, values) in groups.items())
+
+
+def readAttributes(nodeAttributes, cache=None):
+    """Same as :func:`readPlugs` but takes node and attribute name pairs, missing attributes are skipped so check
+    the returned indices.
+
+    :param nodeAttributes: A sequence of (node, attributeName) pairs
+    :type nodeAttributes: seq(tuple(om2.MObject, str))
+    :param cache: The reader cache to use, defaults to the global cache.
+    :type cache: :class:`PlugReaderCache` or None
+    :return: {attrType: (indices, values)} where the indices are relative to nodeAttributes
+    :rtype: dict
+    """
+    dep = om2.MFnDependencyNode()
+    plugList = []
+    plugIndices = []
+    for index, (node, attributeName) in enumerate(nodeAttributes):
+        dep.setObject(node)
+        try:
+            plugList.append(dep.findPlug(attributeName, False))
+        except RuntimeError:
+            continue
+        plugIndices.append(index)
+    columns = readPlugs(plugList, cache)
+    return dict((attrType, ([plugIndices[i] for i in indices], values))
+                for attrType, (indices, values) in columns.items())
+
+
+def _modifierUnit(method, unitType):
+    return lambda mod, plug, value: method(mod, plug, unitType(value))
+
+
+def _modifierConnect(mod, plug, value):
+    # matches plugs.setPlugValue which connects the message plug to the value plug
+    mod.connect(plug, value)
+
+
+# attrType -> function(modifier, plug, value), any attrType missing from here is set directly by the writer
+_MODIFIER_SETTERS = {
+    attrtypes.kMFnNumericBoolean: om2.MDGModifier.newPlugValueBool,
+    attrtypes.kMFnNumericShort: om2.MDGModifier.newPlugValueShort,
+    attrtypes.kMFnNumericInt: om2.MDGModifier.newPlugValueInt,
+    attrtypes.kMFnNumericLong: om2.MDGModifier.newPlugValueInt,
+    attrtypes.kMFnNumericInt64: om2.MDGModifier.newPlugValueInt,
+    attrtypes.kMFnNumericFloat: om2.MDGModifier.newPlugValueFloat,
+    attrtypes.kMFnNumericDouble: om2.MDGModifier.newPlugValueDouble,
+    attrtypes.kMFnNumericChar: om2.MDGModifier.newPlugValueChar,
+    attrtypes.kMFnkEnumAttribute: om2.MDGModifier.newPlugValueInt,
+    attrtypes.kMFnDataString: om2.MDGModifier.newPlugValueString,
+    attrtypes.kMFnUnitAttributeDistance: _modifierUnit(om2.MDGModifier.newPlugValueMDistance, om2.MDistance),
+    attrtypes.kMFnUnitAttributeAngle: _modifierUnit(om2.MDGModifier.newPlugValueMAngle, om2.MAngle),
+    attrtypes.kMFnUnitAttributeTime: _modifierUnit(om2.MDGModifier.newPlugValueMTime, om2.MTime),
+    attrtypes.kMFnMessageAttribute: _modifierConnect,
+}
+
+
+class PlugBatchWriter(object):
+    """Collects plug values and applies them with a single MDGModifier.
+
+    Setters are resolved through :func:`plugs.plugTypeInfo` so the attribute type dispatch happens once per
+    attribute. Array and compound plugs are expanded the same way :func:`plugs.setPlugValue` does it. Types the
+    modifier can't set, e.g. numeric compounds without child plugs, are written directly with the type cache setter.
+    Their previous value is stored so undoIt restores them too. Locked plugs fail the whole modifier, pass unlock=True
+    to :meth:`add` to unlock them around doIt and undoIt.
+
+    .. code-block:: python
+
+        writer = PlugBatchWriter()
+        for plug, value in pose:
+            writer.add(plug, value)
+        writer.doIt()
+        # later
+        writer.undoIt()
+
+    :param modifier: The modifier to add the operations to, a new MDGModifier is created if None.
+    :type modifier: om2.MDGModifier or None
+    """
+
+    def __init__(self, modifier=None):
+        self.modifier = modifier or om2.MDGModifier()
+        self._matrixData = om2.MFnMatrixData()
+        # keeps the matrix data objects alive until the modifier is done with them
+        self._dataObjects = []
+        # [(plug, setter, value, previousValue)]
+        self._directWrites = []
+        # locked plugs which are unlocked while the modifier is applied or undone
+        self._lockedPlugs = []
+        self._count = 0
+        self._applied = False
+
+    def __len__(self):
+        return self._count
+
+    def add(self, plug, value, unlock=False):
+        """Adds the plug value to the batch, nothing changes in the scene until :meth:`doIt` is called.
+
+        :param plug: The plug to set, array plugs expect a value per existing element and compound plugs a value
+        per child. If the count doesn't match, the plug is skipped, same as :func:`plugs.setPlugValue`.
+        :type plug: om2.MPlug
+        :param value: The value to set
+        :type value: any
+        :param unlock: If True and the plug is locked then it's unlocked while the batch is applied or undone and
+        locked again afterwards.
+        :type unlock: bool
+        """
+        if unlock and plug.isLocked:
+            self._lockedPlugs.append(plug)
+        if plug.isArray:
+            count = plug.evaluateNumElements()
+            if count != len(value):
+                return
+            for i in xrange(count):
+                self.add(plug.elementByPhysicalIndex(i), value[i], unlock)
+            return
+        elif plug.isCompound:
+            count = plug.numChildren()
+            if count != len(value):
+                return
+            for i in xrange(count):
+                self.add(plug.child(i), value[i], unlock)
+            return
+        info = plugs.plugTypeInfo(plug)
+        attrType = info.attrType
+        self._count += 1
+        modifierSetter = _MODIFIER_SETTERS.get(attrType)
+        if modifierSetter is not None:
+            modifierSetter(self.modifier, plug, value)
+        elif attrType == attrtypes.kMFnDataMatrix:
+            data = self._matrixData.create(om2.MMatrix(value))
+            self._dataObjects.append(data)
+            self.modifier.newPlugValue(plug, data)
+        else:
+            self._directWrites.append((plug, info.setter, value, None))
+
+    def addAttribute(self, node, attributeName, value, unlock=False):
+        """Same as :meth:`add` but finds the plug by name first.
+
+        :type node: om2.MObject
+        :type attributeName: str
+        :type value: any
+        :type unlock: bool
+        """
+        self.add(om2.MFnDependencyNode(node).findPlug(attributeName, False), value, unlock)
+
+    def _setLocked(self, state):
+        for plug in self._lockedPlugs:
+            plug.isLocked = state
+
+    def doIt(self):
+        """Applies every value collected so far
+        """
+        self._setLocked(False)
+        try:
+            self.modifier.doIt()
+            writes = []
+            for plug, setter, value, _ in self._directWrites:
+                writes.append((plug, setter, value, plugs.plugTypeInfo(plug).getter(plug)[1]))
+                setter(plug, value)
+            self._directWrites = writes
+            self._applied = True
+        finally:
+            self._setLocked(True)
+
+    def redoIt(self):
+        self.doIt()
+
+    def undoIt(self):
+        """Restores every plug to the value it had before :meth:`doIt`
+        """
+        if not self._applied:
+            return
+        self._setLocked(False)
+        try:
+            for plug, setter, _, previousValue in reversed(self._directWrites):
+                if previousValue is not None:
+                    setter(plug, previousValue)
+            self.modifier.undoIt()
+            self._applied = False
+        finally:
+            self._setLocked(True)
@@ -1,7 +1,10 @@
+import collections
 import copy
 import re
 from maya.api import OpenMaya as om2
 from zoo.libs.maya.api import attrtypes
+from zoo.libs.maya.api import generic
+from zoo.libs.maya.api import namecache
 from zoo.libs.utils import zlogging
 import contextlib
 
@@ -19,9 +22,13 @@ def asMPlug(name):
     """
     try:
         names = name.split(".")
-        sel = om2.MSelectionList()
-        sel.add(names[0])
-        node = om2.MFnDependencyNode(sel.getDependNode(0))
+        cache = namecache.NameCache()
+        if cache.isEnabled():
+            node = om2.MFnDependencyNode(cache.asMObject(names[0]))
+        else:
+            sel = om2.MSelectionList()
+            sel.add(names[0])
+            node = om2.MFnDependencyNode(sel.getDependNode(0))
         return node.findPlug(".".join(names[1:]), False)
     except RuntimeError:
         sel = om2.MSelectionList()
@@ -275,9 +282,10 @@ def filterConnectedNodes(plug, filter, source=True, destination=False):
     return filteredNodes
 
 
-def iterDependencyGraph(plug, alternativeName="", depthLimit=256, transverseType="down"):
-    """This recursive function walks the dependency graph based on the name. so each node it visits if that attribute
-    exists it will be return.
+def iterDependencyGraph(plug, alternativeName="", depthLimit=256, transverseType="down", order=generic.DEPTH_FIRST,
+                        prune=None, includeDepth=False):
+    """This function walks the dependency graph based on the name. so each node it visits if that attribute
+    exists it will be return. Each node is only visited once so cyclic connections are safe.
     example connections : nodeA.test -> nodeB.test -> nodeC.test
     [nodeA,nodeB, nodeC] will be return as a generator
 
@@ -287,28 +295,34 @@ def iterDependencyGraph(plug, alternativeName="", depthLimit=256, transverseType
     :type alternativeName: str
     :param depthLimit:
     :type depthLimit: int
+    :param transverseType: "down" to follow the destinations of the plug or "up" to follow the source.
+    :type transverseType: str
+    :param order: generic.DEPTH_FIRST or generic.BREADTH_FIRST
+    :type order: int
+    :param prune: function which takes the plug and depth, if it returns True the plug is returned but not walked.
+    :type prune: callable or None
+    :param includeDepth: if True then each element will be a tuple of (plug, depth)
+    :type includeDepth: bool
     :return:
-    :rtype: generator(MObject)
+    :rtype: generator(MPlug)
     """
 
     plugSearchname = alternativeName or plug.partialName(useLongNames=True)
-    if transverseType == "down":
-        connections = plug.destinations()
-    else:
-        connections = [plug.source()]
-    for connection in connections:
-        node = connection.node()
-        dep = om2.MFnDependencyNode(node)
-        if not dep.hasAttribute(plugSearchname):
-            continue
-        nodePlug = dep.findPlug(plugSearchname, False)
-        if depthLimit < 1:
-            return
-        yield nodePlug
-        if nodePlug.isConnected:
-            for i in iterDependencyGraph(nodePlug, plugSearchname, depthLimit=depthLimit - 1,
-                                         transverseType=transverseType):
-                yield i
+    dep = om2.MFnDependencyNode()
+
+    def _connectedPlugs(currentPlug):
+        if transverseType == "down":
+            connections = currentPlug.destinations()
+        else:
+            source = currentPlug.source()
+            connections = [] if source.isNull else [source]
+        for connection in connections:
+            dep.setObject(connection.node())
+            if dep.hasAttribute(plugSearchname):
+                yield dep.findPlug(plugSearchname, False)
+
+    return generic.iterGraph([plug], _connectedPlugs, keyFunc=lambda p: om2.MObjectHandle(p.node()).hashCode(),
+                             depthLimit=depthLimit, order=order, prune=prune, includeDepth=includeDepth)
 
 
 def serializePlug(plug):
@@ -653,60 +667,289 @@ def setMax(plug, value):
     return False
 
 
-def getPlugValue(plug):
-    return getPlugAndType(plug)[1]
-
-
-def getPlugAndType(plug):
-    """Given an MPlug, get its value
+PlugTypeInfo = collections.namedtuple("PlugTypeInfo", ["attrType", "getter", "setter"])
+
+
+def _numericDataGetter(attrType):
+    return lambda plug: (attrType, om2.MFnNumericData(plug.asMObject()).getData())
+
+
+def _valueGetter(attrType, func):
+    return lambda plug: (attrType, func(plug))
+
+
+_NUMERIC_GETTERS = {
+    om2.MFnNumericData.kBoolean: _valueGetter(attrtypes.kMFnNumericBoolean, om2.MPlug.asBool),
+    om2.MFnNumericData.kByte: _valueGetter(attrtypes.kMFnNumericByte, om2.MPlug.asBool),
+    om2.MFnNumericData.kShort: _valueGetter(attrtypes.kMFnNumericShort, om2.MPlug.asShort),
+    om2.MFnNumericData.kInt: _valueGetter(attrtypes.kMFnNumericInt, om2.MPlug.asInt),
+    om2.MFnNumericData.kLong: _valueGetter(attrtypes.kMFnNumericLong, om2.MPlug.asInt),
+    om2.MFnNumericData.kDouble: _valueGetter(attrtypes.kMFnNumericDouble, om2.MPlug.asDouble),
+    om2.MFnNumericData.kFloat: _valueGetter(attrtypes.kMFnNumericFloat, om2.MPlug.asFloat),
+    om2.MFnNumericData.kAddr: _valueGetter(attrtypes.kMFnNumericAddr, lambda plug: plug.asAddr()),
+    om2.MFnNumericData.kChar: _valueGetter(attrtypes.kMFnNumericChar, om2.MPlug.asChar),
+    om2.MFnNumericData.k2Double: _numericDataGetter(attrtypes.kMFnNumeric2Double),
+    om2.MFnNumericData.k2Float: _numericDataGetter(attrtypes.kMFnNumeric2Float),
+    om2.MFnNumericData.k2Int: _numericDataGetter(attrtypes.kMFnNumeric2Int),
+    om2.MFnNumericData.k2Long: _numericDataGetter(attrtypes.kMFnNumeric2Long),
+    om2.MFnNumericData.k2Short: _numericDataGetter(attrtypes.kMFnNumeric2Short),
+    om2.MFnNumericData.k3Double: _numericDataGetter(attrtypes.kMFnNumeric3Double),
+    om2.MFnNumericData.k3Float: _numericDataGetter(attrtypes.kMFnNumeric3Float),
+    om2.MFnNumericData.k3Int: _numericDataGetter(attrtypes.kMFnNumeric3Int),
+    om2.MFnNumericData.k3Long: _numericDataGetter(attrtypes.kMFnNumeric3Long),
+    om2.MFnNumericData.k3Short: _numericDataGetter(attrtypes.kMFnNumeric3Short),
+    om2.MFnNumericData.k4Double: _numericDataGetter(attrtypes.kMFnNumeric4Double),
+}
+_TYPED_GETTERS = {
+    om2.MFnData.kString: _valueGetter(attrtypes.kMFnDataString, om2.MPlug.asString),
+    om2.MFnData.kNumeric: lambda plug: getNumericValue(plug),
+    om2.MFnData.kMatrix: _valueGetter(attrtypes.kMFnDataMatrix,
+                                      lambda plug: om2.MFnMatrixData(plug.asMObject()).matrix()),
+    om2.MFnData.kFloatArray: _valueGetter(attrtypes.kMFnDataFloatArray,
+                                          lambda plug: om2.MFnFloatArrayData(plug.asMObject()).array()),
+    om2.MFnData.kDoubleArray: _valueGetter(attrtypes.kMFnDataDoubleArray,
+                                           lambda plug: om2.MFnDoubleArrayData(plug.asMObject()).array()),
+    om2.MFnData.kIntArray: _valueGetter(attrtypes.kMFnDataIntArray,
+                                        lambda plug: om2.MFnIntArrayData(plug.asMObject()).array()),
+    om2.MFnData.kPointArray: _valueGetter(attrtypes.kMFnDataPointArray,
+                                          lambda plug: om2.MFnPointArrayData(plug.asMObject()).array()),
+    om2.MFnData.kVectorArray: _valueGetter(attrtypes.kMFnDataVectorArray,
+                                           lambda plug: om2.MFnVectorArrayData(plug.asMObject()).array()),
+    om2.MFnData.kStringArray: _valueGetter(attrtypes.kMFnDataStringArray,
+                                           lambda plug: om2.MFnStringArrayData(plug.asMObject()).array()),
+    om2.MFnData.kMatrixArray: _valueGetter(attrtypes.kMFnDataMatrixArray,
+                                           lambda plug: om2.MFnMatrixArrayData(plug.asMObject()).array()),
+}
+_NUMERIC_COMPOUND_TYPES = (om2.MFnNumericData.k2Double, om2.MFnNumericData.k2Float, om2.MFnNumericData.k2Int,
+                           om2.MFnNumericData.k2Long, om2.MFnNumericData.k2Short, om2.MFnNumericData.k3Double,
+                           om2.MFnNumericData.k3Float, om2.MFnNumericData.k3Int, om2.MFnNumericData.k3Long,
+                           om2.MFnNumericData.k3Short, om2.MFnNumericData.k4Double)
+
+
+def _getNone(plug):
+    return None, None
 
-    :param plug: MPlug
-    :return: the dataType of the given plug. Will return standard python types where necessary eg. float else maya type
-    :rtype: tuple(int, plugValue)
-    """
-    obj = plug.attribute()
 
-    if plug.isArray:
-        count = plug.evaluateNumElements()
+def _getCompound(plug):
+    if plug.isCompound:
+        count = plug.numChildren()
         res = [None] * count, [None] * count
-        data = [getPlugAndType(plug.elementByPhysicalIndex(i)) for i in xrange(count)]
+        data = [getPlugAndType(plug.child(i)) for i in xrange(count)]
         for i in xrange(len(data)):
             res[0][i] = data[i][0]
             res[1][i] = data[i][1]
         return res
+    return None, None
 
-    if obj.hasFn(om2.MFn.kNumericAttribute):
-        return getNumericValue(plug)
 
+def _setNothing(plug, value):
+    pass
+
+
+def _setNumericData(plug, value):
+    data = om2.MFnNumericData().create(value)
+    plug.setMObject(data.object())
+
+
+def _setMatrix(plug, value):
+    mat = om2.MFnMatrixData().create(om2.MMatrix(value))
+    plug.setMObject(mat)
+
+
+def _setMessage(plug, value):
+    if not isinstance(value, om2.MPlug):
+        _setUnsupported(plug, value)
+    # connect the message attribute
+    connectPlugs(plug, value)
+
+
+def _setUnsupported(plug, value):
+    raise ValueError(
+        "Currently we don't support dataType ->{} contact the developers to get this implemented".format(
+            plug.attribute().apiTypeStr))
+
+
+_NUMERIC_SETTERS = {
+    om2.MFnNumericData.kDouble: om2.MPlug.setDouble,
+    om2.MFnNumericData.kFloat: om2.MPlug.setFloat,
+    om2.MFnNumericData.kBoolean: om2.MPlug.setBool,
+    om2.MFnNumericData.kChar: om2.MPlug.setChar,
+    om2.MFnNumericData.kInt: om2.MPlug.setInt,
+    om2.MFnNumericData.kInt64: om2.MPlug.setInt,
+    om2.MFnNumericData.kLong: om2.MPlug.setInt,
+    om2.MFnNumericData.kLast: om2.MPlug.setInt,
+    om2.MFnNumericData.kShort: om2.MPlug.setInt,
+}
+_UNIT_GETTERS = {
+    om2.MFnUnitAttribute.kDistance: _valueGetter(attrtypes.kMFnUnitAttributeDistance, om2.MPlug.asMDistance),
+    om2.MFnUnitAttribute.kAngle: _valueGetter(attrtypes.kMFnUnitAttributeAngle, om2.MPlug.asMAngle),
+    om2.MFnUnitAttribute.kTime: _valueGetter(attrtypes.kMFnUnitAttributeTime, om2.MPlug.asMTime),
+}
+_UNIT_SETTERS = {
+    om2.MFnUnitAttribute.kDistance: lambda plug, value: plug.setMDistance(om2.MDistance(value)),
+    om2.MFnUnitAttribute.kTime: lambda plug, value: plug.setMTime(om2.MTime(value)),
+    om2.MFnUnitAttribute.kAngle: lambda plug, value: plug.setMAngle(om2.MAngle(value)),
+}
+
+
+def resolvePlugTypeInfo(plug):
+    """Resolves the attribute type, getter and setter of a non array plug. This does the full attribute type
+    dispatch so use :func:`plugTypeInfo` instead which caches the result.
+
+    The getter has the same behaviour as :func:`getPlugAndType` and the setter the same as :func:`setPlugValue`
+    for a single non compound plug.
+
+    :type plug: om2.MPlug
+    :rtype: :class:`PlugTypeInfo`
+    """
+    obj = plug.attribute()
+    getter = _getCompound
+    setter = _setUnsupported
+    if obj.hasFn(om2.MFn.kNumericAttribute):
+        numericType = om2.MFnNumericAttribute(obj).numericType()
+        getter = _NUMERIC_GETTERS.get(numericType, _getNone)
+        if numericType in _NUMERIC_COMPOUND_TYPES:
+            setter = _setNumericData
+        else:
+            setter = _NUMERIC_SETTERS.get(numericType, _setNothing)
     elif obj.hasFn(om2.MFn.kUnitAttribute):
-        uAttr = om2.MFnUnitAttribute(obj)
-        ut = uAttr.unitType()
-        if ut == om2.MFnUnitAttribute.kDistance:
-            return attrtypes.kMFnUnitAttributeDistance, plug.asMDistance()
-        elif ut == om2.MFnUnitAttribute.kAngle:
-            return attrtypes.kMFnUnitAttributeAngle, plug.asMAngle()
-        elif ut == om2.MFnUnitAttribute.kTime:
-            return attrtypes.kMFnUnitAttributeTime, plug.asMTime()
+        unitType = om2.MFnUnitAttribute(obj).unitType()
+        getter = _UNIT_GETTERS.get(unitType, _getCompound)
+        setter = _UNIT_SETTERS.get(unitType, _setNothing)
     elif obj.hasFn(om2.MFn.kEnumAttribute):
-        return attrtypes.kMFnkEnumAttribute, plug.asInt()
+        getter = _valueGetter(attrtypes.kMFnkEnumAttribute, om2.MPlug.asInt)
+        setter = om2.MPlug.setInt
     elif obj.hasFn(om2.MFn.kTypedAttribute):
-        return getTypedValue(plug)
+        dataType = om2.MFnTypedAttribute(obj).attrType()
+        getter = _TYPED_GETTERS.get(dataType, _getNone)
+        if dataType == om2.MFnData.kMatrix:
+            setter = _setMatrix
+        elif dataType == om2.MFnData.kString:
+            setter = om2.MPlug.setString
+        else:
+            setter = _setNothing
     elif obj.hasFn(om2.MFn.kMessageAttribute):
-        return attrtypes.kMFnMessageAttribute, None
-
+        getter = _valueGetter(attrtypes.kMFnMessageAttribute, lambda plug: None)
+        setter = _setMessage
     elif obj.hasFn(om2.MFn.kMatrixAttribute):
-        return attrtypes.kMFnDataMatrix, om2.MFnMatrixData(plug.asMObject()).matrix()
+        getter = _valueGetter(attrtypes.kMFnDataMatrix, lambda plug: om2.MFnMatrixData(plug.asMObject()).matrix())
+        setter = _setMatrix
+    return PlugTypeInfo(_resolvePlugType(plug), getter, setter)
 
-    if plug.isCompound:
-        count = plug.numChildren()
+
+class PlugTypeCache(object):
+    """Caches the resolved :class:`PlugTypeInfo` per attribute so the attribute type dispatch only happens once.
+
+    Entries are keyed by the attribute MObjectHandle hashCode, static attributes such as transform.translate share
+    the same attribute MObject across every node of that type so they get a single entry per node type, while each
+    dynamic attribute gets its own entry. Entries whose attribute is no longer alive, or which belong to another
+    attribute with the same hashCode, are resolved again.
+
+    .. code-block:: python
+
+        cache = plugs.typeCache()
+        info = cache.info(plug)
+        attrType, value = info.getter(plug)
+        cache.stats()
+        # {"hits": 10, "misses": 1, "size": 1, "hitRate": 0.909}
+
+    """
+
+    def __init__(self):
+        # {hashCode: (om2.MObjectHandle, PlugTypeInfo)}
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def info(self, plug):
+        """Returns the cached type info for the plug's attribute, resolving it on a miss.
+
+        :type plug: om2.MPlug
+        :rtype: :class:`PlugTypeInfo`
+        """
+        attr = plug.attribute()
+        handle = om2.MObjectHandle(attr)
+        key = handle.hashCode()
+        entry = self._entries.get(key)
+        # hashCode isn't guaranteed to be unique so make sure the entry is for this attribute
+        if entry is not None and entry[0].isAlive() and entry[0].object() == attr:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        info = resolvePlugTypeInfo(plug)
+        self._entries[key] = (handle, info)
+        return info
+
+    def invalidate(self, attribute=None):
+        """Removes the attribute from the cache, if attribute is None then the whole cache and the stats are cleared.
+
+        :param attribute: The attribute MObject or a plug of the attribute to remove
+        :type attribute: om2.MObject or om2.MPlug or None
+        """
+        if attribute is None:
+            self._entries = {}
+            self.hits = 0
+            self.misses = 0
+            return
+        if isinstance(attribute, om2.MPlug):
+            attribute = attribute.attribute()
+        self._entries.pop(om2.MObjectHandle(attribute).hashCode(), None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Returns the cache statistics.
+
+        :rtype: dict
+        """
+        total = self.hits + self.misses
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "hitRate": float(self.hits) / total if total else 0.0}
+
+
+_TYPE_CACHE = PlugTypeCache()
+
+
+def typeCache():
+    """Returns the global :class:`PlugTypeCache` used by getPlugAndType, setPlugValue and plugType.
+
+    :rtype: :class:`PlugTypeCache`
+    """
+    return _TYPE_CACHE
+
+
+def plugTypeInfo(plug):
+    """Returns the cached attribute type, getter and setter for the plug.
+
+    :type plug: om2.MPlug
+    :rtype: :class:`PlugTypeInfo`
+    """
+    return _TYPE_CACHE.info(plug)
+
+
+def getPlugValue(plug):
+    return getPlugAndType(plug)[1]
+
+
+def getPlugAndType(plug):
+    """Given an MPlug, get its value
+
+    :param plug: MPlug
+    :return: the dataType of the given plug. Will return standard python types where necessary eg. float else maya type
+    :rtype: tuple(int, plugValue)
+    """
+    if plug.isArray:
+        count = plug.evaluateNumElements()
         res = [None] * count, [None] * count
-        data = [getPlugAndType(plug.child(i)) for i in xrange(count)]
+        data = [getPlugAndType(plug.elementByPhysicalIndex(i)) for i in xrange(count)]
         for i in xrange(len(data)):
             res[0][i] = data[i][0]
             res[1][i] = data[i][1]
         return res
-
-    return None, None
+    return _TYPE_CACHE.info(plug).getter(plug)
 
 
 def getNumericValue(plug):
@@ -876,16 +1119,16 @@ def setPlugInfoFromDict(plug, **kwargs):
             default = om2.MFnStringData().create(default)
         elif Type == attrtypes.kMFnDataMatrix:
             default = om2.MMatrix(default)
-            value = om2.MMatrix(value)
+            value = om2.MMatrix(value) if value is not None else None
         elif Type == attrtypes.kMFnUnitAttributeAngle:
             default = om2.MAngle(default, om2.MAngle.kRadians)
-            value = om2.MAngle(value, om2.MAngle.kRadians)
+            value = om2.MAngle(value, om2.MAngle.kRadians) if value is not None else None
         elif Type == attrtypes.kMFnUnitAttributeDistance:
             default = om2.MDistance(default)
-            value = om2.MDistance(value)
+            value = om2.MDistance(value) if value is not None else None
         elif Type == attrtypes.kMFnUnitAttributeTime:
             default = om2.MTime(default)
-            value = om2.MTime(value)
+            value = om2.MTime(value) if value is not None else None
         try:
             setPlugDefault(plug, default)
         except Exception:
@@ -930,61 +1173,7 @@ def setPlugValue(plug, value):
         for i in range(count):
             setPlugValue(plug.child(i), value[i])
         return
-    obj = plug.attribute()
-    if obj.hasFn(om2.MFn.kUnitAttribute):
-        attr = om2.MFnUnitAttribute(obj)
-        ut = attr.unitType()
-        if ut == om2.MFnUnitAttribute.kDistance:
-            plug.setMDistance(om2.MDistance(value))
-        elif ut == om2.MFnUnitAttribute.kTime:
-            plug.setMTime(om2.MTime(value))
-        elif ut == om2.MFnUnitAttribute.kAngle:
-            plug.setMAngle(om2.MAngle(value))
-    elif obj.hasFn(om2.MFn.kNumericAttribute):
-        attr = om2.MFnNumericAttribute(obj)
-        at = attr.numericType()
-        if at in (om2.MFnNumericData.k2Double, om2.MFnNumericData.k2Float, om2.MFnNumericData.k2Int,
-                  om2.MFnNumericData.k2Long, om2.MFnNumericData.k2Short, om2.MFnNumericData.k3Double,
-                  om2.MFnNumericData.k3Float, om2.MFnNumericData.k3Int, om2.MFnNumericData.k3Long,
-                  om2.MFnNumericData.k3Short, om2.MFnNumericData.k4Double):
-            data = om2.MFnNumericData().create(value)
-            plug.setMObject(data.object())
-        elif at == om2.MFnNumericData.kDouble:
-            plug.setDouble(value)
-        elif at == om2.MFnNumericData.kFloat:
-            plug.setFloat(value)
-        elif at == om2.MFnNumericData.kBoolean:
-            plug.setBool(value)
-        elif at == om2.MFnNumericData.kChar:
-            plug.setChar(value)
-        elif at in (om2.MFnNumericData.kInt, om2.MFnNumericData.kInt64, om2.MFnNumericData.kLong,
-                    om2.MFnNumericData.kLast):
-            plug.setInt(value)
-        elif at == om2.MFnNumericData.kShort:
-            plug.setInt(value)
-
-    elif obj.hasFn(om2.MFn.kEnumAttribute):
-        plug.setInt(value)
-
-    elif obj.hasFn(om2.MFn.kTypedAttribute):
-        attr = om2.MFnTypedAttribute(obj)
-        at = attr.attrType()
-        if at == om2.MFnData.kMatrix:
-            mat = om2.MFnMatrixData().create(om2.MMatrix(value))
-            plug.setMObject(mat)
-        elif at == om2.MFnData.kString:
-            plug.setString(value)
-
-    elif obj.hasFn(om2.MFn.kMatrixAttribute):
-        mat = om2.MFnMatrixData().create(om2.MMatrix(value))
-        plug.setMObject(mat)
-    elif obj.hasFn(om2.MFn.kMessageAttribute) and isinstance(value, om2.MPlug):
-        # connect the message attribute
-        connectPlugs(plug, value)
-    else:
-        raise ValueError(
-            "Currently we don't support dataType ->{} contact the developers to get this implemented".format(
-                obj.apiTypeStr))
+    _TYPE_CACHE.info(plug).setter(plug, value)
 
 
 def getPlugFn(obj):
@@ -1029,6 +1218,15 @@ def iterChildren(plug):
 
 
 def plugType(plug):
+    """Returns the attrtypes constant for the plug.
+
+    :type plug: om2.MPlug
+    :rtype: int or None
+    """
+    return _TYPE_CACHE.info(plug).attrType
+
+
+def _resolvePlugType(plug):
     obj = plug.attribute()
     if obj.hasFn(om2.MFn.kCompoundAttribute):
         return attrtypes.kMFnCompoundAttribute
@@ -1,9 +1,16 @@
-import contextlib
+import itertools
+import json
+import os
+import timeit
 from contextlib import contextmanager
 
+from maya import cmds
 from maya.api import OpenMaya as om2
-from zoo.libs.maya.api import nodes, plugs, curves
+from zoo.libs.maya.api import nodes, plugs, curves, plugbatch, generic
 from zoo.libs.maya.utils import mayamath
+from zoo.libs.utils import zlogging
+
+logger = zlogging.getLogger(__name__)
 
 
 def removeFromActiveSelection(node):
@@ -94,20 +101,16 @@ def iterDag(root, includeRoot=True, nodeType=None):
     :return: yields the mobject
     :rtype: Generator(mobject)
     """
-    stack = [om2.MFnDagNode(root)]
     if includeRoot:
-        yield stack[0].object()
-
-    while stack:
-        child = stack.pop(0)
-        children = child.childCount()
-        if children > 0:
-            for i in xrange(children):
-                subChild = child.child(i)
-                stack.append(om2.MFnDagNode(subChild))
-                if nodeType is not None and subChild.apiType() != nodeType:
-                    continue
-                yield subChild
+        yield root
+    if nodeType is None:
+        for node in nodes.iterHierarchy(root, order=generic.BREADTH_FIRST):
+            yield node
+        return
+    # MItDag filters like hasFn so check the exact type as well
+    for node in nodes.iterHierarchy(root, order=generic.BREADTH_FIRST, filterTypes=(nodeType,)):
+        if node.apiType() == nodeType:
+            yield node
 
 
 def worldPositionToScreen(camera, point, width, height):
@@ -127,20 +130,117 @@ def isPointInView(camera, point, width, height):
     return True
 
 
-def serializeNodes(graphNodes, skipAttributes=None, includeConnections=True):
-    rawData = {}
-    for n in graphNodes:
-        nData = nodes.serializeNode(n)
-        curveData = None
-        if n.mobject().hasFn(om2.MFn.kDagNode):
-            curveData = curves.serializeCurve(n, skipAttributes, includeConnections)
+def _serializeNodeRecord(node, skipAttributes, includeConnections):
+    nData = nodes.serializeNode(node, skipAttributes=skipAttributes, includeConnections=includeConnections)
+    if node.hasFn(om2.MFn.kDagNode):
+        curveData = curves.serializeCurve(node)
         if curveData:
             nData["shape"] = curveData
+    return nData
+
+
+def serializeNodes(graphNodes, skipAttributes=None, includeConnections=True):
+    rawData = {}
+    for nData in iterSerializeNodes(graphNodes, skipAttributes, includeConnections):
         rawData[nData["name"]] = nData
 
     return rawData
 
 
+def iterSerializeNodes(graphNodes, skipAttributes=None, includeConnections=True, offset=0):
+    """Generator function which serializes one node at a time, each record is the same as
+    :func:`nodes.serializeNode` plus the "shape" key for curves. Only the current node's data is held in memory.
+
+    :param graphNodes: The nodes to serialize, this can be a generator
+    :type graphNodes: iterable(om2.MObject)
+    :param skipAttributes: The attribute names to skip
+    :type skipAttributes: list or None
+    :param includeConnections: If True the destination connections of each node are serialized
+    :type includeConnections: bool
+    :param offset: The number of nodes to skip from the start, used to resume a previous export
+    :type offset: int
+    :rtype: Generator(dict)
+    """
+    for node in itertools.islice(graphNodes, offset, None):
+        yield _serializeNodeRecord(node, skipAttributes, includeConnections)
+
+
+def writeSerializedNodes(graphNodes, filePath, skipAttributes=None, includeConnections=True, offset=0):
+    """Serializes the nodes to a JSON Lines file, one node record per line. Each record is written as soon as it's
+    serialized, so memory stays bounded regardless of the node count.
+
+    To resume an interrupted export, pass the result of :func:`resumeOffset` as the offset along with the same
+    graphNodes. The new records are then appended to the file.
+
+    .. code-block:: python
+
+        offset = resumeOffset(filePath)
+        writeSerializedNodes(graphNodes, filePath, offset=offset)
+
+    :param graphNodes: The nodes to serialize in a stable order
+    :type graphNodes: iterable(om2.MObject)
+    :param filePath: The .jsonl file to write
+    :type filePath: str
+    :param skipAttributes: The attribute names to skip
+    :type skipAttributes: list or None
+    :param includeConnections: If True the destination connections of each node are serialized
+    :type includeConnections: bool
+    :param offset: The number of nodes to skip, if above 0 the file is appended to instead of overwritten
+    :type offset: int
+    :return: The total number of records in the file
+    :rtype: int
+    """
+    count = offset
+    with open(filePath, "a" if offset else "w") as f:
+        for nData in iterSerializeNodes(graphNodes, skipAttributes, includeConnections, offset):
+            f.write(json.dumps(nData))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def resumeOffset(filePath):
+    """Returns the number of complete records in a JSON Lines file written by :func:`writeSerializedNodes`.
+    A partially written last record, left by an interrupted export, is truncated so the file can be appended to.
+
+    :param filePath: The .jsonl file
+    :type filePath: str
+    :rtype: int
+    """
+    if not os.path.exists(filePath):
+        return 0
+    count = 0
+    end = 0
+    position = 0
+    with open(filePath, "rb") as f:
+        for line in f:
+            position += len(line)
+            if line.endswith(b"\n"):
+                count += 1
+                end = position
+    if end != position:
+        with open(filePath, "r+b") as f:
+            f.truncate(end)
+    return count
+
+
+def iterSerializedNodesFromFile(filePath, offset=0):
+    """Generator function which reads the node records from a JSON Lines file written by
+    :func:`writeSerializedNodes` one at a time. An incomplete last record is ignored.
+
+    :param filePath: The .jsonl file
+    :type filePath: str
+    :param offset: The number of records to skip
+    :type offset: int
+    :rtype: Generator(dict)
+    """
+    with open(filePath, "r") as f:
+        for line in itertools.islice(f, offset, None):
+            if not line.endswith("\n"):
+                return
+            yield json.loads(line)
+
+
 def serializeSelectedNodes(skipAttributes, includeConnections):
     selNodes = getSelectedNodes()
     if selNodes:
@@ -158,89 +258,238 @@ def deserializeNodes(data):
 
 
 class GraphDeserializer(dict):
+    """Recreates a graph of nodes serialized with :func:`serializeNodes`.
+
+    process runs as a pipeline of stages:
+
+    #. sort: topologically sorts the nodes so every parent comes before its children.
+    #. create: creates the dag nodes with a single MDagModifier and the dg nodes with a single MDGModifier.
+    #. attributes: adds the dynamic attributes, then sets every static plug value through one
+       :class:`plugbatch.PlugBatchWriter` before applying the plug settings ie. limits and lock state. Locked plugs
+       are unlocked around the writer and if the writer still fails each value is set on its own.
+    #. connections: resolves the plugs through a per node plug cache and connects them with one MDGModifier.
+
+    The time in seconds spent on each stage is stored in :attr:`timings`.
+
+    .. code-block:: python
+
+        deserializer = GraphDeserializer(serializeNodes(nodes))
+        createdNodes = deserializer.process({})
+        deserializer.timings
+        # {"sort": 0.001, "create": 0.2, "attributes": 0.4, "connections": 0.05}
+
+    """
 
     def __init__(self, data):
         super(GraphDeserializer, self).__init__(data)
         self.results = {}
+        self.timings = {}
+        # {(nodeHash, plugName): om2.MPlug}
+        self._plugCache = {}
 
     def process(self, nodeMap):
         """
-        :param nodeMap: {nodeName: om2.MObject}
+        :param nodeMap: {nodeName: om2.MObject}, nodes which already exist, these are skipped and can be used as \
+        parents or connection sources
         :type nodeMap: dict
-        :return:
-        :rtype:
+        :return: The created nodes
+        :rtype: list(om2.MObject)
         """
         self.results.update(nodeMap)
-        createdNodes = []
-        connections = []
-        for k, n in self.items():
-            # skip any currently processed nodes.
-
-            if k not in self.results:
-                parent = n.get("parent")
-                parentNode = None
-                # if we have a parentNode that means we're a Dag node, so try to resolve the parent,
-                if parent:
-                    parentNode = self.results.get(parent)
-                    # if we have come across the parent before it should already have been process so skip
-                    if parentNode is None and parent in self:
-                        # ok in this case we have visited the parent so process it
-                        parentData = self[parent]
-                        parentNode, attrs = nodes.deserializeNode(parentData,
-                                                                  self.results.get(self[parent]["parent"]))
-                        createdNodes.append(parentNode)
-                        self.results[parent] = parentNode
-                        connections.extend(parentData.get("connections", []))
-
-                newNode, attrs = nodes.deserializeNode(n, parentNode)
-                if not newNode:
-                    continue
-                createdNodes.append(newNode)
+        self.timings = {}
+        self._plugCache = {}
 
-                self.results[k] = newNode
-            else:
-                newNode = self.results[k]
-                if not newNode:
-                    continue
-            # remap the connection destination and destinationPlug to be the current node plus plug
-            currentConnections = n.get("connections", [])
-            for conn in currentConnections:
-                conn["destination"] = newNode
-                conn["destinationPlug"] = ".".join([nodes.nameFromMObject(newNode), conn["destinationPlug"]])
-            if not currentConnections:
+        startTime = timeit.default_timer()
+        order = self.sortedNames()
+        self.timings["sort"] = timeit.default_timer() - startTime
+
+        startTime = timeit.default_timer()
+        createdNodes = self._createNodes(order)
+        self.timings["create"] = timeit.default_timer() - startTime
+
+        startTime = timeit.default_timer()
+        self._applyAttributes(createdNodes)
+        self.timings["attributes"] = timeit.default_timer() - startTime
+
+        startTime = timeit.default_timer()
+        self._deserializeConnections([name for name in self if self.results.get(name) is not None])
+        self.timings["connections"] = timeit.default_timer() - startTime
+        return [node for _, node in createdNodes]
+
+    def sortedNames(self):
+        """Returns the node names which still need creating, sorted so that parents come before their children.
+
+        :rtype: list(str)
+        """
+        order = []
+        visited = set(self.results)
+        for name in self:
+            if name in visited:
+                continue
+            # walk up to the first parent which is already sorted or isn't part of this graph
+            chain = []
+            current = name
+            while current is not None and current in self and current not in visited:
+                visited.add(current)
+                chain.append(current)
+                current = self[current].get("parent")
+            order.extend(reversed(chain))
+        return order
+
+    def _resolveNode(self, name):
+        node = self.results.get(name)
+        if node is not None or not name:
+            return node
+        try:
+            node = nodes.asMObject(name)
+        except RuntimeError:
+            return None
+        self.results[name] = node
+        return node
+
+    def _createNodes(self, order):
+        dagMod = om2.MDagModifier()
+        dgMod = om2.MDGModifier()
+        createdNodes = []
+        for name in order:
+            data = self[name]
+            nodeType = data.get("type")
+            if nodeType is None or not self._loadRequirements(data):
                 continue
-            connections.extend(currentConnections)
-        if connections:
-            for conn in connections:
-                if conn["source"] in self.results:
-                    conn["source"] = self.results[conn["source"]]
-                source = conn["source"]
-                if isinstance(conn["source"], om2.MObject):
-                    source = nodes.nameFromMObject(conn["source"])
-                conn["sourcePlug"] = ".".join([source, conn["sourcePlug"]])
-            self._deserializeConnections(connections)
+            shortName = name.split("|")[-1]
+            try:
+                if "parent" in data:
+                    parent = self._resolveNode(data["parent"])
+                    if parent is None or parent.isNull() or parent.apiType() in (om2.MFn.kInvalid, om2.MFn.kWorld):
+                        parent = om2.MObject.kNullObj
+                    newNode = dagMod.createNode(nodeType, parent)
+                    dagMod.renameNode(newNode, shortName)
+                else:
+                    newNode = dgMod.createNode(nodeType)
+                    dgMod.renameNode(newNode, shortName)
+            except (RuntimeError, TypeError):
+                logger.error("Failed to create node: {}".format(name), exc_info=True)
+                continue
+            self.results[name] = newNode
+            createdNodes.append((name, newNode))
+        dgMod.doIt()
+        dagMod.doIt()
         return createdNodes
 
-    def _deserializeConnections(self, connections):
-        # plugList = om2.MSelectionList()
-        for conn in connections:
-            sourceNode = conn["source"]
-            destinationNode = conn["destination"]
-            if sourceNode is None or destinationNode is None:
-                continue
-            # connect the source and destination plug
+    def _loadRequirements(self, data):
+        req = data.get("requirements", "")
+        if req and not cmds.pluginInfo(req, loaded=True, query=True):
             try:
-                sourcePlug = plugs.asMPlug(conn["sourcePlug"])
-                destinationPlug = plugs.asMPlug(conn["destinationPlug"])
-                if destinationPlug.isDestination:
+                cmds.loadPlugin(req)
+            except RuntimeError:
+                logger.error("Could not load plugin->{}".format(req), exc_info=True)
+                return False
+        return True
+
+    def _findPlug(self, node, plugName):
+        key = (om2.MObjectHandle(node).hashCode(), plugName)
+        plug = self._plugCache.get(key)
+        if plug is not None:
+            return plug
+        try:
+            if "[" in plugName or "." in plugName:
+                sel = om2.MSelectionList()
+                sel.add(".".join((nodes.nameFromMObject(node), plugName)))
+                plug = sel.getPlug(0)
+            else:
+                plug = om2.MFnDependencyNode(node).findPlug(plugName, False)
+        except RuntimeError:
+            return None
+        self._plugCache[key] = plug
+        return plug
+
+    def _applyAttributes(self, createdNodes):
+        writer = plugbatch.PlugBatchWriter()
+        plugSettings = []
+        # [(plug, value)] everything added to the writer, used to set the values one by one if the writer fails
+        plugValues = []
+        for name, node in createdNodes:
+            for attrData in self[name].get("attributes", ()):
+                attrName = attrData["name"]
+                plug = self._findPlug(node, attrName)
+                if plug is not None:
+                    plugSettings.append((plug, _collectPlugValues(plug, attrData, writer, plugValues)))
                     continue
-                with contextlib.nested(plugs.setLockedContext(sourcePlug),
-                                       plugs.setLockedContext(destinationPlug)):
-                    plugs.connectPlugs(sourcePlug,
-                                       destinationPlug,
-                                       force=False)
+                children = attrData.get("children")
+                if children:
+                    nodes.addCompoundAttribute(node, attrName, attrName, attrMap=children, **attrData)
+                else:
+                    nodes.addAttribute(node, attrName, attrName, attrData["Type"], **attrData)
+        try:
+            writer.doIt()
+        except RuntimeError:
+            logger.warning("Failed to set plug values as a batch, setting them individually", exc_info=True)
+            _setPlugValues(plugValues)
+        for plug, attrData in plugSettings:
+            try:
+                plugs.setPlugInfoFromDict(plug, **attrData)
             except RuntimeError:
-                continue
+                logger.error("Failed to set plug data: {}".format(plug.name()), exc_info=True)
+
+    def _deserializeConnections(self, names):
+        mod = om2.MDGModifier()
+        lockedPlugs = []
+        for name in names:
+            destinationNode = self.results[name]
+            for conn in self[name].get("connections", ()):
+                sourceNode = self._resolveNode(conn["source"])
+                if sourceNode is None:
+                    continue
+                sourcePlug = self._findPlug(sourceNode, conn["sourcePlug"])
+                destinationPlug = self._findPlug(destinationNode, conn["destinationPlug"])
+                if sourcePlug is None or destinationPlug is None or destinationPlug.isDestination:
+                    continue
+                for plug in (sourcePlug, destinationPlug):
+                    if plug.isLocked:
+                        plug.isLocked = False
+                        lockedPlugs.append(plug)
+                mod.connect(sourcePlug, destinationPlug)
+        try:
+            mod.doIt()
+        except RuntimeError:
+            logger.error("Failed to connect plugs", exc_info=True)
+        finally:
+            for plug in lockedPlugs:
+                plug.isLocked = True
+
+
+def _collectPlugValues(plug, attrData, writer, plugValues):
+    """Adds the values from the serialized plug data to the writer and returns a copy of the data without them so
+    :func:`plugs.setPlugInfoFromDict` only applies the plug settings.
+    """
+    info = dict(attrData)
+    children = info.get("children")
+    if plug.isCompound and children:
+        childCount = plug.numChildren()
+        info["children"] = [_collectPlugValues(plug.child(i), childData, writer, plugValues)
+                            if childData and i < childCount else childData for i, childData in enumerate(children)]
+        return info
+    value = info.get("value")
+    if value is None or plug.isArray or plug.isCompound or plug.attribute().hasFn(om2.MFn.kMessageAttribute):
+        return info
+    try:
+        writer.add(plug, value, unlock=True)
+    except (TypeError, ValueError, RuntimeError):
+        logger.error("Invalid value for plug: {}".format(plug.name()), exc_info=True)
+        del info["value"]
+        return info
+    del info["value"]
+    plugValues.append((plug, value))
+    return info
+
+
+def _setPlugValues(plugValues):
+    for plug, value in plugValues:
+        try:
+            with plugs.setLockedContext(plug):
+                plugs.setPlugValue(plug, value)
+        except RuntimeError:
+            logger.error("Failed to set plug value: {}".format(plug.name()), exc_info=True)
 
 
 def aimNodes(targetNode, driven, aimVector=None,
@@ -0,0 +1,457 @@
+"""Chunked binary container for skin weights.
+
+Every shape is stored as its own set of blocks, the points plus the weights in the compressed sparse row layout of
+:class:`deformers.SparseWeights`, and the file header points to a json index of the blocks. Reading a shape only
+touches the index and that shape's blocks. The file is memory mapped, uncompressed blocks are copied out of the map
+and zlib compressed blocks are decompressed on access, so the returned arrays stay valid once the reader is closed.
+
+File layout(little endian)::
+
+    header  magic(4s) version(I) indexOffset(Q) indexSize(Q)
+    blocks  raw or zlib compressed array bytes, each block starts on an 8 byte boundary
+    index   utf-8 json {"version": int, "shapes": {shapeName: shapeEntry}}
+
+A shape entry stores the vertexCount, the influence names in column order, the skinCluster settings and for each of
+points, indptr, indices, values and the optional blendWeights the block offset, size, dtype, shape and compression.
+
+.. code-block:: python
+
+    skinfile.exportSkinWeights(shapes, "/tmp/character.zskin", dtype="float16", compression="zlib")
+    with skinfile.SkinWeightReader("/tmp/character.zskin") as reader:
+        weights = reader.weights("|body|bodyShape")
+    skinfile.importSkinWeights("/tmp/character.zskin", [bodyShape])
+
+"""
+import json
+import mmap
+import struct
+import zlib
+from collections import OrderedDict, deque
+
+import numpy as np
+from maya.api import OpenMaya as om2
+
+from zoo.libs.maya.api import deformers
+from zoo.libs.maya.api import generic
+from zoo.libs.maya.api import nodes
+from zoo.libs.utils import zlogging
+
+try:
+    from concurrent import futures
+except ImportError:
+    futures = None
+
+logger = zlogging.getLogger(__name__)
+
+MAGIC = b"ZSKW"
+VERSION = 1
+_HEADER = struct.Struct("<4sIQQ")
+_ALIGNMENT = 8
+
+COMPRESSION_NONE = None
+COMPRESSION_ZLIB = "zlib"
+
+
+def isSkinFile(filePath):
+    """Returns True if the file starts with the skin file magic.
+
+    :type filePath: str
+    :rtype: bool
+    """
+    with open(filePath, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def encodeBlock(array, dtype, compression=COMPRESSION_NONE, compressionLevel=6):
+    """Converts the array to little endian bytes of the dtype and compresses them.
+
+    :type array: np.ndarray
+    :param dtype: The stored dtype, ie. "float32"
+    :type dtype: str or np.dtype
+    :param compression: None or "zlib"
+    :type compression: str or None
+    :type compressionLevel: int
+    :return: The block description without the offset and the encoded bytes
+    :rtype: tuple(dict, bytes)
+    """
+    dtype = np.dtype(dtype).newbyteorder("<")
+    array = np.ascontiguousarray(array, dtype=dtype)
+    data = array.tobytes()
+    if compression == COMPRESSION_ZLIB:
+        data = zlib.compress(data, compressionLevel)
+    elif compression is not None:
+        raise ValueError("Unsupported compression: {}".format(compression))
+    return {"size": len(data), "dtype": dtype.str, "shape": list(array.shape), "compression": compression}, data
+
+
+def encodeShape(points, weights, influences, settings, dtype="float32", pointDtype="float64",
+                compression=COMPRESSION_NONE, compressionLevel=6, threshold=0.0, blendWeights=None):
+    """Encodes a single shape into blocks, this doesn't touch maya so it can run on any thread.
+
+    :param points: (vertexCount, 3) or (vertexCount, 4) world space points
+    :type points: np.ndarray
+    :param weights: (vertexCount, influenceCount) weights or the sparse form
+    :type weights: np.ndarray or :class:`deformers.SparseWeights`
+    :param influences: The influence names in column order
+    :type influences: list(str)
+    :param settings: The skinCluster settings, see :meth:`deformers.SkinCluster.serialize`
+    :type settings: dict
+    :param dtype: The dtype of the stored weights, float16 or float32 are the usual choices
+    :type dtype: str
+    :param pointDtype: The dtype of the stored points
+    :type pointDtype: str
+    :param compression: None or "zlib"
+    :type compression: str or None
+    :type compressionLevel: int
+    :param threshold: Weights less than or equal to this value aren't stored
+    :type threshold: float
+    :param blendWeights: The per vertex dual quaternion blend weights
+    :type blendWeights: np.ndarray or None
+    :return: The shape entry and the encoded blocks in write order
+    :rtype: tuple(dict, list(tuple(str, dict, bytes)))
+    """
+    if not isinstance(weights, deformers.SparseWeights):
+        weights = deformers.denseToSparse(weights, threshold)
+    indexType = "uint16" if len(influences) <= 0xFFFF else "uint32"
+    indptrType = "uint32" if weights.indptr[-1] <= 0xFFFFFFFF else "uint64"
+    arrays = (("points", np.asarray(points)[:, :3], pointDtype),
+              ("indptr", weights.indptr, indptrType),
+              ("indices", weights.indices, indexType),
+              ("values", weights.values, dtype))
+    if blendWeights is not None:
+        arrays += (("blendWeights", blendWeights, dtype),)
+    blocks = []
+    for name, array, arrayType in arrays:
+        block, data = encodeBlock(array, arrayType, compression, compressionLevel)
+        blocks.append((name, block, data))
+    entry = {"vertexCount": int(weights.shape[0]),
+             "influences": list(influences),
+             "settings": dict((k, v) for k, v in settings.items() if k not in ("weights", "blendWeights")),
+             "blocks": {}}
+    return entry, blocks
+
+
+class SkinWeightWriter(object):
+    """Writes shapes to a skin file one at a time, the index is written on :meth:`close`.
+
+    :param filePath: The file to write
+    :type filePath: str
+    :param dtype: The dtype of the stored weights
+    :type dtype: str
+    :param compression: None or "zlib"
+    :type compression: str or None
+    """
+
+    def __init__(self, filePath, dtype="float32", pointDtype="float64", compression=COMPRESSION_NONE,
+                 compressionLevel=6):
+        self.filePath = filePath
+        self.dtype = dtype
+        self.pointDtype = pointDtype
+        self.compression = compression
+        self.compressionLevel = compressionLevel
+        self._shapes = OrderedDict()
+        self._file = open(filePath, "wb")
+        self._file.write(_HEADER.pack(MAGIC, VERSION, 0, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def addShape(self, name, points, weights, influences, settings, blendWeights=None):
+        """Encodes and writes a single shape, see :func:`encodeShape` for the arguments.
+
+        :type name: str
+        """
+        entry, blocks = encodeShape(points, weights, influences, settings, self.dtype, self.pointDtype,
+                                    self.compression, self.compressionLevel, blendWeights=blendWeights)
+        self.writeEncoded(name, entry, blocks)
+
+    def writeEncoded(self, name, entry, blocks):
+        """Writes a shape which was already encoded with :func:`encodeShape`.
+
+        :type name: str
+        :type entry: dict
+        :type blocks: list(tuple(str, dict, bytes))
+        """
+        for blockName, block, data in blocks:
+            padding = -self._file.tell() % _ALIGNMENT
+            if padding:
+                self._file.write(b"\0" * padding)
+            block["offset"] = self._file.tell()
+            self._file.write(data)
+            entry["blocks"][blockName] = block
+        self._shapes[name] = entry
+
+    def close(self):
+        if self._file is None:
+            return
+        index = json.dumps({"version": VERSION, "shapes": self._shapes}).encode("utf-8")
+        indexOffset = self._file.tell()
+        self._file.write(index)
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(MAGIC, VERSION, indexOffset, len(index)))
+        self._file.close()
+        self._file = None
+
+
+class SkinWeightReader(object):
+    """Memory mapped random access to a skin file.
+
+    :param filePath: The file to read
+    :type filePath: str
+    :raises: ValueError if the file isn't a skin file
+    """
+
+    def __init__(self, filePath):
+        self.filePath = filePath
+        self._file = open(filePath, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, indexOffset, indexSize = _HEADER.unpack(self._map[:_HEADER.size])
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("Not a skin weight file: {}".format(filePath))
+        self.version = version
+        self._shapes = json.loads(self._map[indexOffset:indexOffset + indexSize].decode("utf-8"),
+                                  object_pairs_hook=OrderedDict)["shapes"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __contains__(self, name):
+        return name in self._shapes
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+    def shapeNames(self):
+        return list(self._shapes.keys())
+
+    def shapeInfo(self, name):
+        """Returns the index entry for the shape.
+
+        :type name: str
+        :rtype: dict
+        """
+        return self._shapes[name]
+
+    def _block(self, name, blockName):
+        block = self._shapes[name]["blocks"][blockName]
+        dtype = np.dtype(str(block["dtype"]))
+        offset, size = block["offset"], block["size"]
+        if block["compression"] == COMPRESSION_ZLIB:
+            array = np.frombuffer(zlib.decompress(self._map[offset:offset + size]), dtype=dtype)
+        else:
+            # copy out of the map so the returned arrays don't hold exported pointers that stop close()
+            array = np.frombuffer(self._map, dtype=dtype, count=size // dtype.itemsize, offset=offset).copy()
+        return array.reshape(block["shape"])
+
+    def points(self, name):
+        """Returns the (vertexCount, 3) world space points, only this shape's block is read from the file.
+
+        :type name: str
+        :rtype: np.ndarray
+        """
+        return self._block(name, "points")
+
+    def sparseWeights(self, name):
+        """Returns the weights in the sparse form, the values keep their stored dtype.
+
+        :type name: str
+        :rtype: :class:`deformers.SparseWeights`
+        """
+        entry = self._shapes[name]
+        return deformers.SparseWeights(self._block(name, "indptr"),
+                                       self._block(name, "indices"),
+                                       self._block(name, "values"),
+                                       (entry["vertexCount"], len(entry["influences"])))
+
+    def weights(self, name):
+        """Returns the (vertexCount, influenceCount) float64 weights.
+
+        :type name: str
+        :rtype: np.ndarray
+        """
+        return deformers.sparseToDense(self.sparseWeights(name)).astype(np.float64)
+
+    def shapeData(self, name):
+        """Returns the shape in the format of :func:`deformers.serializeSkinWeightsFromShapes` with numpy arrays
+        instead of lists, which can be passed straight to :func:`deformers.applyWeightsFromData`.
+
+        :type name: str
+        :rtype: dict
+        """
+        entry = self._shapes[name]
+        weights = self.weights(name)
+        settings = dict(entry["settings"])
+        settings["weights"] = dict((influence, weights[:, i]) for i, influence in enumerate(entry["influences"]))
+        if "blendWeights" in entry["blocks"]:
+            settings["blendWeights"] = self._block(name, "blendWeights").astype(np.float64)
+        return {"points": np.array(self.points(name), dtype=np.float64), "skinData": [settings]}
+
+
+def shapeName(shape):
+    """Returns the name a shape is stored under, the full path without namespaces.
+
+    :type shape: om2.MObject
+    :rtype: str
+    """
+    return generic.stripNamespaceFromName(nodes.nameFromMObject(shape))
+
+
+def readShape(shape):
+    """Reads the raw skin data of a shape from maya, this must run on the main thread.
+
+    :param shape: The mesh shape
+    :type shape: om2.MObject
+    :return: The points, weights, influence names, skinCluster settings and blend weights or None if the shape \
+    isn't skinned
+    :rtype: tuple(np.ndarray, np.ndarray, list(str), dict, np.ndarray) or None
+    """
+    clusters = deformers.clusterUpstreamFromNode(shape)
+    if not clusters:
+        return None
+    if len(clusters) > 1:
+        logger.warning("Only the first skinCluster is exported for: {}".format(shapeName(shape)))
+    skin = deformers.SkinCluster(clusters[0])
+    points = np.array(om2.MFnMesh(om2.MFnDagNode(shape).getPath()).getPoints(om2.MSpace.kWorld), dtype=np.float64)
+    blendWeights = np.array(skin.mfn.getBlendWeights(skin.shapeNode, skin.component), dtype=np.float64)
+    return points, skin.weightsArray(), skin.influenceNames(), skin.serialize(includeWeights=False), blendWeights
+
+
+def exportSkinWeights(shapes, filePath, dtype="float32", compression=COMPRESSION_NONE, compressionLevel=6,
+                      progressCallback=None):
+    """Writes the skin weights of the shapes to a skin file, shapes without a skinCluster are skipped.
+
+    :param shapes: The mesh shapes
+    :type shapes: iterable(om2.MObject)
+    :param filePath: The file to write
+    :type filePath: str
+    :param dtype: The dtype of the stored weights
+    :type dtype: str
+    :param compression: None or "zlib"
+    :type compression: str or None
+    :param progressCallback: Called with (completedCount, shapeCount, shapeName) after each shape
+    :type progressCallback: callable or None
+    :return: The names of the written shapes
+    :rtype: list(str)
+    """
+    shapes = list(shapes)
+    written = []
+    with SkinWeightWriter(filePath, dtype=dtype, compression=compression,
+                          compressionLevel=compressionLevel) as writer:
+        for index, shape in enumerate(shapes):
+            shapeData = readShape(shape)
+            name = shapeName(shape)
+            if shapeData is not None:
+                writer.addShape(name, *shapeData)
+                written.append(name)
+            if progressCallback is not None:
+                progressCallback(index + 1, len(shapes), name)
+    return written
+
+
+def exportSkinWeightsPipelined(shapes, filePath, dtype="float32", compression=COMPRESSION_NONE, compressionLevel=6,
+                               workers=4, maxPending=None, progressCallback=None):
+    """Same as :func:`exportSkinWeights` but the encoding and file writes overlap with reading the next shape.
+
+    The maya reads stay on the calling thread, a thread pool runs :func:`encodeShape` and a single writer thread
+    writes the encoded shapes in the order they were read, so the output is identical to :func:`exportSkinWeights`.
+    zlib and file io release the GIL so the overlap is largest with compression enabled. Falls back to
+    :func:`exportSkinWeights` when concurrent.futures isn't available.
+
+    :param shapes: The mesh shapes
+    :type shapes: iterable(om2.MObject)
+    :param filePath: The file to write
+    :type filePath: str
+    :param dtype: The dtype of the stored weights
+    :type dtype: str
+    :param compression: None or "zlib"
+    :type compression: str or None
+    :param workers: The number of encoding threads
+    :type workers: int
+    :param maxPending: The max shapes held in memory waiting to be written, defaults to twice the workers
+    :type maxPending: int or None
+    :param progressCallback: Called on the calling thread with (completedCount, shapeCount, shapeName) once a \
+    shape is written or skipped
+    :type progressCallback: callable or None
+    :return: The names of the written shapes
+    :rtype: list(str)
+    """
+    if futures is None:
+        logger.debug("concurrent.futures isn't available, exporting serially")
+        return exportSkinWeights(shapes, filePath, dtype, compression, compressionLevel, progressCallback)
+    shapes = list(shapes)
+    maxPending = maxPending or workers * 2
+    written = []
+    completed = [0]
+    pending = deque()
+    writer = SkinWeightWriter(filePath, dtype=dtype, compression=compression, compressionLevel=compressionLevel)
+
+    def _write(name, encoded):
+        entry, blocks = encoded.result()
+        writer.writeEncoded(name, entry, blocks)
+
+    def _complete(name, result=None):
+        if result is not None:
+            result.result()
+            written.append(name)
+        completed[0] += 1
+        if progressCallback is not None:
+            progressCallback(completed[0], len(shapes), name)
+
+    encodePool = futures.ThreadPoolExecutor(max_workers=workers)
+    writePool = futures.ThreadPoolExecutor(max_workers=1)
+    try:
+        for shape in shapes:
+            shapeData = readShape(shape)
+            name = shapeName(shape)
+            if shapeData is None:
+                pending.append((name, None))
+            else:
+                points, weights, influences, settings, blendWeights = shapeData
+                encoded = encodePool.submit(encodeShape, points, weights, influences, settings, dtype,
+                                            writer.pointDtype, compression, compressionLevel,
+                                            blendWeights=blendWeights)
+                pending.append((name, writePool.submit(_write, name, encoded)))
+            # report whatever has finished and block on the oldest shape once too many are in flight
+            while pending and (len(pending) > maxPending or pending[0][1] is None or pending[0][1].done()):
+                _complete(*pending.popleft())
+        while pending:
+            _complete(*pending.popleft())
+    finally:
+        encodePool.shutdown(wait=True)
+        writePool.shutdown(wait=True)
+        writer.close()
+    return written
+
+
+def importSkinWeights(filePath, shapes):
+    """Applies the stored weights to the shapes by name, only the blocks of the given shapes are read.
+
+    :param filePath: The skin file
+    :type filePath: str
+    :param shapes: The mesh shapes
+    :type shapes: iterable(om2.MObject)
+    :return: The skinCluster of each shape which was in the file
+    :rtype: list(:class:`deformers.SkinCluster`)
+    """
+    clusters = []
+    with SkinWeightReader(filePath) as reader:
+        for shape in shapes:
+            path = om2.MDagPath.getAPathTo(shape)
+            name = generic.stripNamespaceFromName(path.fullPathName())
+            if name not in reader:
+                logger.warning("Skipping: {} since it doesn't exist in the skin file".format(name))
+                continue
+            skin = deformers.applyWeightsFromData(reader.shapeData(name), path)
+            if skin is not None:
+                clusters.append(skin)
+    return clusters
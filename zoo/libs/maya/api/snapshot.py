@@ -0,0 +1,203 @@
+"""Hierarchy snapshots for detecting what changed in the scene between two points in a session.
+
+A snapshot stores a small record per node, keyed by the node UUID so renames and reparents are tracked. The
+record holds the name, parent, type, a hash per serialized attribute and one hash for the incoming connections,
+which refer to the source nodes by UUID.
+Nodes are serialized and hashed one at a time with :func:`nodes.serializeNode`, so only the hashes are kept.
+
+.. code-block:: python
+
+    before = snapshot.snapshotHierarchy([rigRoot])
+    # ... user edits
+    after = snapshot.snapshotHierarchy([rigRoot])
+    diff = snapshot.diffSnapshots(before, after)
+    for uuid in diff.changed:
+        print(after[uuid].name, diff.changed[uuid])
+
+"""
+import collections
+import hashlib
+import json
+
+from maya.api import OpenMaya as om2
+from zoo.libs.maya.api import nodes
+from zoo.libs.maya.api import scene
+
+NodeRecord = collections.namedtuple("NodeRecord", ["uuid", "name", "parent", "type", "attributes", "connections"])
+
+
+def valueHash(value):
+    """Returns a stable 64 bit hash of a json serializable value.
+
+    :type value: any
+    :rtype: int
+    """
+    data = json.dumps(value, sort_keys=True, default=repr)
+    return int(hashlib.md5(data.encode("utf-8")).hexdigest()[:16], 16)
+
+
+def nodeUuid(node):
+    """Returns the node UUID as a string.
+
+    :type node: om2.MObject
+    :rtype: str
+    """
+    return om2.MFnDependencyNode(node).uuid().asString()
+
+
+class HierarchySnapshot(object):
+    """Holds one :class:`NodeRecord` per node keyed by UUID.
+
+    :param skipAttributes: Attribute names to exclude from the hashes, passed on to :func:`nodes.serializeNode`
+    :type skipAttributes: seq(str) or None
+    """
+
+    def __init__(self, skipAttributes=None):
+        self.skipAttributes = skipAttributes
+        self._records = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, uuid):
+        return uuid in self._records
+
+    def __getitem__(self, uuid):
+        return self._records[uuid]
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def uuids(self):
+        return list(self._records.keys())
+
+    def add(self, node):
+        """Serializes and hashes the node then adds its record to the snapshot.
+
+        :type node: om2.MObject
+        :rtype: :class:`NodeRecord`
+        """
+        data = nodes.serializeNode(node, skipAttributes=self.skipAttributes, includeConnections=False)
+        parent = ""
+        if node.hasFn(om2.MFn.kDagNode):
+            parentObj = om2.MFnDagNode(node).parent(0)
+            if not parentObj.hasFn(om2.MFn.kWorld):
+                parent = nodeUuid(parentObj)
+        attributes = dict((attrData["name"], valueHash(attrData)) for attrData in data.get("attributes", ()))
+        # the source node is identified by its UUID so renaming or reparenting it doesn't change the hash
+        connections = sorted((destination.partialName(includeNonMandatoryIndices=True, useLongNames=True),
+                              nodeUuid(source.node()),
+                              source.partialName(includeNonMandatoryIndices=True, useLongNames=True))
+                             for destination, source in nodes.iterConnections(node, source=False, destination=True))
+        record = NodeRecord(uuid=nodeUuid(node),
+                            name=data["name"],
+                            parent=parent,
+                            type=data["type"],
+                            attributes=attributes,
+                            connections=valueHash(connections) if connections else 0)
+        self._records[record.uuid] = record
+        return record
+
+
+def snapshotHierarchy(roots, skipAttributes=None, includeRoots=True):
+    """Takes a snapshot of every dag node under the roots.
+
+    :param roots: The root dag nodes
+    :type roots: seq(om2.MObject)
+    :param skipAttributes: Attribute names to exclude from the hashes
+    :type skipAttributes: seq(str) or None
+    :param includeRoots: If True the roots are part of the snapshot
+    :type includeRoots: bool
+    :rtype: :class:`HierarchySnapshot`
+    """
+    snap = HierarchySnapshot(skipAttributes)
+    for root in roots:
+        for node in scene.iterDag(root, includeRoot=includeRoots):
+            snap.add(node)
+    return snap
+
+
+def snapshotNodes(graphNodes, skipAttributes=None):
+    """Takes a snapshot of the given nodes, these can be dg or dag nodes.
+
+    :type graphNodes: iterable(om2.MObject)
+    :param skipAttributes: Attribute names to exclude from the hashes
+    :type skipAttributes: seq(str) or None
+    :rtype: :class:`HierarchySnapshot`
+    """
+    snap = HierarchySnapshot(skipAttributes)
+    for node in graphNodes:
+        snap.add(node)
+    return snap
+
+
+class SnapshotDiff(object):
+    """The structural difference between two snapshots, every container is keyed by UUID.
+
+    :ivar added: The nodes which only exist in the new snapshot
+    :ivar removed: The nodes which only exist in the old snapshot
+    :ivar renamed: {uuid: (oldName, newName)} for nodes whose name changed without a parent change
+    :ivar reparented: {uuid: (oldParentUuid, newParentUuid)}
+    :ivar changed: {uuid: set(attributeName)} for attributes which were added, removed or changed value
+    :ivar connectionsChanged: The nodes whose incoming connections changed
+    :ivar typeChanged: The nodes whose type changed, ie. a node was deleted and the uuid reused
+    """
+
+    def __init__(self):
+        self.added = set()
+        self.removed = set()
+        self.renamed = {}
+        self.reparented = {}
+        self.changed = {}
+        self.connectionsChanged = set()
+        self.typeChanged = set()
+
+    def isEmpty(self):
+        return not (self.added or self.removed or self.renamed or self.reparented or self.changed or
+                    self.connectionsChanged or self.typeChanged)
+
+    def touched(self):
+        """Returns every UUID which was added or changed in any way, ie. the nodes which need reprocessing.
+
+        :rtype: set(str)
+        """
+        result = set(self.added)
+        result.update(self.renamed, self.reparented, self.changed, self.connectionsChanged, self.typeChanged)
+        return result
+
+    def __repr__(self):
+        return "<{} added={} removed={} renamed={} reparented={} changed={} connections={}>".format(
+            self.__class__.__name__, len(self.added), len(self.removed), len(self.renamed), len(self.reparented),
+            len(self.changed), len(self.connectionsChanged))
+
+
+def diffSnapshots(before, after):
+    """Compares two snapshots.
+
+    :param before: The older snapshot
+    :type before: :class:`HierarchySnapshot`
+    :param after: The newer snapshot
+    :type after: :class:`HierarchySnapshot`
+    :rtype: :class:`SnapshotDiff`
+    """
+    diff = SnapshotDiff()
+    for new in after:
+        if new.uuid not in before:
+            diff.added.add(new.uuid)
+            continue
+        old = before[new.uuid]
+        if old.type != new.type:
+            diff.typeChanged.add(new.uuid)
+            continue
+        if old.parent != new.parent:
+            diff.reparented[new.uuid] = (old.parent, new.parent)
+        elif old.name != new.name and old.name.split("|")[-1] != new.name.split("|")[-1]:
+            diff.renamed[new.uuid] = (old.name, new.name)
+        if old.attributes != new.attributes:
+            changed = set(name for name, value in new.attributes.items() if old.attributes.get(name) != value)
+            changed.update(name for name in old.attributes if name not in new.attributes)
+            diff.changed[new.uuid] = changed
+        if old.connections != new.connections:
+            diff.connectionsChanged.add(new.uuid)
+    diff.removed = set(uuid for uuid in before.uuids() if uuid not in after)
+    return diff
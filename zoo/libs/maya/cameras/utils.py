@@ -2,9 +2,14 @@ import contextlib
 
 from maya import cmds
 from maya.api import OpenMaya as om2
+from maya.api import OpenMayaAnim as om2Anim
 from maya.api import OpenMayaUI as om2ui
+from zoo.libs.maya.api import anim
 from zoo.libs.maya.api import nodes
 from zoo.libs.maya.meta import metacamera
+from zoo.libs.utils import zlogging
+
+logger = zlogging.getLogger(__name__)
 
 
 def createCamera(name, start, end, focalLength=35.000,
@@ -51,19 +56,77 @@ def bakeCameraMeatAnimToClone(camMeta):
     :return: The new Baked camera if the keys were baked. otherwise None
     :rtype: MetaCamera or None
     """
-    # temp rename so that the the baked camera has the original name
-    camMeta.rename("_".join([camMeta.shotName.asString(), "ORIG"]))
-    bakedCam = createCamera(camMeta.shotName.asString(), camMeta.startFrame.asInt(), camMeta.endFrame.asInt())
-    bakedCam.copyFrom(camMeta)
-
-    result = cmds.copyKey(camMeta.fullPathName())
-    if result == 0:
-        bakedCam.delete()
-        camMeta.rename(camMeta.shotName.asString())
-        return
-    padding = bakedCam.framePadding.asInt()
-    targetName = bakedCam.fullPathName()
-    cmds.pasteKey(targetName, option="replace")
-    cmds.bakeResults(targetName, t=((bakedCam.startFrame.asInt() - padding), (bakedCam.endFrame.asInt() + padding)),
-                     sb=1)
-    return bakedCam
+    return bakeMetaCameras([camMeta])[0]
+
+
+def _animatedPlugPairs(camMeta, bakedCam):
+    """Returns (sourcePlug, destinationPlug) for every animated plug on the camera transform and shape.
+    """
+    pairs = []
+    sourceShape, destinationShape = camMeta.camMfn.object(), bakedCam.camMfn.object()
+    for source, destination in ((om2.MFnDagNode(sourceShape).parent(0), om2.MFnDagNode(destinationShape).parent(0)),
+                                (sourceShape, destinationShape)):
+        destinationFn = om2.MFnDependencyNode(destination)
+        for plug in om2Anim.MAnimUtil.findAnimatedPlugs(source):
+            name = plug.partialName(useLongNames=True)
+            try:
+                destinationPlug = destinationFn.findPlug(name, False)
+            except RuntimeError:
+                continue
+            if destinationPlug.isLocked:
+                logger.warning("Skipping locked plug: {}".format(destinationPlug.name()))
+                continue
+            pairs.append((plug, destinationPlug))
+    return pairs
+
+
+def bakeMetaCameras(cameras, skipStatic=True, tolerance=0.0, modifier=None, change=None):
+    """Bakes the animation of many meta cameras onto clones, see :func:`bakeCameraMeatAnimToClone`.
+
+    Instead of copying the keys and running cmds.bakeResults per camera, every animated channel of every camera is
+    sampled in a single context evaluated pass over the combined frame range without changing the current time, then
+    each channel is keyed with one MFnAnimCurve.addKeys call.
+
+    :param cameras: The MetaCamera instances to bake
+    :type cameras: seq(MetaCamera)
+    :param skipStatic: If True channels which don't change are set instead of keyed
+    :type skipStatic: bool
+    :param tolerance: If above zero the keys are reduced to stay within this tolerance, see :func:`anim.reduceKeys`
+    :type tolerance: float
+    :param modifier: Records the created anim curves so they can be undone
+    :type modifier: om2.MDGModifier or None
+    :param change: Records the key changes so they can be undone
+    :type change: om2Anim.MAnimCurveChange or None
+    :return: The baked camera for each camera or None for the cameras without animation
+    :rtype: list(MetaCamera or None)
+    """
+    baked = []
+    for camMeta in cameras:
+        shotName = camMeta.shotName.asString()
+        # temp rename so that the the baked camera has the original name
+        camMeta.rename("_".join([shotName, "ORIG"]))
+        bakedCam = createCamera(shotName, camMeta.startFrame.asInt(), camMeta.endFrame.asInt())
+        bakedCam.copyFrom(camMeta)
+        pairs = _animatedPlugPairs(camMeta, bakedCam)
+        if not pairs:
+            bakedCam.delete()
+            camMeta.rename(shotName)
+            baked.append(None)
+            continue
+        padding = bakedCam.framePadding.asInt()
+        baked.append((bakedCam, pairs, bakedCam.startFrame.asInt() - padding, bakedCam.endFrame.asInt() + padding))
+
+    jobs = [job for job in baked if job is not None]
+    if not jobs:
+        return baked
+    firstFrame = min(job[2] for job in jobs)
+    frames = anim.frameRange(firstFrame, max(job[3] for job in jobs))
+    samples = anim.samplePlugs([source for job in jobs for source, _ in job[1]], frames)
+    column = 0
+    for bakedCam, pairs, start, end in jobs:
+        rows = slice(start - firstFrame, end - firstFrame + 1)
+        anim.bakeSamples([destination for _, destination in pairs], frames[rows],
+                         samples[rows, column:column + len(pairs)], skipStatic=skipStatic, tolerance=tolerance,
+                         modifier=modifier, change=change)
+        column += len(pairs)
+    return [job if job is None else job[0] for job in baked]
@@ -1,3 +1,5 @@
+from maya.api import OpenMaya as om2
+from maya.api import OpenMayaAnim as om2Anim
 from zoo.libs.command import command
 from zoo.libs.maya.cameras import utils
 
@@ -15,6 +17,8 @@ class BakeMetaCamerasCommand(command.ZooCommand):
               "backgroundColor": ""
               }
     _cameras = []
+    _modifier = None
+    _change = None
 
     def resolveArguments(self, arguments):
         cams = arguments.get("cameras")
@@ -22,18 +26,24 @@ class BakeMetaCamerasCommand(command.ZooCommand):
         for i in cams:
             if i.exists():
                 valid.append(i)
-        return {"cameras": valid}
+        return {"cameras": valid,
+                "skipStatic": arguments.get("skipStatic", True),
+                "tolerance": arguments.get("tolerance", 0.0)}
 
-    def doIt(self, cameras=None):
-        _cameras = [None] * len(cameras)
-        for i, cam in enumerate(cameras):
-            _cameras[i] = utils.bakeCameraMeatAnimToClone(cameras[i])
-        self._cameras = _cameras
-        return _cameras
+    def doIt(self, cameras=None, skipStatic=True, tolerance=0.0):
+        self._modifier = om2.MDGModifier()
+        self._change = om2Anim.MAnimCurveChange()
+        self._cameras = utils.bakeMetaCameras(cameras, skipStatic=skipStatic, tolerance=tolerance,
+                                              modifier=self._modifier, change=self._change)
+        return self._cameras
 
     def undoIt(self):
+        if self._change is not None:
+            self._change.undoIt()
+            self._modifier.undoIt()
+        deleted = False
         for cam in self._cameras:
             if cam is not None and cam.exists():
                 cam.delete()
-            return True
-        return False
+                deleted = True
+        return deleted
@@ -21,10 +21,8 @@ class CreateMetaCommand(command.ZooCommand):
     def resolveArguments(self, arguments):
         node = arguments.get("node")
         Type = arguments.get("type")
-        registry = base.MetaRegistry()
-        matchedType = registry.types.get(Type)
-        if matchedType is None:
-            Type = base.MetaBase
+        # getType imports the meta class module on demand
+        Type = base.MetaRegistry().getType(Type) or base.MetaBase
         # we need to store the node as mobjecthandle this the arguments get store for the life time of the command
         # instance
         if node is not None:
@@ -2,10 +2,13 @@
 quick and easy query features. Everything is built with the maya python 2.0 to make queries and creation
 as fast as possible. Graph Traversal methods works by walking the dependency graph by message attributes.
 
-@todo may need to create a scene cache with a attach node callback to remove node form the cache
+Scene wide queries go through :class:`MetaSceneIndex` which caches every meta node keyed by its mClass value and
+is kept up to date by maya callbacks so we only walk the whole scene once.
 """
+import contextlib
 import inspect
 import os
+import weakref
 from functools import wraps
 import re
 
@@ -17,6 +20,9 @@ from zoo.libs.utils import classtypes
 from zoo.libs.maya.api import plugs
 from zoo.libs.maya.api import nodes
 from zoo.libs.maya.api import attrtypes
+from zoo.libs.maya.api import callbacks
+from zoo.libs.maya.api import generic
+from zoo.libs.maya.meta import manifest
 
 logger = zlogging.zooLogger
 
@@ -33,6 +39,11 @@ def lockMetaManager(func):
     @wraps(func)
     def locker(*args, **kwargs):
         node = args[0]
+        batch = MetaBatch.current()
+        if batch is not None:
+            # the batch relocks the node once all the changes have been applied
+            batch.unlockNode(node.mobject())
+            return func(*args, **kwargs)
         setLocked = False
         if node.isLocked:
             nodes.lockNode(node.mobject(), False)
@@ -66,8 +77,9 @@ def filterSceneByAttributeValues(attributeNames, filter):
     :return: A seq of plugs
     :rtype: seq(MPlug)
     """
-    for meta in iterSceneMetaNodes():
-        dep = om2.MFnDependencyNode(meta)
+    dep = om2.MFnDependencyNode()
+    for handle in MetaSceneIndex().iterHandles():
+        dep.setObject(handle.object())
         for attr in attributeNames:
             try:
                 plug = dep.findPlug(attr, False)
@@ -83,22 +95,82 @@ def filterSceneByAttributeValues(attributeNames, filter):
 
 
 def iterSceneMetaNodes():
-    """Iterates all metanodes in the maya scene
+    """Iterates all metanodes in the maya scene, the nodes are pulled from the :class:`MetaSceneIndex`
 
-    :rtype: Generator(MObject)
+    :rtype: Generator(MetaBase)
     """
-    # todo: add a nodetype filter
-    t = om2.MItDependencyNodes()
-    while not t.isDone():
-        node = t.thisNode()
-        dep = om2.MFnDependencyNode(node)
-        if dep.hasAttribute(MCLASS_ATTR_NAME):
-            yield MetaBase(node=node)
-        t.next()
+    for handle in MetaSceneIndex().iterHandles():
+        yield MetaBase(node=handle.object())
 
 
 def findMetaNodesByClassType(classType):
-    return [m for m in iterSceneMetaNodes() if m.mClass.asString() == classType]
+    return list(iterMetaNodesByClassType(classType))
+
+
+def iterMetaNodesByClassType(classTypes, nodeTypes=(), includeSubclasses=False, asMeta=True):
+    """Low level generator function which filters the scene meta nodes by their mClass value before any MetaBase
+    instance is created, only the nodes which pass the filters get wrapped.
+
+    .. code-block:: python
+
+        # all the MetaRig nodes including subclasses of MetaRig
+        for meta in iterMetaNodesByClassType("MetaRig", includeSubclasses=True):
+            print(meta)
+        # only camera shapes
+        cameras = list(iterMetaNodesByClassType("MetaCamera", nodeTypes=(om2.MFn.kCamera,)))
+
+    :param classTypes: A single mClass name or a sequence of names to filter by.
+    :type classTypes: str or seq(str)
+    :param nodeTypes: A sequence of om2.MFn types, the node has to be one of these types to be returned, an empty \
+    sequence means all node types.
+    :type nodeTypes: seq(int)
+    :param includeSubclasses: If True then any registered meta class which inherits from one of the classTypes \
+    will match as well, see :class:`MetaRegistry`.
+    :type includeSubclasses: bool
+    :param asMeta: If False the om2.MObject is yielded instead of the MetaBase instance
+    :type asMeta: bool
+    :rtype: Generator(MetaBase or om2.MObject)
+    """
+    if isinstance(classTypes, basestring):
+        classTypes = (classTypes,)
+    classTypes = set(classTypes)
+    if includeSubclasses:
+        classTypes.update(metaSubclassNames(classTypes))
+    for handle in MetaSceneIndex().iterHandles(classTypes):
+        node = handle.object()
+        if nodeTypes and not any(node.hasFn(i) for i in nodeTypes):
+            continue
+        yield MetaBase(node=node) if asMeta else node
+
+
+def metaSubclassNames(classTypes):
+    """Returns the class names of every registered meta class which inherits from any of the classTypes.
+
+    :param classTypes: A sequence of meta class names
+    :type classTypes: seq(str)
+    :return: The set of subclass names, excluding the classTypes themselves.
+    :rtype: set(str)
+    """
+    return MetaRegistry().subclassNames(classTypes)
+
+
+def _iterSceneMetaObjects(nodeType=om2.MFn.kInvalid):
+    """Walks the whole scene and yields every node which has the mClass attribute, this is the slow path used to
+    build the :class:`MetaSceneIndex`.
+
+    :param nodeType: The om2.MFn type to filter the scene iterator by, kInvalid means all nodes.
+    :type nodeType: int
+    :return: A generator where each element is a tuple of the node MObject and its mClass value
+    :rtype: Generator(tuple(om2.MObject, str))
+    """
+    iterator = om2.MItDependencyNodes(nodeType)
+    dep = om2.MFnDependencyNode()
+    while not iterator.isDone():
+        node = iterator.thisNode()
+        dep.setObject(node)
+        if dep.hasAttribute(MCLASS_ATTR_NAME):
+            yield node, dep.findPlug(MCLASS_ATTR_NAME, False).asString()
+        iterator.next()
 
 
 def isMetaNode(node):
@@ -164,10 +236,20 @@ def getConnectedMetaNodes(mObj, direction=om2.MItDependencyGraph.kDownstream):
 
 
 class MetaRegistry(object):
-    """Singleton class to handle global registration to metaclasses"""
+    """Singleton class to handle global registration to metaclasses.
+
+    Modules from the ZOO_META_PATHS environment variable aren't imported up front, instead a
+    :class:`manifest.MetaManifest` maps each class name to its file and the module is imported the first time
+    the class is requested through :meth:`getType`. Use :meth:`loadAll` to import everything.
+    """
     __metaclass__ = classtypes.Singleton
     metaEnv = "ZOO_META_PATHS"
     types = {}
+    manifest = None
+    # file paths which have been imported through the manifest
+    _resolvedPaths = set()
+    # names of the manifest classes which inherit from MetaBase, the manifest also holds every other class
+    _manifestMetaNames = None
 
     def __init__(self):
         try:
@@ -176,24 +258,77 @@ class MetaRegistry(object):
             logger.error("Failed to registry environment", exc_info=True)
 
     def reload(self):
-        self.registryByEnv(MetaRegistry.metaEnv)
+        """Updates the manifest from the environment paths, modules are imported lazily.
+        """
+        paths = self.environmentPaths(MetaRegistry.metaEnv)
+        MetaRegistry.manifest = manifest.MetaManifest()
+        MetaRegistry._resolvedPaths = set()
+        MetaRegistry._manifestMetaNames = None
+        MetaRegistry.manifest.update(paths)
+
+    @classmethod
+    def loadAll(cls):
+        """Imports and registers every meta class from the environment paths.
+        """
+        cls.registryByEnv(cls.metaEnv)
+        if cls.manifest is not None:
+            cls._resolvedPaths.update(filter(None, [cls.manifest.filePath(i) for i in cls.manifest.classNames()]))
+
+    @classmethod
+    def _isManifestMetaClass(cls, typeName):
+        if cls.manifest is None:
+            return False
+        if cls._manifestMetaNames is None:
+            cls._manifestMetaNames = cls.manifest.subclassNames([".".join((__name__, MetaBase.__name__))])
+        return typeName in cls._manifestMetaNames
 
     @classmethod
     def isInRegistry(cls, typeName):
-        """Checks to see if the type is currently available in the registry"""
-        return typeName in cls.types
+        """Checks to see if the type is currently available in the registry, only manifest classes which inherit
+        from MetaBase count."""
+        return typeName in cls.types or cls._isManifestMetaClass(typeName)
 
     @classmethod
     def getType(cls, typeName):
-        """Returns the class of the type
+        """Returns the class of the type, if the class hasn't been registered yet its module is imported from the
+        manifest.
         
         :param typeName: the class name
         :type typeName: str
         :return: returns the class object for the given type name
         :rtype: object
         """
+        classObj = cls.types.get(typeName)
+        if classObj is not None or not cls._isManifestMetaClass(typeName):
+            return classObj
+        filePath = cls.manifest.filePath(typeName)
+        if filePath is None or filePath in cls._resolvedPaths:
+            return None
+        cls._resolvedPaths.add(filePath)
+        cls.registerMetaClasses([filePath])
         return cls.types.get(typeName)
 
+    @classmethod
+    def subclassNames(cls, classTypes):
+        """Returns the names of every registered or manifest class which inherits from any of the classTypes,
+        nothing is imported.
+
+        :param classTypes: A sequence of meta class names
+        :type classTypes: seq(str)
+        :rtype: set(str)
+        """
+        parents = tuple(filter(None, [cls.types.get(name) for name in classTypes]))
+        names = set()
+        if parents:
+            names.update(name for name, classObj in cls.types.items()
+                         if classObj not in parents and issubclass(classObj, parents))
+        if cls.manifest is not None:
+            # registered classes are qualified by their module so same named classes elsewhere aren't matched
+            qualified = [".".join((cls.types[name].__module__, name)) if name in cls.types else name
+                         for name in classTypes]
+            names.update(cls.manifest.subclassNames(qualified))
+        return names.difference(classTypes)
+
     @classmethod
     def registerMetaClasses(cls, paths):
         """This function is helper function to register a list of paths.
@@ -248,11 +383,21 @@ class MetaRegistry(object):
         :param env:  the environment variable name
         :type env: str
         """
+        return cls.registerMetaClasses(cls.environmentPaths(env))
+
+    @staticmethod
+    def environmentPaths(env):
+        """Returns the paths from the environment variable.
+
+        :param env:  the environment variable name
+        :type env: str
+        :rtype: list(str)
+        :raises: ValueError if the environment variable doesn't exist
+        """
         environmentPaths = os.environ.get(env)
         if environmentPaths is None:
             raise ValueError("No environment variable with the name -> {} exists".format(env))
-        environmentPaths = environmentPaths.split(os.pathsep)
-        return cls.registerMetaClasses(environmentPaths)
+        return environmentPaths.split(os.pathsep)
 
     @classmethod
     def registerMetaClass(cls, classObj):
@@ -266,6 +411,667 @@ class MetaRegistry(object):
             cls.types[classObj.__name__] = classObj
 
 
+class MetaSceneIndex(object):
+    """Singleton class which indexes every meta node in the scene by its mClass value.
+
+    The index is built from a single scene walk the first time it's queried, after that it's kept in sync by
+    maya callbacks.
+
+    - Node added: the node is stored as pending and checked for the mClass attribute on the next query since
+      attributes haven't been created at the time the callback fires.
+    - Node removed: the node is removed from the index.
+    - Attribute added or removed: each indexed node has a callback which drops the node when the mClass attribute is
+      removed. Existing nodes which become meta nodes through :class:`MetaBase` are added directly.
+    - New scene or scene open: the index is cleared and rebuilt on the next query.
+
+    Nodes are keyed by their om2.MObjectHandle.hashCode() so lookups are O(matches).
+
+    .. code-block:: python
+
+        index = MetaSceneIndex()
+        for handle in index.iterHandles(("MetaRig",)):
+            print(handle.object())
+
+    """
+    __metaclass__ = classtypes.Singleton
+
+    def __init__(self):
+        # {className: {hashCode: om2.MObjectHandle}}
+        self._classes = {}
+        # {hashCode: className}
+        self._nodes = {}
+        # {hashCode: om2.MObjectHandle}, nodes added to the scene since the last query.
+        self._pending = {}
+        # {hashCode: callbackId}, the attribute added/removed callback of each indexed node
+        self._nodeCallbacks = {}
+        # callback ids which need removing, callbacks are never removed from within a callback
+        self._staleCallbacks = []
+        self._callbacks = []
+        self._dirty = True
+
+    def isActive(self):
+        """Returns True if the index currently has its scene callbacks registered
+
+        :rtype: bool
+        """
+        return bool(self._callbacks)
+
+    def start(self):
+        """Registers the scene callbacks, the index will be built on the next query.
+        """
+        if self._callbacks:
+            return
+        self._callbacks = [
+            callbacks.MCallbackIdWrapper(om2.MDGMessage.addNodeAddedCallback(self._onNodeAdded, "dependNode")),
+            callbacks.MCallbackIdWrapper(om2.MDGMessage.addNodeRemovedCallback(self._onNodeRemoved, "dependNode")),
+            callbacks.MCallbackIdWrapper(om2.MSceneMessage.addCallback(om2.MSceneMessage.kBeforeNew,
+                                                                       self._onSceneCleared)),
+            callbacks.MCallbackIdWrapper(om2.MSceneMessage.addCallback(om2.MSceneMessage.kBeforeOpen,
+                                                                       self._onSceneCleared))
+        ]
+        self._dirty = True
+
+    def stop(self):
+        """Removes all the callbacks and clears the index.
+        """
+        self._callbacks = []
+        self.clear()
+        self._dirty = True
+
+    def clear(self):
+        """Clears the index and removes all node callbacks, does not rebuild the index.
+        """
+        self._staleCallbacks.extend(self._nodeCallbacks.values())
+        self._nodeCallbacks = {}
+        self._classes = {}
+        self._nodes = {}
+        self._pending = {}
+        self._removeStaleCallbacks()
+
+    def rebuild(self):
+        """Rebuilds the index by walking the entire scene.
+        """
+        self.clear()
+        for node, className in _iterSceneMetaObjects():
+            self.addNode(node, className)
+        self._dirty = False
+
+    def addNode(self, node, className=None):
+        """Adds the node to the index, if the className is None then it will be read from the mClass attribute.
+
+        :param node: The meta node to index
+        :type node: om2.MObject
+        :param className: The mClass value of the node.
+        :type className: str or None
+        :return: True if the node was added to the index
+        :rtype: bool
+        """
+        handle = om2.MObjectHandle(node)
+        hashCode = handle.hashCode()
+        if className is None:
+            if hashCode in self._nodes:
+                return True
+            dep = om2.MFnDependencyNode(node)
+            if not dep.hasAttribute(MCLASS_ATTR_NAME):
+                return False
+            className = dep.findPlug(MCLASS_ATTR_NAME, False).asString()
+        existing = self._nodes.get(hashCode)
+        if existing is not None:
+            if existing == className:
+                return True
+            self._classes[existing].pop(hashCode, None)
+        else:
+            self._nodeCallbacks[hashCode] = om2.MNodeMessage.addAttributeAddedOrRemovedCallback(
+                node, self._onAttributeAddedOrRemoved)
+        self._nodes[hashCode] = className
+        self._classes.setdefault(className, {})[hashCode] = handle
+        return True
+
+    def removeNode(self, node):
+        """Removes the node from the index.
+
+        :param node: The meta node to remove
+        :type node: om2.MObject
+        :return: True if the node was in the index
+        :rtype: bool
+        """
+        hashCode = om2.MObjectHandle(node).hashCode()
+        self._pending.pop(hashCode, None)
+        className = self._nodes.pop(hashCode, None)
+        if className is None:
+            return False
+        self._classes[className].pop(hashCode, None)
+        if not self._classes[className]:
+            del self._classes[className]
+        callbackId = self._nodeCallbacks.pop(hashCode, None)
+        if callbackId is not None:
+            self._staleCallbacks.append(callbackId)
+        return True
+
+    def classTypes(self):
+        """Returns all the mClass names currently in the scene.
+
+        :rtype: list(str)
+        """
+        self._update()
+        return list(self._classes.keys())
+
+    def iterHandles(self, classTypes=None):
+        """Generator function which yields the MObjectHandle of each meta node in the index.
+
+        :param classTypes: A sequence of mClass names to return, if None then all meta nodes are returned.
+        :type classTypes: seq(str) or None
+        :rtype: Generator(om2.MObjectHandle)
+        """
+        self._update()
+        if classTypes is None:
+            buckets = list(self._classes.values())
+        else:
+            if isinstance(classTypes, basestring):
+                classTypes = (classTypes,)
+            buckets = [self._classes[i] for i in classTypes if i in self._classes]
+        for bucket in buckets:
+            # copy since the callbacks can mutate the bucket while the client is iterating
+            for handle in list(bucket.values()):
+                if handle.isValid() and handle.isAlive():
+                    yield handle
+
+    def __len__(self):
+        self._update()
+        return len(self._nodes)
+
+    def __contains__(self, node):
+        self._update()
+        return om2.MObjectHandle(node).hashCode() in self._nodes
+
+    def _update(self):
+        if not self._callbacks:
+            self.start()
+        self._removeStaleCallbacks()
+        if self._dirty:
+            self.rebuild()
+            return
+        if not self._pending:
+            return
+        pending = self._pending
+        self._pending = {}
+        dep = om2.MFnDependencyNode()
+        for handle in pending.values():
+            if not handle.isValid() or not handle.isAlive():
+                continue
+            node = handle.object()
+            dep.setObject(node)
+            if dep.hasAttribute(MCLASS_ATTR_NAME):
+                self.addNode(node, dep.findPlug(MCLASS_ATTR_NAME, False).asString())
+
+    def _removeStaleCallbacks(self):
+        for callbackId in self._staleCallbacks:
+            try:
+                om2.MMessage.removeCallback(callbackId)
+            except RuntimeError:
+                pass
+        self._staleCallbacks = []
+
+    def _onNodeAdded(self, node, clientData):
+        # during a file open the index is rebuilt on the next query so skip the per node work
+        if self._dirty:
+            return
+        handle = om2.MObjectHandle(node)
+        self._pending[handle.hashCode()] = handle
+
+    def _onNodeRemoved(self, node, clientData):
+        if self._dirty:
+            return
+        self.removeNode(node)
+
+    def _onAttributeAddedOrRemoved(self, msg, plug, clientData):
+        if msg & om2.MNodeMessage.kAttributeRemoved and plug.partialName(useLongNames=True) == MCLASS_ATTR_NAME:
+            self.removeNode(plug.node())
+
+    def _onSceneCleared(self, clientData):
+        self.clear()
+        self._dirty = True
+
+
+class MetaCache(object):
+    """Singleton class which acts as an identity map for MetaBase instances, while the cache is enabled
+    MetaBase(node) returns the existing wrapper for the node instead of creating a new one.
+
+    The instances are stored in a weak valued dict keyed by om2.MObjectHandle.hashCode() so the cache never keeps
+    a wrapper alive by itself, entries for deleted nodes are evicted by a node removed callback.
+
+    The cache is disabled by default, either enable it globally with :meth:`setEnabled` or scope it to a batch
+    operation with :func:`metaCacheScope` which also keeps every wrapper alive until the scope exits.
+    """
+    __metaclass__ = classtypes.Singleton
+
+    def __init__(self):
+        self._instances = weakref.WeakValueDictionary()
+        # strong references to the instances created within a scope
+        self._pinned = []
+        self._scopeDepth = 0
+        self._enabled = False
+        self._callbacks = []
+
+    def isEnabled(self):
+        """Returns True if the cache is currently enabled either globally or by a scope.
+
+        :rtype: bool
+        """
+        return self._enabled or self._scopeDepth > 0
+
+    def setEnabled(self, state):
+        """Globally enables or disables the cache, disabling the cache clears it unless a scope is active.
+
+        :param state: True to enable the cache.
+        :type state: bool
+        """
+        self._enabled = state
+        self._refreshState()
+
+    def pushScope(self):
+        """Enables the cache until the matching :meth:`popScope`, prefer :func:`metaCacheScope`.
+        """
+        self._scopeDepth += 1
+        self._refreshState()
+
+    def popScope(self):
+        """Ends the current scope, once the outermost scope ends the pinned instances are released.
+        """
+        self._scopeDepth = max(self._scopeDepth - 1, 0)
+        if self._scopeDepth == 0:
+            self._pinned = []
+        self._refreshState()
+
+    def get(self, node):
+        """Returns the cached MetaBase instance for the node.
+
+        :param node: The node to find
+        :type node: om2.MObject
+        :rtype: MetaBase or None
+        """
+        instance = self._instances.get(om2.MObjectHandle(node).hashCode())
+        # hashCodes aren't guaranteed to be unique so compare the actual MObject
+        if instance is None or not instance.exists() or instance.handle().object() != node:
+            return None
+        return instance
+
+    def add(self, instance):
+        """Adds the MetaBase instance to the cache, does nothing if the cache is disabled.
+
+        :type instance: MetaBase
+        """
+        if not self.isEnabled():
+            return
+        self._instances[instance.handle().hashCode()] = instance
+        if self._scopeDepth:
+            self._pinned.append(instance)
+
+    def remove(self, node):
+        """Removes the node from the cache.
+
+        :type node: om2.MObject
+        """
+        self._instances.pop(om2.MObjectHandle(node).hashCode(), None)
+
+    def clear(self):
+        self._instances.clear()
+        self._pinned = []
+
+    def __len__(self):
+        return len(self._instances)
+
+    def _refreshState(self):
+        if self.isEnabled():
+            if not self._callbacks:
+                self._callbacks = [
+                    callbacks.MCallbackIdWrapper(om2.MDGMessage.addNodeRemovedCallback(self._onNodeRemoved,
+                                                                                       "dependNode")),
+                    callbacks.MCallbackIdWrapper(om2.MSceneMessage.addCallback(om2.MSceneMessage.kBeforeNew,
+                                                                               self._onSceneCleared)),
+                    callbacks.MCallbackIdWrapper(om2.MSceneMessage.addCallback(om2.MSceneMessage.kBeforeOpen,
+                                                                               self._onSceneCleared))
+                ]
+            return
+        self._callbacks = []
+        self.clear()
+
+    def _onNodeRemoved(self, node, clientData):
+        self.remove(node)
+
+    def _onSceneCleared(self, clientData):
+        self.clear()
+
+
+@contextlib.contextmanager
+def metaCacheScope():
+    """Context manager which enables the :class:`MetaCache` for the duration of the scope, every MetaBase
+    instance created in the scope is kept alive until the scope exits so repeated traversals reuse the same wrappers.
+
+    .. code-block:: python
+
+        with metaCacheScope():
+            for meta in rig.iterMetaChildren():
+                list(meta.metaParents())
+
+    :rtype: :class:`MetaCache`
+    """
+    cache = MetaCache()
+    cache.pushScope()
+    try:
+        yield cache
+    finally:
+        cache.popScope()
+
+
+class MetaBatch(object):
+    """Collects meta graph mutations(node creation, attribute adds and removals, connects and disconnects) into a
+    single om2.MDGModifier which gets applied with one doIt(). Use :meth:`MetaBase.batch` rather than creating this
+    class directly.
+
+    While a batch is active:
+
+    - Nodes are unlocked once and relocked after the modifier has been applied.
+    - Meta nodes created within the batch aren't part of the scene until the batch has been applied, cancelling the
+      batch leaves nothing behind.
+    - Attributes created through the batch won't exist on the node until the batch has been applied, any returned
+      MPlug for these attributes is only valid after that point.
+    - Plug values and lock states for new attributes are applied after the modifier.
+
+    .. code-block:: python
+
+        with MetaBase.batch() as batch:
+            for name, ctrl in controls.items():
+                rig.addControl(ctrl, name)
+        # undo the whole batch
+        batch.undoIt()
+
+    """
+    _active = None
+
+    def __init__(self):
+        self._mod = om2.MDGModifier()
+        # {hashCode: om2.MObjectHandle} nodes which were unlocked by the batch
+        self._unlockedNodes = {}
+        # plugs which were unlocked by the batch and need relocking
+        self._unlockedPlugs = []
+        # {(hashCode, attributeName): attribute MObject}
+        self._pendingAttributes = {}
+        # {(hashCode, attributeName)} attributes which will be removed by the modifier
+        self._removedAttributes = set()
+        # [(om2.MObjectHandle, attribute MObject)] locked attributes which were unlocked so they could be removed
+        self._removedLockedPlugs = []
+        # {(hashCode, attributeName): set(logicalIndex)}
+        self._reservedElements = {}
+        self._deferred = []
+        # nodes which will have the mClass attribute once the batch has been applied
+        self._newMetaNodes = []
+
+    @classmethod
+    def current(cls):
+        """Returns the active batch.
+
+        :rtype: :class:`MetaBatch` or None
+        """
+        return cls._active
+
+    def modifier(self):
+        """Returns the modifier which all the batched operations are added to.
+
+        :rtype: om2.MDGModifier
+        """
+        return self._mod
+
+    def unlockNode(self, node):
+        """Unlocks the node if it's locked, the node will be relocked once the batch has been applied.
+
+        :type node: om2.MObject
+        """
+        handle = om2.MObjectHandle(node)
+        if handle.hashCode() in self._unlockedNodes:
+            return
+        if nodes.lockNode(node, False):
+            self._unlockedNodes[handle.hashCode()] = handle
+
+    def lockNode(self, node):
+        """Locks the node once the batch has been applied.
+
+        :type node: om2.MObject
+        """
+        handle = om2.MObjectHandle(node)
+        self._unlockedNodes[handle.hashCode()] = handle
+
+    def unlockPlug(self, plug):
+        """Unlocks the plug if it's locked, the plug will be relocked once the batch has been applied.
+
+        :type plug: om2.MPlug
+        """
+        if plug.isLocked:
+            plug.isLocked = False
+            self._unlockedPlugs.append(plug)
+
+    def lockPlug(self, node, attribute):
+        """Locks the plug once the batch has been applied.
+
+        :param node: The node which has or will have the attribute
+        :type node: om2.MObject
+        :param attribute: The attribute MObject
+        :type attribute: om2.MObject
+        """
+        self.defer(plugs.setLockState, node, attribute, True)
+
+    def createNode(self, name, nodeType):
+        """Adds the node creation to the modifier.
+
+        :param name: The name for the node
+        :type name: str
+        :param nodeType: The node type to create
+        :type nodeType: str
+        :return: The node MObject, the node is only part of the scene once the batch has been applied
+        :rtype: om2.MObject
+        """
+        node = self._mod.createNode(nodeType)
+        self._mod.renameNode(node, name)
+        return node
+
+    def defer(self, func, node, attribute, *args):
+        """Calls func with the MPlug for the node and attribute plus args after the modifier has been applied.
+
+        :param func: The function to call ie. plugs.setPlugValue
+        :type func: callable
+        :type node: om2.MObject
+        :type attribute: om2.MObject
+        """
+        self._deferred.append((func, om2.MObjectHandle(node), attribute, args))
+
+    def addAttribute(self, node, name, Type, isArray=False):
+        """Adds the attribute to the modifier, if the attribute is already pending then the existing attribute
+        MObject is returned.
+
+        :param node: The node to add the attribute to.
+        :type node: om2.MObject
+        :param name: The long and short name of the attribute
+        :type name: str
+        :param Type: The attrtypes constant
+        :type Type: int
+        :param isArray: Whether the attribute is an array
+        :type isArray: bool
+        :rtype: om2.MObject
+        """
+        key = (om2.MObjectHandle(node).hashCode(), name)
+        attribute = self._pendingAttributes.get(key)
+        if attribute is not None:
+            return attribute
+        try:
+            attribute = nodes.addAttribute(node, name, name, Type, isArray=isArray, apply=False).object()
+        except RuntimeError:
+            raise ValueError("Failed to create attribute with name: {}".format(name))
+        self._mod.addAttribute(node, attribute)
+        self._pendingAttributes[key] = attribute
+        self._removedAttributes.discard(key)
+        if name == MCLASS_ATTR_NAME:
+            self._newMetaNodes.append(om2.MObjectHandle(node))
+        return attribute
+
+    def removeAttribute(self, plug):
+        """Adds the attribute removal to the modifier, a locked plug is unlocked now and relocked if the batch is
+        undone.
+
+        :param plug: The plug of the attribute to remove
+        :type plug: om2.MPlug
+        """
+        node = plug.node()
+        attribute = plug.attribute()
+        # the plug won't exist to relock once the batch has been applied
+        self._unlockedPlugs = [i for i in self._unlockedPlugs if i != plug]
+        if plug.isLocked:
+            plug.isLocked = False
+            self._removedLockedPlugs.append((om2.MObjectHandle(node), attribute))
+        self._mod.removeAttribute(node, attribute)
+        key = (om2.MObjectHandle(node).hashCode(), om2.MFnAttribute(attribute).name)
+        self._pendingAttributes.pop(key, None)
+        self._removedAttributes.add(key)
+
+    def hasAttribute(self, node, name):
+        """Returns True if the node will have the attribute once the batch has been applied.
+
+        :type node: om2.MObject
+        :type name: str
+        :rtype: bool
+        """
+        key = (om2.MObjectHandle(node).hashCode(), name)
+        if key in self._pendingAttributes:
+            return True
+        return key not in self._removedAttributes and om2.MFnDependencyNode(node).hasAttribute(name)
+
+    def pendingAttribute(self, node, name):
+        """Returns the attribute MObject if the attribute is waiting to be created by this batch.
+
+        :rtype: om2.MObject or None
+        """
+        return self._pendingAttributes.get((om2.MObjectHandle(node).hashCode(), name))
+
+    def findPlug(self, node, name):
+        """Returns the plug for the attribute on the node whether it already exists or is pending.
+
+        :type node: om2.MObject
+        :type name: str
+        :rtype: om2.MPlug or None
+        """
+        attribute = self.pendingAttribute(node, name)
+        if attribute is not None:
+            return om2.MPlug(node, attribute)
+        if self.hasAttribute(node, name):
+            return om2.MFnDependencyNode(node).findPlug(name, False)
+
+    def reserveElement(self, arrayPlug):
+        """Returns the next free destination element plug which hasn't already been used by this batch.
+
+        :param arrayPlug: The array plug to search, this can be a plug of a pending attribute
+        :type arrayPlug: om2.MPlug
+        :rtype: om2.MPlug
+        """
+        node = arrayPlug.node()
+        name = om2.MFnAttribute(arrayPlug.attribute()).name
+        key = (om2.MObjectHandle(node).hashCode(), name)
+        reserved = self._reservedElements.setdefault(key, set())
+        if self.pendingAttribute(node, name) is not None:
+            # a pending attribute has no elements yet so there's nothing in the scene to check against
+            index = 0
+            while index in reserved:
+                index += 1
+            reserved.add(index)
+            return arrayPlug.elementByLogicalIndex(index)
+        element = plugs.nextAvailableDestElementPlug(arrayPlug)
+        index = element.logicalIndex()
+        while index in reserved or element.isDestination:
+            index += 1
+            element = arrayPlug.elementByLogicalIndex(index)
+        reserved.add(index)
+        return element
+
+    def doIt(self):
+        """Applies the modifier followed by the deferred plug changes then relocks the nodes.
+        """
+        try:
+            self._mod.doIt()
+            self._applyDeferred()
+            index = MetaSceneIndex()
+            if index.isActive():
+                for handle in self._newMetaNodes:
+                    if handle.isValid() and handle.isAlive():
+                        index.addNode(handle.object())
+        finally:
+            self._relock()
+
+    def undoIt(self):
+        """Undoes the batch as a single operation.
+        """
+        self._unlockNodes()
+        try:
+            self._mod.undoIt()
+            self._setRemovedPlugsLocked(True)
+        finally:
+            self._relock()
+
+    def redoIt(self):
+        """Reapplies the modifier after :meth:`undoIt` followed by the deferred plug changes, the attributes
+        created by the modifier come back with their default values so the deferred values have to be replayed.
+        """
+        self._unlockNodes()
+        try:
+            self._setRemovedPlugsLocked(False)
+            self._mod.doIt()
+            self._applyDeferred()
+        finally:
+            self._relock()
+
+    def cancel(self):
+        """Discards the batch without applying the modifier, the nodes unlocked by the batch are relocked.
+        """
+        self._deferred = []
+        self._pendingAttributes = {}
+        self._removedAttributes = set()
+        self._reservedElements = {}
+        self._newMetaNodes = []
+        self._setRemovedPlugsLocked(True)
+        self._removedLockedPlugs = []
+        self._relock()
+
+    def _setRemovedPlugsLocked(self, state):
+        for handle, attribute in self._removedLockedPlugs:
+            if handle.isValid() and handle.isAlive():
+                om2.MPlug(handle.object(), attribute).isLocked = state
+
+    def _applyDeferred(self):
+        for func, handle, attribute, args in self._deferred:
+            if handle.isValid() and handle.isAlive():
+                func(om2.MPlug(handle.object(), attribute), *args)
+
+    def _unlockNodes(self):
+        for handle in self._unlockedNodes.values():
+            if handle.isValid() and handle.isAlive():
+                nodes.lockNode(handle.object(), False)
+        # the plugs locked by the batch have to be unlocked again for the modifier to change their connections
+        for plug in self._unlockedPlugs:
+            if not plug.isNull:
+                plug.isLocked = False
+        for func, handle, attribute, args in self._deferred:
+            if func is not plugs.setLockState or not (handle.isValid() and handle.isAlive()):
+                continue
+            node = handle.object()
+            if om2.MFnDependencyNode(node).hasAttribute(om2.MFnAttribute(attribute).name):
+                om2.MPlug(node, attribute).isLocked = False
+
+    def _relock(self):
+        for plug in self._unlockedPlugs:
+            if not plug.isNull:
+                plug.isLocked = True
+        for handle in self._unlockedNodes.values():
+            if handle.isValid() and handle.isAlive():
+                nodes.lockNode(handle.object(), True)
+
+
 class MetaFactory(type):
     """MetaClass for metabase class to create the correct metaBase subclass based on class plug name if a meta
     node(MObject) exists in the arguments"""
@@ -283,14 +1089,20 @@ class MetaFactory(type):
             reg.registerMetaClass(cls)
         if not node:
             return type.__call__(cls, *args, **kwargs)
+        cache = MetaCache()
+        cacheEnabled = cache.isEnabled() and isinstance(node, om2.MObject)
+        if cacheEnabled:
+            instance = cache.get(node)
+            if instance is not None and isinstance(instance, cls):
+                return instance
         classType = MetaBase.classNameFromPlug(node)
-        if classType == cls.__name__:
-            return type.__call__(cls, *args, **kwargs)
-
-        registeredType = MetaRegistry().getType(classType)
-        if registeredType is None:
-            return type.__call__(cls, *args, **kwargs)
-        return type.__call__(registeredType, *args, **kwargs)
+        registeredType = None
+        if classType != cls.__name__:
+            registeredType = MetaRegistry().getType(classType)
+        instance = type.__call__(registeredType or cls, *args, **kwargs)
+        if cacheEnabled:
+            cache.add(instance)
+        return instance
 
 
 class MetaBase(object):
@@ -318,15 +1130,51 @@ class MetaBase(object):
 
     def __init__(self, node=None, name=None, initDefaults=True, lock=False):
         self._createInScene(node, name)
+        batch = MetaBatch.current()
         if initDefaults:
             self._initMeta()
+            index = MetaSceneIndex()
+            # existing nodes can become meta nodes at any point so let the index know about it
+            if index.isActive() and batch is None:
+                index.addNode(self._handle.object())
         if lock and not self._mfn.isLocked:
-            self.lock(True)
+            if batch is not None:
+                # locking now would stop the batch from adding the meta attributes
+                batch.lockNode(self._handle.object())
+            else:
+                self.lock(True)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def batch():
+        """Context manager which collects the meta graph changes made within the context into a single
+        om2.MDGModifier, see :class:`MetaBatch`. Nested calls reuse the outer batch.
+
+        :rtype: :class:`MetaBatch`
+        """
+        batch = MetaBatch.current()
+        if batch is not None:
+            yield batch
+            return
+        batch = MetaBatch()
+        MetaBatch._active = batch
+        try:
+            yield batch
+        except Exception:
+            MetaBatch._active = None
+            batch.cancel()
+            raise
+        MetaBatch._active = None
+        batch.doIt()
 
     def _createInScene(self, node, name):
         if node is None:
             name = "_".join([name or self.__class__.__name__, "meta"])
-            node = nodes.createDGNode(name, "network")
+            batch = MetaBatch.current()
+            if batch is not None:
+                node = batch.createNode(name, "network")
+            else:
+                node = nodes.createDGNode(name, "network")
         self._handle = om2.MObjectHandle(node)
         if node.hasFn(om2.MFn.kDagNode):
             self._mfn = om2.MFnDagNode(node)
@@ -516,6 +1364,11 @@ class MetaBase(object):
     @lockMetaManager
     def addAttribute(self, name, value, Type, isArray=False, lock=True):
         mobj = self._handle.object()
+        batch = MetaBatch.current()
+        if batch is not None:
+            if batch.hasAttribute(mobj, name):
+                return batch.findPlug(mobj, name)
+            return self._batchAddAttribute(batch, name, value, Type, isArray, lock)
         mfn = om2.MFnDependencyNode(mobj)
         if mfn.hasAttribute(name):
             return mfn.findPlug(name, False)
@@ -536,6 +1389,19 @@ class MetaBase(object):
         newPlug.isLocked = lock
         return newPlug
 
+    def _batchAddAttribute(self, batch, name, value, Type, isArray, lock):
+        mobj = self._handle.object()
+        attr = batch.addAttribute(mobj, name, Type, isArray=isArray)
+        if value is not None:
+            if isinstance(value, om2.MObject):
+                self.connectTo(name, value)
+            else:
+                batch.defer(plugs.setPlugValue, mobj, attr, value)
+        if lock:
+            batch.lockPlug(mobj, attr)
+        # the plug is only valid once the batch has been applied
+        return om2.MPlug(mobj, attr)
+
     def setAttribute(self, attr, value):
         if isinstance(attr, om2.MPlug):
             with plugs.setLockedContext(attr):
@@ -571,6 +1437,8 @@ class MetaBase(object):
             mod = om2.MDGModifier()
             mod.renameAttribute(self.mobject(), plug.attribute(), newName, newName)
             mod.doIt()
+        if name == MCLASS_ATTR_NAME:
+            MetaSceneIndex().removeNode(self.mobject())
         return True
 
     def iterAttributes(self):
@@ -578,16 +1446,21 @@ class MetaBase(object):
             yield i
 
     def findConnectedNodesByAttributeName(self, filter, recursive=False):
-        plugs = self.findPlugsByFilteredName(filter)
-        results = []
-        for p in iter(plugs):
-            if p.isSource:
-                results.extend([i.node() for i in p.destinations()])
+        metaNodes = [self]
         if recursive:
-            for m in iter(self.iterMetaChildren()):
-                for p in iter(m.findPlugsByFilteredName(filter)):
-                    if p.isSource:
-                        results.extend([i.node() for i in p.destinations()])
+            metaNodes.extend(self.iterMetaChildren())
+        results = []
+        visited = set()
+        for m in metaNodes:
+            for p in iter(m.findPlugsByFilteredName(filter)):
+                if not p.isSource:
+                    continue
+                for i in p.destinations():
+                    node = i.node()
+                    key = om2.MObjectHandle(node).hashCode()
+                    if key not in visited:
+                        visited.add(key)
+                        results.append(node)
         return results
 
     def findPlugsByFilteredName(self, filter=""):
@@ -637,6 +1510,11 @@ class MetaBase(object):
         return nodes.iterConnections(self.mobject(), source, destination)
 
     def serialize(self):
+        """Serializes the attributes of this meta node into a dict keyed by the attribute name, to serialize a whole
+        network see :mod:`zoo.libs.maya.meta.metaserializer`.
+
+        :rtype: dict
+        """
         data = {}
         for plug in self.iterAttributes():
             attrData = {"name": plug.name(),
@@ -647,7 +1525,7 @@ class MetaBase(object):
                 for connection in plug.connectedTo(False, True):
                     connections.append((nodes.nameFromMObject(connection.node()), connection.name()))
             attrData["connections"] = connections
-            data.update(attrData)
+            data[plug.partialName(useLongNames=True)] = attrData
         return data
 
     def connectTo(self, attributeName, node, nodeAttributeName=None):
@@ -663,6 +1541,9 @@ class MetaBase(object):
         :rtype: om2.MPlug
         """
         nodeAttributeName = nodeAttributeName or "metaNode"
+        batch = MetaBatch.current()
+        if batch is not None:
+            return self._batchConnectTo(batch, attributeName, node, nodeAttributeName)
         dep = om2.MFnDependencyNode(node)
         self.disconnectFromNode(node)
         if not dep.hasAttribute(nodeAttributeName):
@@ -688,6 +1569,34 @@ class MetaBase(object):
             destinationPlug.isLocked = True
         return destinationPlug
 
+    def _batchConnectTo(self, batch, attributeName, node, nodeAttributeName):
+        mod = batch.modifier()
+        metaObj = self.mobject()
+        # both nodes are relocked by the batch once the modifier has been applied
+        batch.unlockNode(metaObj)
+        batch.unlockNode(node)
+        self._batchDisconnectFromNode(batch, node)
+        destinationPlug = batch.findPlug(node, nodeAttributeName)
+        if destinationPlug is not None and batch.pendingAttribute(node, nodeAttributeName) is None:
+            batch.unlockPlug(destinationPlug)
+            if destinationPlug.isDestination:
+                mod.disconnect(destinationPlug.source(), destinationPlug)
+            destinationAttr = destinationPlug.attribute()
+        else:
+            destinationAttr = batch.addAttribute(node, nodeAttributeName, attrtypes.kMFnMessageAttribute)
+
+        sourcePlug = batch.findPlug(metaObj, attributeName)
+        if sourcePlug is not None and batch.pendingAttribute(metaObj, attributeName) is None:
+            batch.unlockPlug(sourcePlug)
+            sourceAttr = sourcePlug.attribute()
+        else:
+            sourceAttr = batch.addAttribute(metaObj, attributeName, attrtypes.kMFnMessageAttribute)
+            batch.lockPlug(metaObj, sourceAttr)
+        mod.connect(metaObj, sourceAttr, node, destinationAttr)
+        batch.lockPlug(node, destinationAttr)
+        # the plug is only valid once the batch has been applied
+        return om2.MPlug(node, destinationAttr)
+
     def connectToByPlug(self, sourcePlug, node, nodeAttributeName=None):
         nodeAttributeName = nodeAttributeName or "metaNode"
         dep = om2.MFnDependencyNode(node)
@@ -722,6 +1631,9 @@ class MetaBase(object):
         :return: success value
         :rtype: bool
         """
+        batch = MetaBatch.current()
+        if batch is not None:
+            return self._batchDisconnectFromNode(batch, node)
         metaObj = self.mobject()
         for source, destination in nodes.iterConnections(node, False, True):
             if source.node() != metaObj:
@@ -734,6 +1646,20 @@ class MetaBase(object):
             return True
         return False
 
+    def _batchDisconnectFromNode(self, batch, node):
+        mod = batch.modifier()
+        metaObj = self.mobject()
+        for source, destination in nodes.iterConnections(node, False, True):
+            if source.node() != metaObj:
+                continue
+            batch.unlockNode(metaObj)
+            batch.unlockNode(node)
+            mod.disconnect(source, destination)
+            batch.removeAttribute(destination)
+            batch.removeAttribute(source)
+            return True
+        return False
+
     @lockMetaManager
     def disconnectPlugFromNode(self, source, node):
         for i in source.destinations():
@@ -776,35 +1702,62 @@ class MetaBase(object):
                     continue
                 yield destNode
 
-    def iterMetaChildren(self, depthLimit=256):
-        """This function iterate the meta children by the metaChildren Plug and return the metaBase instances
-        
+    def iterMetaChildren(self, depthLimit=256, order=generic.DEPTH_FIRST, prune=None, includeDepth=False):
+        """This function iterate the meta children by the metaChildren Plug and return the metaBase instances, each
+        child is only returned once even if it has multiple parents within the network.
+
         :param depthLimit: The travsal depth limit
         :type depthLimit: int
+        :param order: generic.DEPTH_FIRST or generic.BREADTH_FIRST
+        :type order: int
+        :param prune: function which takes the MetaBase instance and depth, if it returns True then the children \
+        of the meta node won't be traversed.
+        :type prune: callable or None
+        :param includeDepth: If True each element will be a tuple of (MetaBase, depth)
+        :type includeDepth: bool
         :return: A list of Metabase instances
         :rtype: list(MetaBase)
         """
-        childPlug = self._mfn.findPlug(MCHILDREN_ATTR_NAME, False)
-        for child in plugs.iterDependencyGraph(childPlug, depthLimit=depthLimit):
-            yield MetaBase(child.node())
+        return generic.iterGraph([self], MetaBase._metaChildren, keyFunc=MetaBase._metaKey, depthLimit=depthLimit,
+                                 order=order, prune=prune, includeDepth=includeDepth)
 
-    def iterMetaTree(self, depthLimit=256):
+    def iterMetaTree(self, depthLimit=256, order=generic.DEPTH_FIRST, prune=None, includeDepth=False):
         """This function traverses the meta tree pulling out any meta node this is done by checking each node 
         has the mclass Attribute. This function can be slow depending on the size of the tree 
         
         :param depthLimit: 
         :type depthLimit: int
+        :param order: generic.DEPTH_FIRST or generic.BREADTH_FIRST
+        :type order: int
+        :param prune: function which takes the MetaBase instance and depth, if it returns True then the meta \
+        node won't be traversed.
+        :type prune: callable or None
+        :param includeDepth: If True each element will be a tuple of (MetaBase, depth)
+        :type includeDepth: bool
         :rtype: generator(MetaBase)
         """
-        if depthLimit < 1:
-            return
-        for source, destination in nodes.iterConnections(self.mobject(), False, True):
+        return generic.iterGraph([self], MetaBase._metaTreeChildren, keyFunc=MetaBase._metaKey,
+                                 depthLimit=depthLimit, order=order, prune=prune, includeDepth=includeDepth)
+
+    @staticmethod
+    def _metaKey(meta):
+        return meta.handle().hashCode()
+
+    @staticmethod
+    def _metaChildren(meta):
+        dep = om2.MFnDependencyNode()
+        for destination in meta.mfn().findPlug(MCHILDREN_ATTR_NAME, False).destinations():
+            node = destination.node()
+            dep.setObject(node)
+            if dep.hasAttribute(MCHILDREN_ATTR_NAME):
+                yield MetaBase(node)
+
+    @staticmethod
+    def _metaTreeChildren(meta):
+        for source, destination in nodes.iterConnections(meta.mobject(), False, True):
             node = destination.node()
             if isMetaNode(node):
-                m = MetaBase(node)
-                yield m
-                for i in m.iterMetaTree(depthLimit=depthLimit - 1):
-                    yield i
+                yield MetaBase(node)
 
     def addChild(self, child):
         child.removeParent()
@@ -816,6 +1769,16 @@ class MetaBase(object):
         :param parent: The meta node to add as the parent of this meta node 
         :type parent: MetaBase
         """
+        batch = MetaBatch.current()
+        if batch is not None:
+            # either node may have been created within the batch in which case the meta attributes are pending
+            parentPlug = batch.findPlug(self.mobject(), MPARENT_ATTR_NAME)
+            childrenPlug = batch.findPlug(parent.mobject(), MCHILDREN_ATTR_NAME)
+            batch.unlockNode(self.mobject())
+            batch.unlockNode(parent.mobject())
+            batch.unlockPlug(parentPlug)
+            batch.modifier().connect(childrenPlug, batch.reserveElement(parentPlug))
+            return
         parentPlug = self._mfn.findPlug(MPARENT_ATTR_NAME, False)
         nextElement = plugs.nextAvailableDestElementPlug(parentPlug)
         with plugs.setLockedContext(parentPlug):
@@ -858,8 +1821,17 @@ class MetaBase(object):
         :type parent: :class:`MetaBase` or None
         :rtype: bool
         """
-        parentPlug = self._mfn.findPlug(MPARENT_ATTR_NAME, False)
-        mod = om2.MDGModifier()
+        batch = MetaBatch.current()
+        if batch is not None:
+            if batch.pendingAttribute(self.mobject(), MPARENT_ATTR_NAME) is not None:
+                # created within the batch so there's no parent in the scene to remove
+                return True
+            mod = batch.modifier()
+            parentPlug = self._mfn.findPlug(MPARENT_ATTR_NAME, False)
+            batch.unlockPlug(parentPlug)
+        else:
+            mod = om2.MDGModifier()
+            parentPlug = self._mfn.findPlug(MPARENT_ATTR_NAME, False)
         with plugs.setLockedContext(parentPlug):
             for index in iter(parentPlug.getExistingArrayAttributeIndices()):
                 childrenElement = parentPlug.elementByLogicalIndex(index)
@@ -868,19 +1840,29 @@ class MetaBase(object):
                     if parent is None or mb == parent:
                         mod.disconnect(childrenElement.source(), childrenElement)
                         mod.removeMultiInstance(childrenElement, False)
-        mod.doIt()
+        if batch is None:
+            mod.doIt()
         return True
 
     def removeAllParents(self):
-        parentPlug = self._mfn.findPlug(MPARENT_ATTR_NAME, False)
-        mod = om2.MDGModifier()
+        batch = MetaBatch.current()
+        if batch is not None:
+            if batch.pendingAttribute(self.mobject(), MPARENT_ATTR_NAME) is not None:
+                return True
+            mod = batch.modifier()
+            parentPlug = self._mfn.findPlug(MPARENT_ATTR_NAME, False)
+            batch.unlockPlug(parentPlug)
+        else:
+            mod = om2.MDGModifier()
+            parentPlug = self._mfn.findPlug(MPARENT_ATTR_NAME, False)
         with plugs.setLockedContext(parentPlug):
             for index in iter(parentPlug.getExistingArrayAttributeIndices()):
                 childrenElement = parentPlug.elementByLogicalIndex(index)
                 if childrenElement.isConnected:
                     mod.disconnect(childrenElement.source(), childrenElement)
                     mod.removeMultiInstance(childrenElement, False)
-        mod.doIt()
+        if batch is None:
+            mod.doIt()
         return True
 
 
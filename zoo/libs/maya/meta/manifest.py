@@ -0,0 +1,257 @@
+"""On disk cache which maps meta class names to the python file which defines them.
+
+The manifest is built by parsing the source files with :mod:`ast` so nothing gets imported, each file entry stores
+its modification time and is only parsed again when the file changes. :class:`zoo.libs.maya.meta.base.MetaRegistry`
+uses it to import a meta class module only once a node with that mClass value is found.
+
+Base classes are resolved through the imports of the file to their qualified name ie. "zoo.libs.maya.meta.base.MetaBase"
+so classes with the same name in different modules don't get mixed up when searching for subclasses.
+"""
+import ast
+import json
+import os
+import tempfile
+
+from zoo.libs.utils import zlogging
+
+logger = zlogging.getLogger(__name__)
+
+MANIFEST_ENV = "ZOO_META_MANIFEST"
+MANIFEST_VERSION = 2
+
+
+def defaultManifestPath():
+    """Returns the manifest file path, either from the ZOO_META_MANIFEST environment variable or the temp directory.
+
+    :rtype: str
+    """
+    return os.environ.get(MANIFEST_ENV, os.path.join(tempfile.gettempdir(), "zoo_meta_manifest.json"))
+
+
+def iterPythonFiles(paths):
+    """Generator function which yields every python file from the paths, directories are walked recursively and
+    files starting with "__" are skipped.
+
+    :param paths: A list of directories or python files
+    :type paths: list(str)
+    :rtype: Generator(str)
+    """
+    for p in paths:
+        p = os.path.normpath(p)
+        if os.path.isfile(p):
+            if p.endswith(".py"):
+                yield p
+            continue
+        for root, dirs, files in os.walk(p):
+            for f in files:
+                if f.endswith(".py") and not f.startswith("__"):
+                    yield os.path.join(root, f)
+
+
+def moduleName(filePath):
+    """Returns the dotted module name of the python file based on the packages(directories with an __init__.py)
+    above it.
+
+    :type filePath: str
+    :rtype: str
+    """
+    directory, fileName = os.path.split(os.path.abspath(filePath))
+    parts = [os.path.splitext(fileName)[0]]
+    while os.path.exists(os.path.join(directory, "__init__.py")):
+        directory, package = os.path.split(directory)
+        parts.append(package)
+    return ".".join(reversed(parts))
+
+
+def _importAliases(tree, module):
+    """Returns {localName: qualifiedName} for every import in the module.
+    """
+    aliases = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    aliases[alias.asname] = alias.name
+                else:
+                    # "import a.b" binds "a"
+                    aliases[alias.name.split(".")[0]] = alias.name.split(".")[0]
+        elif isinstance(node, ast.ImportFrom):
+            source = node.module or ""
+            if node.level:
+                package = module.split(".")[:-node.level]
+                source = ".".join(package + [source] if source else package)
+            for alias in node.names:
+                aliases[alias.asname or alias.name] = ".".join(filter(None, (source, alias.name)))
+    return aliases
+
+
+def _qualifiedName(expression, aliases, module, localClasses):
+    parts = []
+    while isinstance(expression, ast.Attribute):
+        parts.append(expression.attr)
+        expression = expression.value
+    if not isinstance(expression, ast.Name):
+        return None
+    parts.append(expression.id)
+    parts.reverse()
+    if len(parts) == 1 and parts[0] in localClasses:
+        return ".".join((module, parts[0]))
+    # unresolved names are kept as is so they can still be matched by their bare name
+    parts[0] = aliases.get(parts[0], parts[0])
+    return ".".join(parts)
+
+
+def parseClasses(filePath):
+    """Parses the python file and returns the top level classes and the qualified names of their bases, the bases
+    are resolved through the imports of the file so "base.MetaBase" becomes "zoo.libs.maya.meta.base.MetaBase".
+
+    :param filePath: The python file to parse
+    :type filePath: str
+    :return: {className: [qualifiedBaseName]}
+    :rtype: dict
+    """
+    try:
+        with open(filePath, "r") as f:
+            tree = ast.parse(f.read(), filePath)
+    except (SyntaxError, IOError, OSError, ValueError, TypeError):
+        logger.debug("Failed to parse file: {}".format(filePath), exc_info=True)
+        return {}
+    module = moduleName(filePath)
+    aliases = _importAliases(tree, module)
+    localClasses = set(node.name for node in tree.body if isinstance(node, ast.ClassDef))
+    classes = {}
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        bases = []
+        for base in node.bases:
+            name = _qualifiedName(base, aliases, module, localClasses)
+            if name is not None:
+                bases.append(name)
+        classes[node.name] = bases
+    return classes
+
+
+class MetaManifest(object):
+    """Maps class names to the file which defines them, stored as json in the form::
+
+        {"version": 2,
+         "files": {filePath: {"mtime": float, "module": str, "classes": {className: [qualifiedBaseName]}}}}
+
+    .. code-block:: python
+
+        manifest = MetaManifest()
+        manifest.update(os.environ["ZOO_META_PATHS"].split(os.pathsep))
+        manifest.filePath("MetaRig")
+
+    """
+
+    def __init__(self, cachePath=None):
+        self.cachePath = cachePath or defaultManifestPath()
+        self._files = {}
+        self._classes = {}
+        self._loaded = False
+
+    def load(self):
+        """Loads the manifest cache from disk, an invalid or missing cache results in an empty manifest.
+        """
+        self._loaded = True
+        self._files = {}
+        if not os.path.exists(self.cachePath):
+            return
+        try:
+            with open(self.cachePath, "r") as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            logger.debug("Failed to load meta manifest: {}".format(self.cachePath), exc_info=True)
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            return
+        self._files = data.get("files", {})
+
+    def save(self):
+        """Writes the manifest cache to disk
+        """
+        try:
+            directory = os.path.dirname(self.cachePath)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(self.cachePath, "w") as f:
+                json.dump({"version": MANIFEST_VERSION, "files": self._files}, f)
+        except (IOError, OSError):
+            logger.warning("Failed to save meta manifest: {}".format(self.cachePath), exc_info=True)
+
+    def update(self, paths):
+        """Brings the manifest up to date with the paths, only files which have changed since the last update are
+        parsed. Files which no longer exist within the paths are removed.
+
+        :param paths: A list of directories or python files
+        :type paths: list(str)
+        :return: True if the manifest changed
+        :rtype: bool
+        """
+        if not self._loaded:
+            self.load()
+        changed = False
+        files = {}
+        for filePath in iterPythonFiles(paths):
+            try:
+                mtime = os.path.getmtime(filePath)
+            except OSError:
+                continue
+            entry = self._files.get(filePath)
+            if entry is None or entry.get("mtime") != mtime:
+                entry = {"mtime": mtime, "module": moduleName(filePath), "classes": parseClasses(filePath)}
+                changed = True
+            files[filePath] = entry
+        if len(files) != len(self._files):
+            changed = True
+        self._files = files
+        self._classes = {}
+        for filePath, entry in files.items():
+            for className in entry["classes"]:
+                self._classes.setdefault(className, filePath)
+        if changed:
+            self.save()
+        return changed
+
+    def filePath(self, className):
+        """Returns the python file which defines the class.
+
+        :type className: str
+        :rtype: str or None
+        """
+        return self._classes.get(className)
+
+    def classNames(self):
+        return list(self._classes.keys())
+
+    def subclassNames(self, classNames):
+        """Returns all the class names which inherit from any of the classNames, this is based on the qualified base
+        class names in the source so it doesn't require importing anything.
+
+        :param classNames: The base class names, a qualified name ie. "zoo.libs.maya.meta.base.MetaBase" only \
+        matches that class while a bare name matches every class with that name.
+        :type classNames: seq(str)
+        :return: The bare names of the subclasses
+        :rtype: set(str)
+        """
+        children = {}
+        for entry in self._files.values():
+            module = entry["module"]
+            for className, bases in entry["classes"].items():
+                for base in bases:
+                    children.setdefault(base, set()).add(".".join((module, className)))
+        pending = []
+        for name in classNames:
+            if "." in name:
+                pending.append(name)
+            else:
+                pending.extend(i for i in children if i == name or i.endswith("." + name))
+        result = set()
+        while pending:
+            for child in children.get(pending.pop(), ()):
+                if child not in result:
+                    result.add(child)
+                    pending.append(child)
+        return set(i.rsplit(".", 1)[-1] for i in result)
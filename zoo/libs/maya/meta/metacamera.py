@@ -1,7 +1,7 @@
 from maya.api import OpenMaya as om2
 
 from zoo.libs.maya.meta import base
-from zoo.libs.maya.api import attrtypes, nodes
+from zoo.libs.maya.api import attrtypes, nodes, plugbatch, plugs
 
 
 def iterCameras():
@@ -102,13 +102,13 @@ class MetaCamera(base.MetaBase):
         self.camMfn.filmFit = int(value)
 
     def copyFrom(self, metaCamera):
-        self.lockedOff = metaCamera.lockedOff.asBool()
-        self.startFrame = metaCamera.startFrame.asInt()
-        self.endFrame = metaCamera.endFrame.asInt()
-        self.framePadding = metaCamera.framePadding.asInt()
-        self.shotName = metaCamera.shotName.asString()
-        self.camera_version = metaCamera.camera_version.asInt()
-        self.filmFit = float(metaCamera.filmFit)
+        writer = plugbatch.PlugBatchWriter()
+        # the meta attributes are locked when they're created
+        for name in ("lockedOff", "startFrame", "endFrame", "framePadding", "shotName", "camera_version"):
+            writer.add(self.attribute(name), plugs.getPlugValue(metaCamera.attribute(name)), unlock=True)
+        writer.add(self.camMfn.findPlug("filmFit", False), int(metaCamera.filmFit), unlock=True)
+        writer.add(self.camMfn.findPlug("focalLength", False), float(metaCamera.focalLength), unlock=True)
+        writer.doIt()
+        # the film apertures are locked and aspectRatio changes both so these go through the function set
         self.aspectRatio = float(metaCamera.aspectRatio)
-        self.focalLength = float(metaCamera.focalLength)
         self.verticalFilmAperture = float(metaCamera.verticalFilmAperture)
@@ -0,0 +1,568 @@
+"""Compact binary serialization of whole meta networks.
+
+Unlike :meth:`base.MetaBase.serialize` which builds a dict per node, this module stores the network as a set of flat
+typed columns so a large network can be written to and read from disk without going through json.
+
+File layout(little endian)::
+
+    header      magic(5s) version(H)
+    strings     lengths(I column) utf-8 blob
+    nodes       name(I) className(I) nodeType(I) flags(B)
+    attributes  node(I) name(I) attrType(i) flags(B) valueKind(B) valueIndex(I)
+    values      ints(i) floats(d) sequenceOffsets(I) sequenceLengths(I)
+    edges       sourceNode(I) sourceAttr(I) destinationNode(I) destinationAttr(I) destinationIndex(i)
+
+Each column is prefixed by its element count(I). All names, class names and string values are stored once in the
+string table and referenced by index. Integers which don't fit in the signed 32 bit ints column are stored as
+decimal strings in the string table.
+
+.. code-block:: python
+
+    metaserializer.saveNetwork("/tmp/rig.zmeta")
+    cmds.file(f=True, new=True)
+    metaNodes = metaserializer.loadNetwork("/tmp/rig.zmeta")
+
+"""
+import array
+import struct
+import sys
+
+from maya import cmds
+from maya.api import OpenMaya as om2
+from zoo.libs.utils import zlogging
+from zoo.libs.maya.api import attrtypes
+from zoo.libs.maya.api import nodes
+from zoo.libs.maya.api import plugs
+from zoo.libs.maya.meta import base
+
+logger = zlogging.getLogger(__name__)
+
+MAGIC = b"ZMETA"
+VERSION = 2
+_HEADER = struct.Struct("<5sH")
+_COUNT = struct.Struct("<I")
+
+# index used for missing strings ie. the class name of a non meta node
+NULL_INDEX = 0xFFFFFFFF
+
+NODE_DAG = 1
+ATTR_ARRAY = 1
+ATTR_LOCKED = 2
+
+VALUE_NONE = 0
+VALUE_INT = 1
+VALUE_FLOAT = 2
+VALUE_STRING = 3
+VALUE_FLOAT_SEQUENCE = 4
+VALUE_STRING_SEQUENCE = 5
+# added in version 2
+VALUE_LARGE_INT = 6
+
+_INT_MIN = -2 ** 31
+_INT_MAX = 2 ** 31 - 1
+
+_COLUMNS = {"nodeNames": "I", "nodeClasses": "I", "nodeTypes": "I", "nodeFlags": "B",
+            "attrNodes": "I", "attrNames": "I", "attrTypes": "i", "attrFlags": "B",
+            "valueKinds": "B", "valueIndices": "I",
+            "ints": "i", "floats": "d", "sequenceOffsets": "I", "sequenceLengths": "I",
+            "edgeSourceNodes": "I", "edgeSourceAttrs": "I", "edgeDestinationNodes": "I",
+            "edgeDestinationAttrs": "I", "edgeDestinationIndices": "i"}
+# write order of the columns, the string table is written before these
+_COLUMN_ORDER = ("nodeNames", "nodeClasses", "nodeTypes", "nodeFlags",
+                 "attrNodes", "attrNames", "attrTypes", "attrFlags", "valueKinds", "valueIndices",
+                 "ints", "floats", "sequenceOffsets", "sequenceLengths",
+                 "edgeSourceNodes", "edgeSourceAttrs", "edgeDestinationNodes", "edgeDestinationAttrs",
+                 "edgeDestinationIndices")
+
+
+def _toBytes(arr):
+    if sys.byteorder != "little":
+        arr = array.array(arr.typecode, arr)
+        arr.byteswap()
+    tobytes = getattr(arr, "tobytes", None) or arr.tostring
+    return tobytes()
+
+
+def _fromBytes(typeCode, data):
+    arr = array.array(typeCode)
+    frombytes = getattr(arr, "frombytes", None) or arr.fromstring
+    frombytes(data)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
+
+
+def _readExact(fileObj, size):
+    data = fileObj.read(size)
+    if len(data) != size:
+        raise ValueError("Unexpected end of meta network data")
+    return data
+
+
+class MetaNetworkData(object):
+    """Column based container for a serialized meta network, this class has no dependency on the scene so it can
+    be written or read anywhere.
+    """
+
+    def __init__(self):
+        self.strings = []
+        self._stringIndices = {}
+        for name, typeCode in _COLUMNS.items():
+            setattr(self, name, array.array(typeCode))
+
+    def addString(self, value):
+        """Adds the string to the string table if it doesn't already exist.
+
+        :type value: str or None
+        :return: The string table index, NULL_INDEX if value is None
+        :rtype: int
+        """
+        if value is None:
+            return NULL_INDEX
+        index = self._stringIndices.get(value)
+        if index is None:
+            index = len(self.strings)
+            self.strings.append(value)
+            self._stringIndices[value] = index
+        return index
+
+    def string(self, index):
+        """Returns the string for the table index.
+
+        :type index: int
+        :rtype: str or None
+        """
+        if index == NULL_INDEX:
+            return None
+        return self.strings[index]
+
+    def nodeCount(self):
+        return len(self.nodeNames)
+
+    def attributeCount(self):
+        return len(self.attrNodes)
+
+    def edgeCount(self):
+        return len(self.edgeSourceNodes)
+
+    def addNode(self, name, className, nodeType, isDag=False):
+        """Adds a node to the node table, non meta nodes which are connected to the network are added with a
+        className of None.
+
+        :rtype: int
+        :return: The node id
+        """
+        self.nodeNames.append(self.addString(name))
+        self.nodeClasses.append(self.addString(className))
+        self.nodeTypes.append(self.addString(nodeType))
+        self.nodeFlags.append(NODE_DAG if isDag else 0)
+        return len(self.nodeNames) - 1
+
+    def node(self, nodeId):
+        """Returns the node information for the node id.
+
+        :rtype: tuple(str, str or None, str, bool)
+        :return: name, className, nodeType, isDag
+        """
+        return (self.string(self.nodeNames[nodeId]), self.string(self.nodeClasses[nodeId]),
+                self.string(self.nodeTypes[nodeId]), bool(self.nodeFlags[nodeId] & NODE_DAG))
+
+    def addAttribute(self, nodeId, name, attrType, value=None, isArray=False, locked=False):
+        """Adds an attribute to the attribute table, the value is stored in the matching typed value column.
+
+        :param nodeId: The node id returned by :meth:`addNode`
+        :type nodeId: int
+        :param name: The attribute name
+        :type name: str
+        :param attrType: The attrtypes constant
+        :type attrType: int
+        :param value: The python value, supported types are bool, int, float, str and sequences of numbers or \
+        strings, anything else is stored as None.
+        :type value: any
+        :param isArray: True if the attribute is an array
+        :type isArray: bool
+        :param locked: True if the plug is locked
+        :type locked: bool
+        """
+        kind, index = self._addValue(value)
+        self.attrNodes.append(nodeId)
+        self.attrNames.append(self.addString(name))
+        self.attrTypes.append(attrType if attrType is not None else -1)
+        self.attrFlags.append((ATTR_ARRAY if isArray else 0) | (ATTR_LOCKED if locked else 0))
+        self.valueKinds.append(kind)
+        self.valueIndices.append(index)
+
+    def attribute(self, index):
+        """Returns the attribute information for the attribute table index.
+
+        :rtype: tuple(int, str, int, any, bool, bool)
+        :return: nodeId, name, attrType, value, isArray, locked
+        """
+        flags = self.attrFlags[index]
+        attrType = self.attrTypes[index]
+        return (self.attrNodes[index], self.string(self.attrNames[index]), None if attrType == -1 else attrType,
+                self._value(self.valueKinds[index], self.valueIndices[index]),
+                bool(flags & ATTR_ARRAY), bool(flags & ATTR_LOCKED))
+
+    def addEdge(self, sourceNode, sourceAttr, destinationNode, destinationAttr, destinationIndex=-1):
+        """Adds a connection to the edge list.
+
+        :param sourceNode: the source node id
+        :type sourceNode: int
+        :param sourceAttr: the source attribute name
+        :type sourceAttr: str
+        :param destinationNode: the destination node id
+        :type destinationNode: int
+        :param destinationAttr: the destination attribute name
+        :type destinationAttr: str
+        :param destinationIndex: The logical index if the destination is an array element otherwise -1
+        :type destinationIndex: int
+        """
+        self.edgeSourceNodes.append(sourceNode)
+        self.edgeSourceAttrs.append(self.addString(sourceAttr))
+        self.edgeDestinationNodes.append(destinationNode)
+        self.edgeDestinationAttrs.append(self.addString(destinationAttr))
+        self.edgeDestinationIndices.append(destinationIndex)
+
+    def edge(self, index):
+        """
+        :rtype: tuple(int, str, int, str, int)
+        :return: sourceNode, sourceAttr, destinationNode, destinationAttr, destinationIndex
+        """
+        return (self.edgeSourceNodes[index], self.string(self.edgeSourceAttrs[index]),
+                self.edgeDestinationNodes[index], self.string(self.edgeDestinationAttrs[index]),
+                self.edgeDestinationIndices[index])
+
+    def _addValue(self, value):
+        if value is None:
+            return VALUE_NONE, 0
+        elif isinstance(value, (bool, int, long)):
+            value = int(value)
+            if not _INT_MIN <= value <= _INT_MAX:
+                self.ints.append(self.addString(str(value)))
+                return VALUE_LARGE_INT, len(self.ints) - 1
+            self.ints.append(value)
+            return VALUE_INT, len(self.ints) - 1
+        elif isinstance(value, float):
+            self.floats.append(value)
+            return VALUE_FLOAT, len(self.floats) - 1
+        elif isinstance(value, basestring):
+            self.ints.append(self.addString(value))
+            return VALUE_STRING, len(self.ints) - 1
+        elif isinstance(value, (list, tuple)):
+            values = list(value)
+            if all(isinstance(i, basestring) for i in values):
+                self.sequenceOffsets.append(len(self.ints))
+                self.ints.extend(self.addString(i) for i in values)
+                kind = VALUE_STRING_SEQUENCE
+            elif all(isinstance(i, (bool, int, long, float)) for i in values):
+                self.sequenceOffsets.append(len(self.floats))
+                self.floats.extend(float(i) for i in values)
+                kind = VALUE_FLOAT_SEQUENCE
+            else:
+                logger.debug("Unsupported sequence value for meta serialization: {}".format(value))
+                return VALUE_NONE, 0
+            self.sequenceLengths.append(len(values))
+            return kind, len(self.sequenceOffsets) - 1
+        logger.debug("Unsupported value type for meta serialization: {}".format(type(value)))
+        return VALUE_NONE, 0
+
+    def _value(self, kind, index):
+        if kind == VALUE_INT:
+            return self.ints[index]
+        elif kind == VALUE_FLOAT:
+            return self.floats[index]
+        elif kind == VALUE_STRING:
+            return self.string(self.ints[index])
+        elif kind == VALUE_LARGE_INT:
+            return int(self.string(self.ints[index]))
+        elif kind in (VALUE_FLOAT_SEQUENCE, VALUE_STRING_SEQUENCE):
+            offset = self.sequenceOffsets[index]
+            end = offset + self.sequenceLengths[index]
+            if kind == VALUE_FLOAT_SEQUENCE:
+                return list(self.floats[offset:end])
+            return [self.string(i) for i in self.ints[offset:end]]
+        return None
+
+    def write(self, fileObj):
+        """Writes the data to the file object, each column is written directly so the full file is never built in
+        memory.
+
+        :param fileObj: A file like object opened in binary mode
+        :type fileObj: file
+        """
+        fileObj.write(_HEADER.pack(MAGIC, VERSION))
+        encoded = [i.encode("utf-8") for i in self.strings]
+        self._writeColumn(fileObj, array.array("I", [len(i) for i in encoded]))
+        fileObj.write(b"".join(encoded))
+        for name in _COLUMN_ORDER:
+            self._writeColumn(fileObj, getattr(self, name))
+
+    @classmethod
+    def read(cls, fileObj):
+        """Reads the data written by :meth:`write`
+
+        :param fileObj: A file like object opened in binary mode
+        :type fileObj: file
+        :rtype: :class:`MetaNetworkData`
+        :raises: ValueError if the data isn't a meta network or the version isn't supported
+        """
+        magic, version = _HEADER.unpack(_readExact(fileObj, _HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("Data isn't a zoo meta network")
+        if version > VERSION:
+            raise ValueError("Unsupported meta network version: {}".format(version))
+        data = cls()
+        lengths = cls._readColumn(fileObj, "I")
+        blob = _readExact(fileObj, sum(lengths))
+        offset = 0
+        for length in lengths:
+            data.addString(blob[offset:offset + length].decode("utf-8"))
+            offset += length
+        for name in _COLUMN_ORDER:
+            setattr(data, name, cls._readColumn(fileObj, _COLUMNS[name]))
+        return data
+
+    @staticmethod
+    def _writeColumn(fileObj, column):
+        fileObj.write(_COUNT.pack(len(column)))
+        fileObj.write(_toBytes(column))
+
+    @staticmethod
+    def _readColumn(fileObj, typeCode):
+        count = _COUNT.unpack(_readExact(fileObj, _COUNT.size))[0]
+        itemSize = array.array(typeCode).itemsize
+        return _fromBytes(typeCode, _readExact(fileObj, count * itemSize))
+
+
+def serializeNetwork(metaNodes=None):
+    """Serializes the meta nodes, their dynamic attributes and outgoing connections into :class:`MetaNetworkData`.
+    Connected nodes which aren't part of the network are stored by name only.
+
+    :param metaNodes: The meta nodes to serialize, if None then every meta node in the scene is serialized.
+    :type metaNodes: seq(om2.MObject or :class:`base.MetaBase`) or None
+    :rtype: :class:`MetaNetworkData`
+    """
+    if metaNodes is None:
+        metaNodes = [handle.object() for handle in base.MetaSceneIndex().iterHandles()]
+    else:
+        metaNodes = [i.mobject() if isinstance(i, base.MetaBase) else i for i in metaNodes]
+    data = MetaNetworkData()
+    nodeIds = {}
+    dep = om2.MFnDependencyNode()
+    nodeDep = om2.MFnDependencyNode()
+
+    def _nodeId(node, className):
+        key = om2.MObjectHandle(node).hashCode()
+        nodeId = nodeIds.get(key)
+        if nodeId is None:
+            nodeDep.setObject(node)
+            nodeId = data.addNode(nodes.nameFromMObject(node), className, nodeDep.typeName,
+                                  node.hasFn(om2.MFn.kDagNode))
+            nodeIds[key] = nodeId
+        return nodeId
+
+    for node in metaNodes:
+        dep.setObject(node)
+        _nodeId(node, dep.findPlug(base.MCLASS_ATTR_NAME, False).asString())
+
+    for node in metaNodes:
+        nodeId = nodeIds[om2.MObjectHandle(node).hashCode()]
+        dep.setObject(node)
+        sourcePlugs = []
+        for i in xrange(dep.attributeCount()):
+            attr = dep.attribute(i)
+            plug = om2.MPlug(node, attr)
+            if not plug.isDynamic or plug.isChild or plug.isCompound:
+                continue
+            attrType = plugs.plugType(plug)
+            value = None
+            if not plug.isArray and attrType != attrtypes.kMFnMessageAttribute:
+                try:
+                    value = plugs.getPythonTypeFromPlugValue(plug)
+                except (RuntimeError, ValueError):
+                    logger.debug("Failed to serialize value of plug: {}".format(plug.name()))
+            data.addAttribute(nodeId, om2.MFnAttribute(attr).name, attrType, value=value, isArray=plug.isArray,
+                              locked=plug.isLocked)
+            if plug.isSource:
+                sourcePlugs.append(plug)
+        for plug in sourcePlugs:
+            sourceName = om2.MFnAttribute(plug.attribute()).name
+            for destination in plug.destinations():
+                destinationIndex = destination.logicalIndex() if destination.isElement else -1
+                data.addEdge(nodeId, sourceName, _nodeId(destination.node(), None),
+                             om2.MFnAttribute(destination.attribute()).name, destinationIndex)
+    return data
+
+
+def deserializeNetwork(data):
+    """Recreates the meta network from :class:`MetaNetworkData`, the meta nodes are created with a single
+    modifier, the attributes with a second and all connections with a third. Non meta nodes are looked up by name
+    and any connection to a missing node is skipped.
+
+    DAG meta nodes are reparented to their serialized parent, either a DAG meta node from the same network or an
+    existing node with the same path, if the parent can't be found the node is left under the world. Shapes are
+    created directly under their parent, a transform with the serialized parent's name is created when it doesn't
+    exist. Connections to destinations which are already connected are skipped.
+
+    :type data: :class:`MetaNetworkData`
+    :return: The meta node MObjects in the same order as they were serialized.
+    :rtype: list(om2.MObject)
+    """
+    createMod = om2.MDGModifier()
+    dagMod = om2.MDagModifier()
+    created = [None] * data.nodeCount()
+    metaIds = []
+    shapeIds = []
+    # [(node, serialized full path)] so the parents can be restored once every node exists
+    dagNodes = []
+    createdPaths = {}
+    for nodeId in xrange(data.nodeCount()):
+        name, className, nodeType, isDag = data.node(nodeId)
+        if className is None:
+            try:
+                created[nodeId] = nodes.asMObject(name)
+            except RuntimeError:
+                logger.warning("Missing node: {}, connections to this node will be skipped".format(name))
+            continue
+        metaIds.append(nodeId)
+        shortName = name.split("|")[-1]
+        if isDag and _isShapeType(nodeType):
+            # shapes are created once their parent transform is known
+            shapeIds.append(nodeId)
+            continue
+        if isDag:
+            node = dagMod.createNode(nodeType)
+            dagMod.renameNode(node, shortName)
+            dagNodes.append((node, name))
+            createdPaths[name] = node
+        else:
+            node = createMod.createNode(nodeType)
+            createMod.renameNode(node, shortName)
+        created[nodeId] = node
+    for nodeId in shapeIds:
+        name, className, nodeType, isDag = data.node(nodeId)
+        # without a parent MDagModifier creates a transform and returns that instead of the shape
+        parentPath = name.rsplit("|", 1)[0]
+        parent = createdPaths.get(parentPath)
+        if parent is None:
+            try:
+                parent = nodes.asMObject(parentPath)
+            except RuntimeError:
+                parent = dagMod.createNode("transform")
+                dagMod.renameNode(parent, parentPath.split("|")[-1])
+                dagNodes.append((parent, parentPath))
+                createdPaths[parentPath] = parent
+        node = dagMod.createNode(nodeType, parent)
+        dagMod.renameNode(node, name.split("|")[-1])
+        created[nodeId] = node
+    metaNodes = [created[nodeId] for nodeId in metaIds]
+    createMod.doIt()
+    dagMod.doIt()
+    _restoreParents(dagNodes)
+
+    attrMod = om2.MDGModifier()
+    values = []
+    dep = om2.MFnDependencyNode()
+    for index in xrange(data.attributeCount()):
+        nodeId, name, attrType, value, isArray, locked = data.attribute(index)
+        node = created[nodeId]
+        dep.setObject(node)
+        if dep.hasAttribute(name):
+            attr = dep.attribute(name)
+        else:
+            attr = nodes.addAttribute(node, name, name, attrType, isArray=isArray, apply=False).object()
+            attrMod.addAttribute(node, attr)
+        values.append((node, attr, value, locked))
+    attrMod.doIt()
+    for node, attr, value, locked in values:
+        if value is None:
+            continue
+        try:
+            plugs.setPlugValue(om2.MPlug(node, attr), value)
+        except (RuntimeError, ValueError, TypeError):
+            logger.debug("Failed to set value on attribute: {}".format(om2.MFnAttribute(attr).name))
+
+    connectMod = om2.MDGModifier()
+    for index in xrange(data.edgeCount()):
+        sourceId, sourceAttr, destinationId, destinationAttr, destinationIndex = data.edge(index)
+        sourceNode, destinationNode = created[sourceId], created[destinationId]
+        if sourceNode is None or destinationNode is None:
+            continue
+        dep.setObject(destinationNode)
+        if not dep.hasAttribute(destinationAttr):
+            continue
+        destinationPlug = dep.findPlug(destinationAttr, False)
+        if destinationIndex >= 0:
+            destinationPlug = destinationPlug.elementByLogicalIndex(destinationIndex)
+        # one failed connection would stop the whole modifier so skip the ones which are already connected
+        if destinationPlug.isDestination:
+            logger.debug("Skipping connection to: {} since it's already connected".format(destinationPlug.name()))
+            continue
+        destinationPlug.isLocked = False
+        dep.setObject(sourceNode)
+        connectMod.connect(dep.findPlug(sourceAttr, False), destinationPlug)
+    connectMod.doIt()
+    for node, attr, value, locked in values:
+        if locked:
+            om2.MPlug(node, attr).isLocked = True
+    return metaNodes
+
+
+# {nodeType: bool}
+_SHAPE_TYPES = {}
+
+
+def _isShapeType(nodeType):
+    isShape = _SHAPE_TYPES.get(nodeType)
+    if isShape is None:
+        isShape = "shape" in (cmds.nodeType(nodeType, isTypeName=True, inherited=True) or [])
+        _SHAPE_TYPES[nodeType] = isShape
+    return isShape
+
+
+def _restoreParents(dagNodes):
+    createdPaths = dict((path, node) for node, path in dagNodes)
+    parentMod = om2.MDagModifier()
+    for node, path in dagNodes:
+        parentPath = path.rsplit("|", 1)[0]
+        if not parentPath:
+            continue
+        parent = createdPaths.get(parentPath)
+        if parent is None:
+            try:
+                parent = nodes.asMObject(parentPath)
+            except RuntimeError:
+                logger.warning("Missing parent: {} for node: {}, the node will be left under the world".format(
+                    parentPath, path))
+                continue
+        parentMod.reparentNode(node, parent)
+    parentMod.doIt()
+
+
+def saveNetwork(filePath, metaNodes=None):
+    """Serializes the meta network and writes it to the file.
+
+    :param filePath: The file path to write
+    :type filePath: str
+    :param metaNodes: The meta nodes to serialize, if None then every meta node in the scene is serialized.
+    :type metaNodes: seq(om2.MObject or :class:`base.MetaBase`) or None
+    :rtype: :class:`MetaNetworkData`
+    """
+    data = serializeNetwork(metaNodes)
+    with open(filePath, "wb") as f:
+        data.write(f)
+    return data
+
+
+def loadNetwork(filePath):
+    """Loads the meta network file written by :func:`saveNetwork` into the current scene.
+
+    :param filePath: The file path to read
+    :type filePath: str
+    :return: The created meta node MObjects
+    :rtype: list(om2.MObject)
+    """
+    with open(filePath, "rb") as f:
+        data = MetaNetworkData.read(f)
+    return deserializeNetwork(data)
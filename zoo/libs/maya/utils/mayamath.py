@@ -1,9 +1,22 @@
+import itertools
 import math
 
 from maya.api import OpenMaya as om2
 from maya import OpenMaya as om1
 from zoo.libs.utils import zoomath
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+try:
+    from scipy import spatial
+except ImportError:
+    spatial = None
+
+# maya rotateOrder attribute value -> the axes in the order they are applied
+ROTATE_ORDER_AXES = ((0, 1, 2), (1, 2, 0), (2, 0, 1), (0, 2, 1), (1, 0, 2), (2, 1, 0))
+
 
 def aimToNode(source, target, aimVector=None,
               upVector=None):
@@ -203,6 +216,172 @@ def toEulerFactory(rotMatrix, rotateOrder, degrees=False):
     return toEulerZYX(rotMatrix, degrees)
 
 
+def decomposeMatrices(matrices):
+    """Vectorized decomposition of row major (n, 4, 4) matrices into translation, rotation and scale, shear is
+    ignored. Requires numpy.
+
+    :param matrices: The matrices to decompose
+    :type matrices: np.ndarray
+    :return: (n, 3) translations, (n, 3, 3) rotation matrices, (n, 3) scales
+    :rtype: tuple(np.ndarray, np.ndarray, np.ndarray)
+    """
+    matrices = np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)
+    translations = matrices[:, 3, :3].copy()
+    upper = matrices[:, :3, :3]
+    # maya uses row vectors so each row of the upper 3x3 is an axis scaled by its scale value
+    scales = np.linalg.norm(upper, axis=2)
+    scales[np.linalg.det(upper) < 0.0, 0] *= -1.0
+    rotations = upper / np.where(scales == 0.0, 1.0, scales)[:, :, np.newaxis]
+    return translations, rotations, scales
+
+
+def eulerToMatrices(angles, rotateOrders=0):
+    """Vectorized conversion of euler angles to row major (n, 3, 3) rotation matrices. Requires numpy.
+
+    :param angles: (n, 3) rotations in radians
+    :type angles: np.ndarray
+    :param rotateOrders: The maya rotateOrder value, either one for all the rotations or one per rotation
+    :type rotateOrders: int or np.ndarray
+    :rtype: np.ndarray
+    """
+    angles = np.asarray(angles, dtype=np.float64).reshape(-1, 3)
+    count = len(angles)
+    cos = np.cos(angles)
+    sin = np.sin(angles)
+    axes = np.zeros((3, count, 3, 3), dtype=np.float64)
+    axes[:, :, range(3), range(3)] = 1.0
+    for axis, (a, b) in enumerate(((1, 2), (2, 0), (0, 1))):
+        axes[axis, :, a, a] = cos[:, axis]
+        axes[axis, :, b, b] = cos[:, axis]
+        axes[axis, :, a, b] = sin[:, axis]
+        axes[axis, :, b, a] = -sin[:, axis]
+    rotateOrders = np.broadcast_to(np.asarray(rotateOrders, dtype=np.int64), (count,))
+    result = np.empty((count, 3, 3), dtype=np.float64)
+    for order, (i, j, k) in enumerate(ROTATE_ORDER_AXES):
+        mask = rotateOrders == order
+        if mask.any():
+            result[mask] = np.matmul(np.matmul(axes[i][mask], axes[j][mask]), axes[k][mask])
+    return result
+
+
+def matricesToEuler(rotations, rotateOrders=0):
+    """Vectorized conversion of row major (n, 3, 3) rotation matrices to euler angles, this is the inverse of
+    :func:`eulerToMatrices`. At gimbal lock the last axis is set to zero. Requires numpy.
+
+    :param rotations: The rotation matrices without scale
+    :type rotations: np.ndarray
+    :param rotateOrders: The maya rotateOrder value, either one for all the rotations or one per rotation
+    :type rotateOrders: int or np.ndarray
+    :return: (n, 3) rotations in radians
+    :rtype: np.ndarray
+    """
+    rotations = np.asarray(rotations, dtype=np.float64).reshape(-1, 3, 3)
+    count = len(rotations)
+    rotateOrders = np.broadcast_to(np.asarray(rotateOrders, dtype=np.int64), (count,))
+    # the transpose is the column vector form Rk * Rj * Ri which the standard formulas are written for
+    columns = np.swapaxes(rotations, 1, 2)
+    result = np.zeros((count, 3), dtype=np.float64)
+    for order, (i, j, k) in enumerate(ROTATE_ORDER_AXES):
+        mask = rotateOrders == order
+        if not mask.any():
+            continue
+        r = columns[mask]
+        sign = 1.0 if (j - i) % 3 == 1 else -1.0
+        sinJ = np.clip(-sign * r[:, k, i], -1.0, 1.0)
+        locked = np.abs(sinJ) > 1.0 - 1e-9
+        angles = np.empty((len(r), 3), dtype=np.float64)
+        angles[:, j] = np.arcsin(sinJ)
+        angles[:, i] = np.where(locked, np.arctan2(-sign * r[:, j, k], r[:, j, j]),
+                                np.arctan2(sign * r[:, k, j], r[:, k, k]))
+        angles[:, k] = np.where(locked, 0.0, np.arctan2(sign * r[:, j, i], r[:, i, i]))
+        result[mask] = angles
+    return result
+
+
+def closestPointIndices(points, queryPoints):
+    """Vectorized nearest neighbour search, returns the index of the closest point in points for every query point.
+    Uses a scipy KD-tree when scipy is available, otherwise a uniform grid over the points. Requires numpy.
+
+    :param points: (n, 3) points to search
+    :type points: np.ndarray
+    :param queryPoints: (m, 3) points to find the closest point for
+    :type queryPoints: np.ndarray
+    :return: (m,) indices into points and the (m,) distances to them
+    :rtype: tuple(np.ndarray, np.ndarray)
+    """
+    points = np.ascontiguousarray(points, dtype=np.float64)[:, :3]
+    queryPoints = np.ascontiguousarray(queryPoints, dtype=np.float64)[:, :3]
+    if spatial is not None:
+        distances, indices = spatial.cKDTree(points).query(queryPoints)
+        return indices, distances
+    return _gridClosestPoints(points, queryPoints)
+
+
+def _gridClosestPoints(points, queryPoints, pointsPerCell=4.0, chunkMemory=4000000):
+    mins = points.min(axis=0)
+    extents = points.max(axis=0) - mins
+    # size the cells from the axes which have an extent so flat meshes don't end up with huge cells
+    solid = extents > extents.max() * 1e-6
+    if solid.any():
+        cellSize = (np.prod(extents[solid]) / len(points) * pointsPerCell) ** (1.0 / np.count_nonzero(solid))
+    else:
+        cellSize = 1.0
+    # surfaces fill few of the cells of their bounding volume, so shrink the cells until the occupied ones hold
+    # about pointsPerCell points each
+    for _ in range(4):
+        dims = np.floor(extents / cellSize).astype(np.int64) + 1
+        strides = np.array([dims[1] * dims[2], dims[2], 1], dtype=np.int64)
+        keys = np.floor((points - mins) / cellSize).astype(np.int64).dot(strides)
+        occupancy = len(points) / float(len(np.unique(keys)))
+        if occupancy < pointsPerCell * 2.0:
+            break
+        cellSize /= math.sqrt(occupancy / pointsPerCell)
+    order = np.argsort(keys, kind="stable")
+    sortedKeys = keys[order]
+
+    scaled = (queryPoints - mins) / cellSize
+    queryCells = np.floor(scaled).astype(np.int64)
+    # flat axes only have a single cell, the offset along them is the same for every point
+    queryCells[:, ~solid] = 0
+    flatOffsets = np.sum(np.square(queryPoints[:, ~solid] - mins[~solid]), axis=1)
+    # search the 2x2x2 block of cells around the cell corner closest to the point, which covers at least half a cell
+    # in every direction
+    directions = np.where(scaled - queryCells < 0.5, -1, 1)
+    best = np.full(len(queryPoints), np.inf)
+    indices = np.zeros(len(queryPoints), dtype=np.int64)
+    for offset in itertools.product(*[(0, 1) if solid[axis] else (0,) for axis in range(3)]):
+        cells = queryCells + directions * offset
+        valid = np.all((cells >= 0) & (cells < dims), axis=1)
+        keys = cells.dot(strides)
+        start = np.searchsorted(sortedKeys, keys, side="left")
+        counts = np.where(valid, np.searchsorted(sortedKeys, keys, side="right") - start, 0)
+        active = np.flatnonzero(counts)
+        slot = 0
+        # walk the points of each cell, one vectorized pass per slot
+        while len(active):
+            candidates = order[start[active] + slot]
+            delta = points[candidates] - queryPoints[active]
+            distances = np.einsum("ij,ij->i", delta, delta)
+            closer = distances < best[active]
+            best[active[closer]] = distances[closer]
+            indices[active[closer]] = candidates[closer]
+            slot += 1
+            active = active[counts[active] > slot]
+
+    # anything closer than half a cell is guaranteed to be within the searched cells, brute force the rest
+    unresolved = np.flatnonzero(best > cellSize * cellSize * 0.25 + flatOffsets)
+    chunkSize = max(1, chunkMemory // len(points))
+    squaredLengths = np.einsum("ij,ij->i", points, points)
+    for i in range(0, len(unresolved), chunkSize):
+        chunk = unresolved[i:i + chunkSize]
+        # |p - q|^2 without the constant |q|^2 term, which doesn't change the closest point
+        nearest = np.argmin(squaredLengths - 2.0 * queryPoints[chunk].dot(points.T), axis=1)
+        delta = points[nearest] - queryPoints[chunk]
+        indices[chunk] = nearest
+        best[chunk] = np.einsum("ij,ij->i", delta, delta)
+    return indices, np.sqrt(best)
+
+
 def mirrorXY(rotationMatrix):
     rotMat = om2.MMatrix(rotationMatrix)
     rotMat[0] *= -1